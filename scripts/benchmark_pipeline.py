@@ -0,0 +1,342 @@
+"""
+benchmark_pipeline.py
+Benchmark de punta a punta del pipeline con datos sintéticos a varias escalas.
+
+Por cada escala genera datos con generate_synthetic_data.py en un sandbox (copia de
+scripts/, web/scripts/ y los insumos pequeños de data/ y outputs/model), corre cada
+etapa como subproceso y mide con os.wait4:
+
+    consolidar       scripts/consolidate_data.py
+    limpiar_mapeo    scripts/clean_causes.py            (generar_mapeo)
+    limpiar_aplicar  scripts/clean_causes.py --apply    (aplicar_correcciones)
+    entrenar         scripts/train_model.py
+    clasificar       scripts/classify_all_causes.py
+    tarificar        scripts/calculate_tarificacion.py  (incluye construir el cubo)
+    preparar_web     web/scripts/prepare-data.py --forzar
+
+Métricas por etapa: tiempo de reloj, tiempo de CPU (usuario + sistema), RSS máximo
+y filas de entrada por segundo. Se corre cada escala --repeticiones veces
+(default 3) y se guarda el mejor valor de cada métrica. El resultado se compara contra la línea base guardada: una etapa
+que empeora más que --umbral en tiempo o en memoria (y más que un mínimo absoluto,
+para no fallar por ruido en etapas cortas) termina con código 1.
+
+La línea base versionada (outputs/benchmarks/linea_base.json) registra la máquina,
+el commit y la versión de Python con que se midió; en otra máquina se avisa y
+conviene fijar una propia con --guardar-base antes de comparar.
+
+Uso:
+    python scripts/benchmark_pipeline.py                          # 10k, 100k, 1m filas
+    python scripts/benchmark_pipeline.py --escalas 10k,20m --repeticiones 5
+    python scripts/benchmark_pipeline.py --guardar-base           # fija la línea base
+    python scripts/benchmark_pipeline.py --umbral 0.10 --sandbox /tmp/gmm-bench
+
+Salida:
+    - outputs/benchmarks/benchmark_<fecha>.json
+    - outputs/benchmarks/linea_base.json (con --guardar-base)
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+BENCHMARK_DIR = BASE_DIR / "outputs" / "benchmarks"
+BASE_FILE = BENCHMARK_DIR / "linea_base.json"
+
+# Lo que necesita el pipeline además de los datos generados
+COPIAR = ['scripts', 'web/scripts', 'data/classified', 'data/labeled', 'data/cleaning',
+          'data/parameters', 'outputs/model']
+
+ESCALAS = [10_000, 100_000, 1_000_000]
+REPETICIONES = 3        # Mejor de N: una sola corrida varía hasta ~25% en etapas de segundos
+UMBRAL = 0.25
+MINIMO_SEGUNDOS = 1.0   # Diferencias menores no cuentan como regresión
+MINIMO_RSS_MB = 32.0
+METRICAS_COMPARADAS = [('segundos', MINIMO_SEGUNDOS), ('rss_mb', MINIMO_RSS_MB)]
+
+# ============================================
+# ETAPAS
+# ============================================
+
+
+def filas_procesados(sandbox: Path) -> int:
+    return sum(pq.ParquetFile(ruta).metadata.num_rows
+               for ruta in (sandbox / "data" / "processed").glob("*.parquet"))
+
+
+def filas_siniestros(sandbox: Path) -> int:
+    return pq.ParquetFile(sandbox / "data" / "consolidated" / "siniestros.parquet").metadata.num_rows
+
+
+def filas_entrenamiento(sandbox: Path) -> int:
+    return len(pd.read_csv(sandbox / "data" / "labeled" / "training_set.csv", usecols=['causa']))
+
+
+# (nombre, comando relativo al sandbox, filas de entrada); cada etapa usa lo que
+# dejó la anterior
+ETAPAS = [
+    ('consolidar', ['scripts/consolidate_data.py'], filas_procesados),
+    ('limpiar_mapeo', ['scripts/clean_causes.py'], filas_siniestros),
+    ('limpiar_aplicar', ['scripts/clean_causes.py', '--apply'], filas_siniestros),
+    ('entrenar', ['scripts/train_model.py'], filas_entrenamiento),
+    ('clasificar', ['scripts/classify_all_causes.py'], filas_siniestros),
+    ('tarificar', ['scripts/calculate_tarificacion.py'], filas_siniestros),
+    ('preparar_web', ['web/scripts/prepare-data.py', '--forzar'], filas_siniestros),
+]
+
+
+def leer_escala(texto: str) -> int:
+    """'10k' → 10_000, '1m' → 1_000_000, '250000' → 250_000."""
+    texto = texto.strip().lower().replace('_', '')
+    multiplicador = {'k': 1_000, 'm': 1_000_000}.get(texto[-1:], 1)
+    return int(float(texto.rstrip('km')) * multiplicador)
+
+
+# ============================================
+# MEDICIÓN
+# ============================================
+
+def ejecutar(comando: list, sandbox: Path, log: Path) -> dict:
+    """
+    Corre un script del sandbox y mide el proceso hijo con os.wait4
+    (la rusage es solo de ese proceso, no del benchmark).
+    """
+    env = dict(os.environ, PYTHONHASHSEED='0', MPLBACKEND='Agg', PYTHONDONTWRITEBYTECODE='1')
+    with open(log, 'w', encoding='utf-8') as salida:
+        inicio = time.perf_counter()
+        proceso = subprocess.Popen([sys.executable, *comando], cwd=sandbox, env=env,
+                                   stdout=salida, stderr=subprocess.STDOUT)
+        _, estado, uso = os.wait4(proceso.pid, 0)
+        segundos = time.perf_counter() - inicio
+    proceso.returncode = os.waitstatus_to_exitcode(estado)
+
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    rss = uso.ru_maxrss / 2**20 if sys.platform == 'darwin' else uso.ru_maxrss / 2**10
+    return {
+        'codigo': proceso.returncode,
+        'segundos': round(segundos, 3),
+        'cpu_segundos': round(uso.ru_utime + uso.ru_stime, 3),
+        'rss_mb': round(rss, 1),
+    }
+
+
+def preparar_sandbox(destino: Path, procesados: Path) -> Path:
+    """Copia el código e insumos pequeños; los parquet generados se enlazan."""
+    for relativa in COPIAR:
+        origen = BASE_DIR / relativa
+        if origen.exists():
+            shutil.copytree(origen, destino / relativa,
+                            ignore=shutil.ignore_patterns('__pycache__', '*.pyc'))
+    (destino / "data" / "processed").mkdir(parents=True)
+    for ruta in procesados.glob("*.parquet"):
+        os.link(ruta, destino / "data" / "processed" / ruta.name)
+    return destino
+
+
+def correr_escala(filas: int, raiz: Path, semilla: int, repeticiones: int) -> dict:
+    """Genera los datos una vez y corre el pipeline completo N veces."""
+    procesados = raiz / "procesados"
+    inicio = time.perf_counter()
+    generacion = subprocess.run(
+        [sys.executable, str(BASE_DIR / "scripts" / "generate_synthetic_data.py"),
+         '--filas', str(filas), '--semilla', str(semilla),
+         '--destino', str(procesados), '--forzar'],
+        capture_output=True, text=True)
+    if generacion.returncode != 0:
+        print(generacion.stdout[-2000:], generacion.stderr[-2000:])
+        raise RuntimeError(f"Falló la generación de datos sintéticos ({filas:,} filas)")
+    resultado = {'generacion_segundos': round(time.perf_counter() - inicio, 3), 'etapas': {}}
+
+    for r in range(repeticiones):
+        sandbox = preparar_sandbox(raiz / f"corrida_{r + 1}", procesados)
+        (sandbox / "logs").mkdir()
+        for nombre, comando, contar in ETAPAS:
+            try:
+                entrada = contar(sandbox)
+            except FileNotFoundError:
+                entrada = 0  # La etapa fallará y su log dirá por qué
+            medicion = ejecutar(comando, sandbox, sandbox / "logs" / f"{nombre}.log")
+            medicion['filas'] = entrada
+            medicion['filas_por_segundo'] = round(entrada / max(medicion['segundos'], 1e-9))
+
+            previa = resultado['etapas'].get(nombre)
+            if previa is None or medicion['codigo'] != 0:
+                resultado['etapas'][nombre] = medicion
+            elif previa['codigo'] == 0:
+                # Mejor de N por métrica
+                for metrica in ['segundos', 'cpu_segundos', 'rss_mb']:
+                    previa[metrica] = min(previa[metrica], medicion[metrica])
+                previa['filas_por_segundo'] = round(entrada / max(previa['segundos'], 1e-9))
+
+            estado = '✓' if medicion['codigo'] == 0 else '✗'
+            print(f"   {estado} {nombre:<16} {medicion['segundos']:>9.2f} s "
+                  f"{medicion['cpu_segundos']:>9.2f} s CPU {medicion['rss_mb']:>9.1f} MB "
+                  f"{medicion['filas_por_segundo']:>12,} filas/s")
+            if medicion['codigo'] != 0:
+                resultado['error'] = f"{nombre} terminó con código {medicion['codigo']} " \
+                                     f"(log: {sandbox / 'logs' / f'{nombre}.log'})"
+                return resultado
+    return resultado
+
+
+# ============================================
+# COMPARACIÓN CON LA LÍNEA BASE
+# ============================================
+
+def comparar(resultados: dict, base: dict, umbral: float) -> list:
+    """Regresiones (escala, etapa, métrica, base, actual, cambio) contra la línea base."""
+    regresiones = []
+    for escala, datos in resultados['escalas'].items():
+        etapas_base = base.get('escalas', {}).get(escala, {}).get('etapas', {})
+        for nombre, medicion in datos['etapas'].items():
+            previa = etapas_base.get(nombre)
+            if previa is None or previa.get('codigo') != 0 or medicion['codigo'] != 0:
+                continue
+            for metrica, minimo in METRICAS_COMPARADAS:
+                antes, ahora = previa[metrica], medicion[metrica]
+                if ahora > antes * (1 + umbral) and ahora - antes > minimo:
+                    regresiones.append((escala, nombre, metrica, antes, ahora,
+                                        ahora / max(antes, 1e-9) - 1))
+    return regresiones
+
+
+def imprimir_comparacion(resultados: dict, base: dict) -> None:
+    print(f"\n   {'Escala':>10} {'Etapa':<16} {'Tiempo':>18} {'RSS máximo':>22}")
+    for escala, datos in resultados['escalas'].items():
+        etapas_base = base.get('escalas', {}).get(escala, {}).get('etapas', {})
+        for nombre, medicion in datos['etapas'].items():
+            previa = etapas_base.get(nombre)
+            if previa is None:
+                continue
+            cambio_t = medicion['segundos'] / max(previa['segundos'], 1e-9) - 1
+            cambio_m = medicion['rss_mb'] / max(previa['rss_mb'], 1e-9) - 1
+            print(f"   {int(escala):>10,} {nombre:<16} {medicion['segundos']:>8.2f} s "
+                  f"({cambio_t:+7.1%}) {medicion['rss_mb']:>9.1f} MB ({cambio_m:+7.1%})")
+
+
+def commit_actual() -> str:
+    try:
+        salida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                                capture_output=True, text=True, check=True)
+        return salida.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de punta a punta del pipeline")
+    parser.add_argument('--escalas', default=','.join(str(e) for e in ESCALAS),
+                        help="Filas de siniestros por escala, p. ej. 10k,100k,1m")
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES,
+                        help="Corridas por escala; se guarda la mejor de cada métrica (default: 3)")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--umbral', type=float, default=UMBRAL,
+                        help="Empeoramiento relativo que cuenta como regresión (default: 0.25)")
+    parser.add_argument('--base', type=Path, default=BASE_FILE, help="Línea base (.json)")
+    parser.add_argument('--guardar-base', action='store_true',
+                        help="Guardar este resultado como línea base (no compara)")
+    parser.add_argument('--sandbox', type=Path,
+                        help="Directorio de trabajo (se conserva); por defecto uno temporal")
+    args = parser.parse_args()
+
+    try:
+        escalas = [leer_escala(e) for e in args.escalas.split(',') if e.strip()]
+    except ValueError:
+        parser.error(f"--escalas inválidas: {args.escalas}")
+    if not escalas or min(escalas) < 5 or args.repeticiones < 1:
+        parser.error("--escalas debe tener valores >= 5 y --repeticiones ser positivo")
+
+    print("=" * 70)
+    print("BENCHMARK DEL PIPELINE")
+    print("=" * 70)
+    print(f"  Escalas: {', '.join(f'{e:,}' for e in escalas)} filas | "
+          f"Repeticiones: {args.repeticiones} | Semilla: {args.semilla}")
+
+    raiz = args.sandbox or Path(tempfile.mkdtemp(prefix='gmm-benchmark-'))
+    raiz.mkdir(parents=True, exist_ok=True)
+    print(f"  Sandbox: {raiz}")
+
+    resultados = {
+        'version': 1,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit_actual(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'semilla': args.semilla,
+        'repeticiones': args.repeticiones,
+        'escalas': {},
+    }
+    fallas = []
+    terminado = False
+    try:
+        for i, filas in enumerate(escalas, start=1):
+            print(f"\n[{i}/{len(escalas)}] Escala: {filas:,} filas...")
+            destino = raiz / f"escala_{filas}"
+            if destino.exists():
+                shutil.rmtree(destino)
+            resultado = correr_escala(filas, destino, args.semilla, args.repeticiones)
+            print(f"   Generación de datos: {resultado['generacion_segundos']:.2f} s")
+            resultados['escalas'][str(filas)] = resultado
+            if 'error' in resultado:
+                fallas.append(resultado['error'])
+        terminado = True
+    finally:
+        # Con fallas se conserva el sandbox para revisar los logs
+        if args.sandbox is None and terminado and not fallas:
+            shutil.rmtree(raiz, ignore_errors=True)
+
+    BENCHMARK_DIR.mkdir(parents=True, exist_ok=True)
+    salida = BENCHMARK_DIR / f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=2)
+    print(f"\n  ✓ {salida}")
+
+    for falla in fallas:
+        print(f"  ERROR: {falla}")
+    if fallas:
+        sys.exit(1)
+
+    if args.guardar_base:
+        args.base.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.base, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"  ✓ Línea base: {args.base}")
+        return
+
+    if not args.base.exists():
+        print(f"\n  Sin línea base en {args.base}; créela con --guardar-base")
+        return
+
+    with open(args.base, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    if base.get('plataforma') != resultados['plataforma'] or base.get('cpus') != resultados['cpus']:
+        print(f"\n  Aviso: la línea base se midió en otra máquina "
+              f"({base.get('plataforma')}, {base.get('cpus')} CPUs)")
+
+    print(f"\n  Comparación con la línea base ({base.get('fecha')}, commit {base.get('commit')}):")
+    imprimir_comparacion(resultados, base)
+
+    regresiones = comparar(resultados, base, args.umbral)
+    if regresiones:
+        print(f"\n  REGRESIONES (umbral {args.umbral:.0%}):")
+        for escala, nombre, metrica, antes, ahora, cambio in regresiones:
+            print(f"   {int(escala):>10,} {nombre:<16} {metrica:<10} {antes:>10,.2f} → {ahora:>10,.2f} ({cambio:+.1%})")
+        sys.exit(1)
+    print(f"\n  ✓ Sin regresiones mayores a {args.umbral:.0%}")
+
+
+if __name__ == "__main__":
+    main()
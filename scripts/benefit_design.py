@@ -0,0 +1,276 @@
+"""
+benefit_design.py
+Primas por diseño de beneficios: rejilla deducible × coaseguro × tope de coaseguro.
+
+La tarificación solo valora MONTO_PAGADO bajo el diseño vigente. Aquí se parte del
+monto reclamado (pérdida antes de deducible y coaseguro) y se valora el pago
+esperado de la aseguradora para cualquier diseño:
+
+    exceso = max(x - D, 0)
+    pago   = exceso - min(c · exceso, T)      = (1 - c)·(x - D)₊ + c·(x - D - T/c)₊
+
+    E[pago] = (1 - c)·S(D) + c·S(D + T/c),    S(d) = E[(x - d)₊]  (stop-loss)
+
+    prima_riesgo(edad, nivel, diseño) = frecuencia(edad, nivel) × E[pago | edad, nivel]
+
+La distribución del monto por siniestro de cada celda edad × nivel se resume en
+tramos de cuantiles ponderados por NUM_SINIESTROS (media y peso de cada tramo),
+calculados para todas las celdas a la vez.
+Las celdas con menos de MIN_SINIESTROS_CREDIBILIDAD siniestros usan la forma de la
+distribución de su nivel escalada a su propia media.
+
+Con la descomposición en S(d) solo hay que evaluar la función stop-loss en los
+umbrales distintos de la rejilla (D y D + T/c), todas las celdas a la vez; cientos
+de diseños se valoran en milisegundos.
+
+Uso:
+    python scripts/benefit_design.py
+    python scripts/benefit_design.py --deducibles 0 10000 50000 --coaseguros 0.1 0.2 --topes 30000 inf
+
+Salida:
+    - outputs/tarificacion/primas_diseno_beneficios.csv (diseño × edad × nivel)
+    - outputs/tarificacion/resumen_diseno_beneficios.csv (un renglón por diseño)
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from calculate_tarificacion import (
+    DATA_CONSOLIDATED, DATA_CLASSIFIED, EDAD_MIN, EDAD_MAX, INFLACION_MEDICA,
+    MIN_SINIESTROS_CREDIBILIDAD, NIVEL_DESCRIPCION, FACTOR_MENSUAL_2025,
+)
+from causa_catalog import mapear_nivel
+from build_cube import cargar_cubo
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "outputs" / "tarificacion"
+PRIMAS_FILE = OUTPUT_DIR / "primas_diseno_beneficios.csv"
+RESUMEN_FILE = OUTPUT_DIR / "resumen_diseno_beneficios.csv"
+
+NIVELES = 3
+N_EDADES = EDAD_MAX - EDAD_MIN + 1
+N_CUANTILES = 200
+
+# Rejilla por defecto (rangos típicos en México, ver docs/tarificacion_colectivo_mexico.md §4.4)
+DEDUCIBLES = [0, 5_000, 10_000, 20_000, 50_000, 100_000]
+COASEGUROS = [0.0, 0.05, 0.10, 0.15, 0.20, 0.30]
+TOPES = [25_000, 50_000, 100_000, np.inf]
+
+# Umbrales de stop-loss evaluados por lote (acota la memoria: lote × celdas × tramos)
+UMBRALES_POR_LOTE = 64
+
+
+# =============================================================================
+# DISTRIBUCIÓN POR CELDA
+# =============================================================================
+
+def cargar_siniestros() -> tuple:
+    """
+    Monto reclamado por siniestro (pesos 2024) con la convención de la tarificación:
+    edades 25-70, causas clasificadas y MONTO_PAGADO >= 0.
+
+    Returns:
+        (celda edad × nivel por fila, monto por siniestro, NUM_SINIESTROS, expuestos por edad)
+    """
+    ruta = DATA_CONSOLIDATED / "siniestros.parquet"
+    columnas = ['ANIO', 'EDAD', 'CAUSA', 'NUM_SINIESTROS', 'MONTO_RECLAMADO', 'MONTO_PAGADO']
+    if 'CAUSA_ID' in pq.read_schema(ruta).names:
+        columnas.append('CAUSA_ID')
+    df = pd.read_parquet(ruta, columns=columnas)
+    df = df[(df['EDAD'] >= EDAD_MIN) & (df['EDAD'] <= EDAD_MAX) & (df['MONTO_PAGADO'] >= 0)]
+    nivel = mapear_nivel(df, pd.read_csv(DATA_CLASSIFIED / "all_causes_classified.csv"))
+    df = df[nivel.notna()]
+    nivel = nivel[nivel.notna()].to_numpy().astype(int)
+
+    num_siniestros = df['NUM_SINIESTROS'].to_numpy().astype('float64')
+    reclamado = df['MONTO_RECLAMADO'].to_numpy() * df['ANIO'].map(INFLACION_MEDICA).to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        monto = np.where(num_siniestros > 0, reclamado / num_siniestros, np.nan)
+    celda = (df['EDAD'].to_numpy().astype(int) - EDAD_MIN) * NIVELES + nivel - 1
+
+    _, cubo_exp, _ = cargar_cubo()
+    expuestos = (cubo_exp.groupby('EDAD', observed=True)['NUM_ASEGURADOS'].sum()
+                 .reindex(range(EDAD_MIN, EDAD_MAX + 1), fill_value=0).to_numpy().astype('float64'))
+    return celda, monto, num_siniestros, expuestos
+
+
+def tramos_cuantiles(grupo: np.ndarray, x: np.ndarray, w: np.ndarray,
+                     n_grupos: int, n_tramos: int = N_CUANTILES) -> tuple:
+    """
+    Distribución ponderada de x resumida en tramos de probabilidad, para todos los
+    grupos a la vez.
+
+    Las observaciones se ordenan una vez por (grupo, x) y cada una cae en el tramo
+    de probabilidad de su posición acumulada dentro del grupo. Cada tramo se
+    representa con su media ponderada y su peso, así que la media del grupo se
+    conserva exactamente (también las colas pesadas, que un cuantil puntual perdería).
+
+    Returns:
+        (valores, pesos), ambos (n_grupos, n_tramos); los pesos de cada grupo suman
+        1 (0 en grupos sin observaciones)
+    """
+    validas = np.isfinite(x) & (x >= 0) & (w > 0)
+    grupo, x, w = grupo[validas], x[validas], w[validas]
+    orden = np.lexsort((x, grupo))
+    grupo, x, w = grupo[orden], x[orden], w[orden]
+
+    total = np.bincount(grupo, weights=w, minlength=n_grupos)
+    previo = np.concatenate([[0.0], np.cumsum(total)[:-1]])
+    posicion = (np.cumsum(w) - w / 2 - previo[grupo]) / total[grupo]
+    tramo = grupo * n_tramos + np.minimum((posicion * n_tramos).astype(np.int64), n_tramos - 1)
+
+    forma = (n_grupos, n_tramos)
+    peso = np.bincount(tramo, weights=w, minlength=n_grupos * n_tramos).reshape(forma)
+    suma = np.bincount(tramo, weights=w * x, minlength=n_grupos * n_tramos).reshape(forma)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        valores = np.where(peso > 0, suma / peso, 0.0)
+        pesos = np.where(total[:, None] > 0, peso / total[:, None], 0.0)
+    return valores, pesos
+
+
+def distribucion_por_celda(celda: np.ndarray, monto: np.ndarray, num_siniestros: np.ndarray,
+                           n_tramos: int = N_CUANTILES) -> dict:
+    """
+    Distribución del monto por siniestro por celda edad × nivel; las celdas poco
+    credibles toman la forma de su nivel escalada a su media.
+
+    Returns:
+        dict: valores y pesos (E·3, Q), siniestros (E·3,), prestada (E·3,) bool
+    """
+    n_celdas = N_EDADES * NIVELES
+    siniestros = np.bincount(celda, weights=num_siniestros, minlength=n_celdas)
+    valores, pesos = tramos_cuantiles(celda, monto, num_siniestros, n_celdas, n_tramos)
+    valores_nivel, pesos_nivel = tramos_cuantiles(celda % NIVELES, monto, num_siniestros,
+                                                  NIVELES, n_tramos)
+
+    media = (valores * pesos).sum(axis=1)
+    media_nivel = (valores_nivel * pesos_nivel).sum(axis=1)
+    nivel = np.arange(n_celdas) % NIVELES
+    prestada = (siniestros < MIN_SINIESTROS_CREDIBILIDAD) & (pesos.sum(axis=1) > 0)
+    escala = media[prestada] / media_nivel[nivel[prestada]]
+    valores[prestada] = valores_nivel[nivel[prestada]] * escala[:, None]
+    pesos[prestada] = pesos_nivel[nivel[prestada]]
+    return {'valores': valores, 'pesos': pesos, 'siniestros': siniestros, 'prestada': prestada}
+
+
+# =============================================================================
+# VALORACIÓN DE LA REJILLA
+# =============================================================================
+
+def rejilla_disenos(deducibles, coaseguros, topes) -> pd.DataFrame:
+    """Producto cartesiano deducible × coaseguro × tope."""
+    indice = pd.MultiIndex.from_product([deducibles, coaseguros, topes],
+                                        names=['deducible', 'coaseguro', 'tope_coaseguro'])
+    return indice.to_frame(index=False).astype('float64')
+
+
+def stop_loss(valores: np.ndarray, pesos: np.ndarray, umbrales: np.ndarray) -> np.ndarray:
+    """S(d) = E[(x - d)₊] por umbral y celda: (U, celdas)."""
+    resultado = np.empty((len(umbrales), valores.shape[0]))
+    for inicio in range(0, len(umbrales), UMBRALES_POR_LOTE):
+        lote = umbrales[inicio:inicio + UMBRALES_POR_LOTE]
+        exceso = np.maximum(valores[None, :, :] - lote[:, None, None], 0.0)
+        resultado[inicio:inicio + len(lote)] = (exceso * pesos[None]).sum(axis=2)
+    return resultado
+
+
+def pago_esperado(distribucion: dict, disenos: pd.DataFrame) -> np.ndarray:
+    """
+    E[pago por siniestro] para cada diseño y celda: (G, celdas).
+
+    Solo se evalúa S(d) en los umbrales distintos de la rejilla.
+    """
+    D = disenos['deducible'].to_numpy()
+    c = disenos['coaseguro'].to_numpy()
+    T = disenos['tope_coaseguro'].to_numpy()
+    segundo = D + np.divide(T, c, out=np.full(len(c), np.inf), where=c > 0)
+
+    umbrales, inverso = np.unique(np.concatenate([D, segundo]), return_inverse=True)
+    S = stop_loss(distribucion['valores'], distribucion['pesos'], umbrales)
+    S_D, S_segundo = S[inverso[:len(D)]], S[inverso[len(D):]]
+    return (1 - c)[:, None] * S_D + c[:, None] * S_segundo
+
+
+def tarificar_disenos(distribucion: dict, expuestos: np.ndarray, disenos: pd.DataFrame) -> np.ndarray:
+    """Prima de riesgo (G, E, 3) = frecuencia × E[pago]."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frecuencia = distribucion['siniestros'].reshape(N_EDADES, NIVELES) / expuestos[:, None]
+    pago = pago_esperado(distribucion, disenos).reshape(len(disenos), N_EDADES, NIVELES)
+    return frecuencia[None] * pago
+
+
+def a_tablas(disenos: pd.DataFrame, primas: np.ndarray, expuestos: np.ndarray) -> tuple:
+    """Tabla larga diseño × edad × nivel y resumen por diseño."""
+    g, e, n = np.meshgrid(np.arange(len(disenos)), np.arange(N_EDADES), np.arange(NIVELES), indexing='ij')
+    tabla = disenos.iloc[g.ravel()].reset_index(drop=True)
+    tabla['edad'] = e.ravel() + EDAD_MIN
+    tabla['nivel'] = n.ravel() + 1
+    tabla['descripcion'] = tabla['nivel'].map(NIVEL_DESCRIPCION)
+    tabla['prima_riesgo'] = primas.ravel()
+    tabla['prima_mensual'] = tabla['prima_riesgo'] * FACTOR_MENSUAL_2025
+
+    # Prima promedio por asegurado (ponderada por exposición), suma de los tres niveles
+    promedio = (primas * expuestos[None, :, None]).sum(axis=1) / expuestos.sum()   # (G, 3)
+    resumen = disenos.copy()
+    for nivel in range(NIVELES):
+        resumen[f'prima_nivel_{nivel + 1}'] = promedio[:, nivel]
+    resumen['prima_riesgo'] = promedio.sum(axis=1)
+    sin_beneficio = (resumen['deducible'] == 0) & (resumen['coaseguro'] == 0)
+    base = resumen.loc[sin_beneficio, 'prima_riesgo'].max() if sin_beneficio.any() else np.nan
+    resumen['factor_vs_sin_deducible'] = resumen['prima_riesgo'] / base
+    resumen['prima_mensual'] = resumen['prima_riesgo'] * FACTOR_MENSUAL_2025
+    return tabla, resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Primas por diseño de beneficios")
+    parser.add_argument('--deducibles', type=float, nargs='+', default=DEDUCIBLES)
+    parser.add_argument('--coaseguros', type=float, nargs='+', default=COASEGUROS)
+    parser.add_argument('--topes', type=float, nargs='+', default=TOPES,
+                        help="Tope de coaseguro por siniestro ('inf' = sin tope)")
+    parser.add_argument('--cuantiles', type=int, default=N_CUANTILES, help="Tramos por celda")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("PRIMAS POR DISEÑO DE BENEFICIOS")
+    print("=" * 70)
+
+    print("\n[1/3] Distribución del monto reclamado por celda edad × nivel...")
+    inicio = time.perf_counter()
+    celda, monto, num_siniestros, expuestos = cargar_siniestros()
+    distribucion = distribucion_por_celda(celda, monto, num_siniestros, args.cuantiles)
+    print(f"  ✓ {len(celda):,} filas, {args.cuantiles} tramos de cuantiles por celda "
+          f"({time.perf_counter() - inicio:.2f} s)")
+    print(f"  Celdas con forma prestada de su nivel (< {MIN_SINIESTROS_CREDIBILIDAD} siniestros): "
+          f"{distribucion['prestada'].sum()} de {N_EDADES * NIVELES}")
+
+    print("\n[2/3] Valorando la rejilla de diseños...")
+    disenos = rejilla_disenos(args.deducibles, args.coaseguros, args.topes)
+    inicio = time.perf_counter()
+    primas = tarificar_disenos(distribucion, expuestos, disenos)
+    segundos = time.perf_counter() - inicio
+    print(f"  ✓ {len(disenos):,} diseños × {N_EDADES * NIVELES} celdas en {segundos * 1000:.1f} ms")
+
+    tabla, resumen = a_tablas(disenos, primas, expuestos)
+    print(f"\n  {'Deducible':>10} {'Coaseguro':>10} {'Tope':>10} {'Prima anual':>12} {'Factor':>8}")
+    muestra = resumen[resumen['tope_coaseguro'] == resumen['tope_coaseguro'].max()]
+    for _, fila in muestra.iloc[::max(len(muestra) // 12, 1)].iterrows():
+        print(f"  {fila['deducible']:>10,.0f} {fila['coaseguro']:>10.0%} {fila['tope_coaseguro']:>10,.0f} "
+              f"${fila['prima_riesgo']:>11,.2f} {fila['factor_vs_sin_deducible']:>8.3f}")
+
+    print("\n[3/3] Guardando resultados...")
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    tabla.to_csv(PRIMAS_FILE, index=False)
+    resumen.to_csv(RESUMEN_FILE, index=False)
+    print(f"  ✓ {PRIMAS_FILE}")
+    print(f"  ✓ {RESUMEN_FILE}")
+
+
+if __name__ == "__main__":
+    main()
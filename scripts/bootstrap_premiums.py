@@ -0,0 +1,227 @@
+"""
+bootstrap_premiums.py
+Intervalos de confianza bootstrap para frecuencia, severidad y prima de riesgo.
+
+La bandera `credible` (>= 30 siniestros) no dice qué tan incierta es la prima de
+una celda. Este módulo remuestrea las sub-celdas del cubo pre-agregado
+(ANIO × EDAD × SEXO × ENTIDAD × NIVEL) con pesos Poisson(1): cada réplica multiplica
+siniestros y monto ajustado de cada sub-celda por su peso, lo que equivale a un
+bootstrap compuesto (número y monto de siniestros se remuestrean juntos). La
+exposición se mantiene fija.
+
+Las réplicas se agregan a celdas edad × nivel con un producto por una matriz
+dispersa sub-celda → celda, por bloques de réplicas repartidos en procesos. Cada
+bloque tiene su propia semilla (SeedSequence.spawn), así que el resultado es
+reproducible e independiente del número de procesos.
+
+Uso:
+    python scripts/bootstrap_premiums.py
+    python scripts/bootstrap_premiums.py --replicas 2000 --procesos 4 --semilla 7
+
+Salida:
+    - outputs/tarificacion/primas_ic.csv
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from calculate_tarificacion import EDAD_MIN, EDAD_MAX, NIVEL_DESCRIPCION, FACTOR_MENSUAL_2025
+from build_cube import cargar_cubo
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "outputs" / "tarificacion"
+IC_FILE = OUTPUT_DIR / "primas_ic.csv"
+
+REPLICAS = 1000
+NIVEL_CONFIANZA = 0.95
+SEMILLA = 20250101
+REPLICAS_POR_BLOQUE = 100
+
+NIVELES = 3
+EDADES = np.arange(EDAD_MIN, EDAD_MAX + 1)
+
+# Matrices del proceso trabajador (se asignan una vez por proceso)
+_MATRICES = None
+
+
+def _inicializar_trabajador(matrices: tuple):
+    global _MATRICES
+    _MATRICES = matrices
+
+
+# =============================================================================
+# PREPARACIÓN
+# =============================================================================
+
+def preparar_subceldas(cubo_siniestros: pd.DataFrame, cubo_exposicion: pd.DataFrame) -> dict:
+    """
+    Matrices dispersas sub-celda → celda edad × nivel (con la convención de la
+    tarificación: solo causas clasificadas y montos >= 0) y exposición por edad.
+
+    Returns:
+        dict: siniestros (J × C), monto (J × C), expuestos (E,)
+    """
+    sub = cubo_siniestros[(cubo_siniestros['NIVEL'] > 0) & (cubo_siniestros['NUM_SINIESTROS'] > 0)]
+    celda = ((sub['EDAD'].to_numpy().astype(int) - EDAD_MIN) * NIVELES
+             + sub['NIVEL'].to_numpy().astype(int) - 1)
+    filas = np.arange(len(sub))
+    forma = (len(sub), len(EDADES) * NIVELES)
+
+    siniestros = sparse.csr_matrix((sub['NUM_SINIESTROS'].to_numpy(dtype='float64'), (filas, celda)), shape=forma)
+    monto = sparse.csr_matrix((sub['MONTO_AJUSTADO'].to_numpy(dtype='float64'), (filas, celda)), shape=forma)
+
+    exposicion = cubo_exposicion.groupby('EDAD', observed=True)['NUM_ASEGURADOS'].sum()
+    expuestos = exposicion.reindex(EDADES, fill_value=0).to_numpy(dtype='float64')
+    return {'siniestros': siniestros, 'monto': monto, 'expuestos': expuestos}
+
+
+# =============================================================================
+# RÉPLICAS
+# =============================================================================
+
+def replicar_bloque(semilla: np.random.SeedSequence, n_replicas: int, matrices: tuple = None) -> tuple:
+    """
+    Genera n_replicas réplicas Poisson y las agrega a celdas.
+
+    Returns:
+        tuple: (siniestros, monto), cada uno (n_replicas, C)
+    """
+    siniestros, monto = matrices if matrices is not None else _MATRICES
+    rng = np.random.default_rng(semilla)
+    pesos = rng.poisson(1.0, size=(siniestros.shape[0], n_replicas)).astype('float64')
+    # (C × J) @ (J × B) → (C × B): un producto disperso por matriz
+    return (siniestros.T @ pesos).T, (monto.T @ pesos).T
+
+
+def ejecutar_bootstrap(matrices: tuple, replicas: int = REPLICAS, semilla: int = SEMILLA,
+                       procesos: int = 1, por_bloque: int = REPLICAS_POR_BLOQUE) -> tuple:
+    """
+    Ejecuta todas las réplicas por bloques (en serie o en un pool de procesos).
+
+    Returns:
+        tuple: (siniestros, monto), cada uno (replicas, C)
+    """
+    tamanos = [por_bloque] * (replicas // por_bloque)
+    if replicas % por_bloque:
+        tamanos.append(replicas % por_bloque)
+    semillas = np.random.SeedSequence(semilla).spawn(len(tamanos))
+
+    if procesos <= 1:
+        resultados = [replicar_bloque(s, n, matrices) for s, n in zip(semillas, tamanos)]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador,
+                                 initargs=(matrices,)) as pool:
+            resultados = list(pool.map(replicar_bloque, semillas, tamanos))
+
+    return (np.concatenate([r[0] for r in resultados]),
+            np.concatenate([r[1] for r in resultados]))
+
+
+def percentiles(valores: np.ndarray, nivel_confianza: float) -> tuple:
+    """Percentiles inferior y superior por columna (ignorando NaN)."""
+    alfa = (1 - nivel_confianza) / 2
+    with np.errstate(invalid='ignore'):
+        inf, sup = np.nanpercentile(valores, [alfa * 100, (1 - alfa) * 100], axis=0)
+    return inf, sup
+
+
+def construir_intervalos(matrices_obs: tuple, expuestos: np.ndarray, replicas: tuple,
+                         nivel_confianza: float) -> pd.DataFrame:
+    """
+    Estimaciones puntuales e intervalos por celda edad × nivel y por nivel.
+
+    Args:
+        matrices_obs: (siniestros, monto) dispersas J × C observadas
+        expuestos: exposición por edad (E,)
+        replicas: (siniestros, monto) réplicas (B, C)
+    """
+    s_obs = np.asarray(matrices_obs[0].sum(axis=0)).ravel()
+    m_obs = np.asarray(matrices_obs[1].sum(axis=0)).ravel()
+    s_rep, m_rep = replicas
+    e_celda = np.repeat(expuestos, NIVELES)
+
+    # Por nivel: se suman las celdas de todas las edades
+    s_obs_n = s_obs.reshape(-1, NIVELES).sum(axis=0)
+    m_obs_n = m_obs.reshape(-1, NIVELES).sum(axis=0)
+    s_rep_n = s_rep.reshape(len(s_rep), -1, NIVELES).sum(axis=1)
+    m_rep_n = m_rep.reshape(len(m_rep), -1, NIVELES).sum(axis=1)
+    e_nivel = np.full(NIVELES, expuestos.sum())
+
+    bloques = []
+    for ambito, s, m, e, s_r, m_r, edad, nivel in [
+        ('celda', s_obs, m_obs, e_celda, s_rep, m_rep,
+         np.repeat(EDADES, NIVELES).astype(object), np.tile(np.arange(1, NIVELES + 1), len(EDADES))),
+        ('nivel', s_obs_n, m_obs_n, e_nivel, s_rep_n, m_rep_n,
+         np.full(NIVELES, 'TODAS', dtype=object), np.arange(1, NIVELES + 1)),
+    ]:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frecuencia, frecuencia_r = s / e, s_r / e
+            severidad = np.where(s > 0, m / s, np.nan)
+            severidad_r = np.where(s_r > 0, m_r / s_r, np.nan)
+            prima, prima_r = m / e, m_r / e
+
+        df = pd.DataFrame({'ambito': ambito, 'edad': edad, 'nivel': nivel,
+                           'num_siniestros': s.astype(int), 'expuestos': e})
+        for nombre, punto, rep in [('frecuencia', frecuencia, frecuencia_r),
+                                   ('severidad', severidad, severidad_r),
+                                   ('prima_riesgo', np.where(s > 0, prima, np.nan), prima_r)]:
+            inf, sup = percentiles(rep, nivel_confianza)
+            df[nombre] = punto
+            df[f'{nombre}_inf'] = inf
+            df[f'{nombre}_sup'] = sup
+        df['prima_mensual'] = df['prima_riesgo'] * FACTOR_MENSUAL_2025
+        df['prima_mensual_inf'] = df['prima_riesgo_inf'] * FACTOR_MENSUAL_2025
+        df['prima_mensual_sup'] = df['prima_riesgo_sup'] * FACTOR_MENSUAL_2025
+        df['cv_prima'] = np.nanstd(prima_r, axis=0) / np.where(s > 0, prima, np.nan)
+        bloques.append(df)
+
+    resultado = pd.concat(bloques, ignore_index=True)
+    resultado.insert(3, 'descripcion', resultado['nivel'].map(NIVEL_DESCRIPCION))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Intervalos bootstrap de primas por celda")
+    parser.add_argument('--replicas', type=int, default=REPLICAS)
+    parser.add_argument('--nivel-confianza', type=float, default=NIVEL_CONFIANZA)
+    parser.add_argument('--procesos', type=int, default=1)
+    parser.add_argument('--semilla', type=int, default=SEMILLA)
+    parser.add_argument('--bloque', type=int, default=REPLICAS_POR_BLOQUE, help="Réplicas por bloque")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("INTERVALOS DE CONFIANZA BOOTSTRAP DE PRIMAS")
+    print("=" * 70)
+
+    print("\n[1/3] Preparando sub-celdas del cubo...")
+    cubo_sin, cubo_exp, _ = cargar_cubo()
+    datos = preparar_subceldas(cubo_sin, cubo_exp)
+    matrices = (datos['siniestros'], datos['monto'])
+    print(f"  ✓ Sub-celdas: {matrices[0].shape[0]:,} → celdas edad × nivel: {matrices[0].shape[1]}")
+
+    print(f"\n[2/3] Remuestreando ({args.replicas:,} réplicas, {args.procesos} procesos)...")
+    inicio = time.perf_counter()
+    replicas = ejecutar_bootstrap(matrices, args.replicas, args.semilla, args.procesos, args.bloque)
+    print(f"  ✓ {time.perf_counter() - inicio:.2f} s")
+
+    print("\n[3/3] Calculando intervalos...")
+    resultado = construir_intervalos(matrices, datos['expuestos'], replicas, args.nivel_confianza)
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    resultado.to_csv(IC_FILE, index=False)
+    print(f"  ✓ {IC_FILE}")
+
+    print(f"\n  Prima de riesgo por nivel (IC {args.nivel_confianza:.0%}):")
+    for _, row in resultado[resultado['ambito'] == 'nivel'].iterrows():
+        print(f"    {row['descripcion']:<18} ${row['prima_riesgo']:>10,.2f}  "
+              f"[${row['prima_riesgo_inf']:,.2f}, ${row['prima_riesgo_sup']:,.2f}]")
+
+
+if __name__ == "__main__":
+    main()
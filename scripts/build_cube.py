@@ -0,0 +1,332 @@
+"""
+build_cube.py
+Cubo pre-agregado de siniestros y exposición: fuente única de la tarificación
+y de las agregaciones del dashboard.
+
+En lugar de que cada etapa parta de ~2M filas de siniestros (filtrar edades,
+mapear niveles, ajustar por inflación y agrupar), el cubo se materializa una vez
+al grano ANIO × EDAD × SEXO × ENTIDAD × NIVEL (edades 25-70). Recalcular primas
+sobre el cubo toca miles de celdas en lugar de millones de filas.
+
+Cubo de siniestros (NIVEL = 0 para causas sin clasificar):
+    FILAS, NUM_SINIESTROS, MONTO_PAGADO, MONTO_AJUSTADO
+        filas con MONTO_PAGADO >= 0 (las que usa la tarificación)
+    FILAS_EXCL, NUM_SINIESTROS_EXCL, MONTO_PAGADO_EXCL, MONTO_AJUSTADO_EXCL
+        filas con monto negativo o nulo (excluidas de la tarificación,
+        incluidas en los totales del dashboard)
+
+Cubo de exposición (pólizas, ANIO × EDAD × SEXO × ENTIDAD):
+    NUM_ASEGURADOS, PRIMA_EMITIDA, SUMA_ASEGURADA
+
+El cubo se reconstruye automáticamente si cambian los siniestros, las pólizas,
+la clasificación o los factores de inflación (ver cubo_vigente()).
+
+Uso:
+    python scripts/build_cube.py
+
+Salida:
+    - data/cube/cubo_siniestros.parquet
+    - data/cube/cubo_exposicion.parquet
+    - data/cube/cubo_meta.json
+"""
+
+import json
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from pathlib import Path
+
+from calculate_tarificacion import EDAD_MIN, EDAD_MAX, INFLACION_MEDICA
+from causa_catalog import CATALOGO_FILE, mapear_nivel
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+DATA_CONSOLIDATED = BASE_DIR / "data" / "consolidated"
+DATA_CLASSIFIED = BASE_DIR / "data" / "classified"
+DATA_CUBE = BASE_DIR / "data" / "cube"
+
+SINIESTROS_FILE = DATA_CONSOLIDATED / "siniestros.parquet"
+POLIZAS_FILE = DATA_CONSOLIDATED / "polizas.parquet"
+CLASIFICACION_FILE = DATA_CLASSIFIED / "all_causes_classified.csv"
+
+CUBO_SINIESTROS = DATA_CUBE / "cubo_siniestros.parquet"
+CUBO_EXPOSICION = DATA_CUBE / "cubo_exposicion.parquet"
+CUBO_META = DATA_CUBE / "cubo_meta.json"
+
+DIMENSIONES = ['ANIO', 'EDAD', 'SEXO', 'ENTIDAD', 'NIVEL']
+DIMENSIONES_EXPOSICION = ['ANIO', 'EDAD', 'SEXO', 'ENTIDAD']
+MEDIDAS = ['FILAS', 'NUM_SINIESTROS', 'MONTO_PAGADO', 'MONTO_AJUSTADO']
+
+
+def huella_fuentes() -> dict:
+    """
+    Tamaño y fecha de modificación de cada insumo del cubo. Incluye el catálogo
+    de causas: con CAUSA_ID el nivel se resuelve a través de él.
+    """
+    huella = {}
+    for ruta in [SINIESTROS_FILE, POLIZAS_FILE, CLASIFICACION_FILE, CATALOGO_FILE]:
+        if not ruta.exists():
+            huella[ruta.name] = None
+            continue
+        stat = ruta.stat()
+        huella[ruta.name] = [stat.st_size, stat.st_mtime_ns]
+    return huella
+
+
+def cubo_vigente() -> bool:
+    """
+    El cubo está vigente si existe y se construyó con los mismos insumos
+    y factores de inflación que los actuales.
+    """
+    if not (CUBO_SINIESTROS.exists() and CUBO_EXPOSICION.exists() and CUBO_META.exists()):
+        return False
+    with open(CUBO_META, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    factores = {str(k): v for k, v in INFLACION_MEDICA.items()}
+    return meta.get('fuentes') == huella_fuentes() and meta.get('inflacion') == factores
+
+
+def agregar_siniestros(df: pd.DataFrame, grano: list) -> pd.DataFrame:
+    """
+    Agrega siniestros (ya con NIVEL y MONTO_AJUSTADO) al grano indicado,
+    separando las filas con monto negativo o nulo en las columnas *_EXCL
+    (la misma regla que aplica preparar_datos en la ruta --sin-cubo).
+    """
+    incluido = (df['MONTO_PAGADO'] >= 0).to_numpy()
+
+    partes = []
+    for mascara, sufijo in [(incluido, ''), (~incluido, '_EXCL')]:
+        grupos = df.loc[mascara].groupby(grano, dropna=False, observed=True, sort=False)
+        parte = grupos[MEDIDAS[1:]].sum()
+        parte.insert(0, 'FILAS', grupos.size())
+        partes.append(parte.add_suffix(sufijo))
+
+    # Celdas presentes en solo una de las partes quedan en 0 (conservando el tipo)
+    cubo = pd.concat(partes, axis=1).fillna(0)
+    for col in MEDIDAS:
+        tipo = 'int64' if col == 'FILAS' else df[col].dtype
+        cubo[col] = cubo[col].astype(tipo)
+        cubo[f'{col}_EXCL'] = cubo[f'{col}_EXCL'].astype(tipo)
+    return cubo.reset_index()
+
+
+def construir_cubo_siniestros(df_clasificacion: pd.DataFrame) -> tuple:
+    """
+    Lee solo las columnas necesarias de siniestros y las agrega al grano del cubo.
+
+    Returns:
+        tuple: (cubo, estadisticas)
+    """
+    columnas = ['ANIO', 'EDAD', 'SEXO', 'ENTIDAD', 'CAUSA', 'NUM_SINIESTROS', 'MONTO_PAGADO']
+    if 'CAUSA_ID' in pq.read_schema(SINIESTROS_FILE).names:
+        columnas.append('CAUSA_ID')
+    df = pd.read_parquet(SINIESTROS_FILE, columns=columnas)
+    filas_totales = len(df)
+
+    df = df[(df['EDAD'] >= EDAD_MIN) & (df['EDAD'] <= EDAD_MAX)]
+    nivel = mapear_nivel(df, df_clasificacion)
+    sin_clasificar = nivel.isna()
+
+    stats = {
+        'siniestros_filtrados': int(filas_totales - len(df)),
+        'causas_sin_clasificar': int(df.loc[sin_clasificar, 'CAUSA'].nunique()),
+    }
+
+    df = df.assign(
+        NIVEL=nivel.fillna(0).astype('int8'),
+        MONTO_AJUSTADO=df['MONTO_PAGADO'] * df['ANIO'].map(INFLACION_MEDICA)
+    ).drop(columns=[c for c in ['CAUSA', 'CAUSA_ID'] if c in columnas])
+
+    cubo = agregar_siniestros(df, DIMENSIONES)
+    cubo['ANIO'] = cubo['ANIO'].astype('int16')
+    cubo['EDAD'] = cubo['EDAD'].astype('int8')
+    for col in ['SEXO', 'ENTIDAD']:
+        cubo[col] = cubo[col].astype('category')
+    cubo = cubo.sort_values(DIMENSIONES).reset_index(drop=True)
+    return cubo, stats
+
+
+def construir_cubo_exposicion() -> tuple:
+    """
+    Agrega pólizas (asegurados, prima emitida y suma asegurada) al grano del cubo.
+
+    Returns:
+        tuple: (cubo, estadisticas)
+    """
+    columnas = DIMENSIONES_EXPOSICION + ['NUM_ASEGURADOS', 'PRIMA_EMITIDA', 'SUMA_ASEGURADA']
+    df = pd.read_parquet(POLIZAS_FILE, columns=columnas)
+    filas_totales = len(df)
+
+    edad = pd.to_numeric(df['EDAD'], errors='coerce')
+    stats = {'edades_polizas_invalidas': int(edad.isna().sum())}
+
+    en_rango = (edad >= EDAD_MIN) & (edad <= EDAD_MAX)
+    df = df.loc[en_rango].assign(EDAD=edad[en_rango].astype('int8'))
+    stats['polizas_filtradas'] = int(filas_totales - len(df))
+
+    cubo = df.groupby(DIMENSIONES_EXPOSICION, dropna=False, observed=True)[
+        ['NUM_ASEGURADOS', 'PRIMA_EMITIDA', 'SUMA_ASEGURADA']
+    ].sum().reset_index()
+    cubo['ANIO'] = cubo['ANIO'].astype('int16')
+    for col in ['SEXO', 'ENTIDAD']:
+        cubo[col] = cubo[col].astype('category')
+    return cubo, stats
+
+
+def construir_cubo():
+    """Construye y guarda ambos cubos con su metadato."""
+    print("=" * 70)
+    print("CONSTRUCCIÓN DEL CUBO DE TARIFICACIÓN")
+    print("=" * 70)
+
+    DATA_CUBE.mkdir(parents=True, exist_ok=True)
+    df_clasificacion = pd.read_csv(CLASIFICACION_FILE)
+
+    print("\n[1/3] Agregando siniestros...")
+    cubo_sin, stats_sin = construir_cubo_siniestros(df_clasificacion)
+    cubo_sin.to_parquet(CUBO_SINIESTROS, index=False, compression='zstd')
+    print(f"  ✓ {CUBO_SINIESTROS} ({len(cubo_sin):,} celdas)")
+
+    print("\n[2/3] Agregando exposición...")
+    cubo_exp, stats_exp = construir_cubo_exposicion()
+    cubo_exp.to_parquet(CUBO_EXPOSICION, index=False, compression='zstd')
+    print(f"  ✓ {CUBO_EXPOSICION} ({len(cubo_exp):,} celdas)")
+
+    print("\n[3/3] Guardando metadatos...")
+    meta = {
+        'fuentes': huella_fuentes(),
+        'inflacion': {str(k): v for k, v in INFLACION_MEDICA.items()},
+        'rango_edad': [EDAD_MIN, EDAD_MAX],
+        'estadisticas': {**stats_sin, **stats_exp},
+    }
+    with open(CUBO_META, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    print(f"  ✓ {CUBO_META}")
+
+
+def cargar_cubo() -> tuple:
+    """
+    Carga el cubo, reconstruyéndolo antes si no está vigente.
+
+    Returns:
+        tuple: (cubo_siniestros, cubo_exposicion, meta)
+    """
+    if not cubo_vigente():
+        construir_cubo()
+    with open(CUBO_META, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    return pd.read_parquet(CUBO_SINIESTROS), pd.read_parquet(CUBO_EXPOSICION), meta
+
+
+def arreglos_por_anio(cubo_siniestros: pd.DataFrame, cubo_exposicion: pd.DataFrame) -> dict:
+    """
+    Arreglos densos por año × edad × nivel con la convención de la tarificación
+    (solo causas clasificadas y montos >= 0). Los montos quedan en pesos nominales
+    para poder aplicar cualquier juego de factores de inflación.
+
+    Returns:
+        dict: anios (Y,), edades (E,), siniestros (Y, E, 3),
+              monto_pagado (Y, E, 3), expuestos (Y, E)
+    """
+    anios = np.array(sorted(set(cubo_siniestros['ANIO']) | set(cubo_exposicion['ANIO'])))
+    edades = np.arange(EDAD_MIN, EDAD_MAX + 1)
+    i_anio = {a: i for i, a in enumerate(anios)}
+
+    clasificados = cubo_siniestros[cubo_siniestros['NIVEL'] > 0]
+    celdas = clasificados.groupby(['ANIO', 'EDAD', 'NIVEL'], observed=True)[
+        ['NUM_SINIESTROS', 'MONTO_PAGADO']
+    ].sum().reset_index()
+    y = celdas['ANIO'].map(i_anio).to_numpy()
+    e = celdas['EDAD'].to_numpy().astype(int) - EDAD_MIN
+    n = celdas['NIVEL'].to_numpy().astype(int) - 1
+
+    siniestros = np.zeros((len(anios), len(edades), 3))
+    monto = np.zeros((len(anios), len(edades), 3))
+    siniestros[y, e, n] = celdas['NUM_SINIESTROS'].to_numpy()
+    monto[y, e, n] = celdas['MONTO_PAGADO'].to_numpy()
+
+    exposicion = cubo_exposicion.groupby(['ANIO', 'EDAD'], observed=True)['NUM_ASEGURADOS'].sum()
+    expuestos = np.zeros((len(anios), len(edades)))
+    expuestos[exposicion.index.get_level_values('ANIO').map(i_anio).to_numpy(),
+              exposicion.index.get_level_values('EDAD').to_numpy().astype(int) - EDAD_MIN] = exposicion.to_numpy()
+
+    return {'anios': anios, 'edades': edades, 'siniestros': siniestros,
+            'monto_pagado': monto, 'expuestos': expuestos}
+
+
+def arreglos_por_segmento(cubo_siniestros: pd.DataFrame, cubo_exposicion: pd.DataFrame,
+                          dimensiones: list) -> dict:
+    """
+    Arreglos densos segmento × edad × nivel (p. ej. dimensiones=['SEXO', 'ENTIDAD']),
+    con la convención de la tarificación y montos ajustados por INFLACION_MEDICA.
+
+    Returns:
+        dict: segmentos (DataFrame G × dimensiones), edades (E,),
+              siniestros (G, E, 3), monto (G, E, 3), expuestos (G, E)
+    """
+    dimensiones = list(dimensiones)
+    edades = np.arange(EDAD_MIN, EDAD_MAX + 1)
+    clasificados = cubo_siniestros[cubo_siniestros['NIVEL'] > 0]
+    celdas = clasificados.groupby(dimensiones + ['EDAD', 'NIVEL'], observed=True)[
+        ['NUM_SINIESTROS', 'MONTO_AJUSTADO']
+    ].sum().reset_index()
+    exposicion = cubo_exposicion.groupby(dimensiones + ['EDAD'], observed=True)[
+        'NUM_ASEGURADOS'
+    ].sum().reset_index()
+
+    if dimensiones:
+        claves = [celdas[dimensiones].astype(object), exposicion[dimensiones].astype(object)]
+        segmentos = (pd.concat(claves).drop_duplicates()
+                     .sort_values(dimensiones).reset_index(drop=True))
+        indice = pd.MultiIndex.from_frame(segmentos)
+        g_sin = indice.get_indexer(pd.MultiIndex.from_frame(claves[0]))
+        g_exp = indice.get_indexer(pd.MultiIndex.from_frame(claves[1]))
+    else:
+        segmentos = pd.DataFrame(index=[0])
+        g_sin = np.zeros(len(celdas), dtype=int)
+        g_exp = np.zeros(len(exposicion), dtype=int)
+
+    e = celdas['EDAD'].to_numpy().astype(int) - EDAD_MIN
+    n = celdas['NIVEL'].to_numpy().astype(int) - 1
+    siniestros = np.zeros((len(segmentos), len(edades), 3))
+    monto = np.zeros((len(segmentos), len(edades), 3))
+    siniestros[g_sin, e, n] = celdas['NUM_SINIESTROS'].to_numpy()
+    monto[g_sin, e, n] = celdas['MONTO_AJUSTADO'].to_numpy()
+
+    expuestos = np.zeros((len(segmentos), len(edades)))
+    expuestos[g_exp, exposicion['EDAD'].to_numpy().astype(int) - EDAD_MIN] = \
+        exposicion['NUM_ASEGURADOS'].to_numpy()
+
+    return {'segmentos': segmentos, 'edades': edades, 'siniestros': siniestros,
+            'monto': monto, 'expuestos': expuestos}
+
+
+def cubo_web(cubo_siniestros: pd.DataFrame) -> pd.DataFrame:
+    """
+    Vista del cubo con la convención del dashboard: todas las filas (incluye
+    montos negativos) y causas sin clasificar asignadas al nivel 1.
+    """
+    df = cubo_siniestros[DIMENSIONES].copy()
+    df['NIVEL'] = df['NIVEL'].where(df['NIVEL'] > 0, 1)
+    for col in ['NUM_SINIESTROS', 'MONTO_PAGADO', 'MONTO_AJUSTADO']:
+        df[col] = cubo_siniestros[col] + cubo_siniestros[f'{col}_EXCL']
+    return df
+
+
+def centavos(pesos) -> np.ndarray:
+    """
+    Montos en pesos a centavos enteros. Las sumas en centavos son exactas y no
+    dependen del orden, así que el dashboard completo y la re-tarificación
+    incremental llegan a los mismos totales.
+    """
+    return np.rint(np.asarray(pesos, dtype='float64') * 100).astype(np.int64)
+
+
+def ajustar_centavos(centavos_pagado, anios) -> np.ndarray:
+    """Centavos pagados de celdas de un solo año, ajustados por INFLACION_MEDICA."""
+    factor = pd.Series(np.asarray(anios)).map(INFLACION_MEDICA).to_numpy(dtype='float64')
+    return np.rint(np.asarray(centavos_pagado) * factor).astype(np.int64)
+
+
+if __name__ == "__main__":
+    construir_cubo()
@@ -14,9 +14,25 @@ Ajustes aplicados:
     - Inflación médica: Montos ajustados a pesos de 2024
     - Credibilidad: Bandera para celdas con >= 30 siniestros
 
+Fuente de datos:
+    Por defecto se usa el cubo pre-agregado de build_cube.py (se reconstruye solo si
+    cambiaron los insumos). Con --sin-cubo se parte de los siniestros fila por fila.
+    Con --baja-memoria también se parte de los siniestros, pero leyendo solo las
+    columnas necesarias y agregando con una sola máscara, sin copias intermedias
+    (mismos resultados que --sin-cubo).
+    Con --asignacion-suave los siniestros de cada causa se reparten entre niveles
+    según las probabilidades del clasificador (ver soft_assignment.py).
+
+Uso:
+    python scripts/calculate_tarificacion.py
+    python scripts/calculate_tarificacion.py --sin-cubo
+    python scripts/calculate_tarificacion.py --baja-memoria
+    python scripts/calculate_tarificacion.py --asignacion-suave
+
 Salidas:
     - outputs/tarificacion/primas_por_nivel.csv (3 filas: resumen por nivel)
     - outputs/tarificacion/primas_por_nivel_edad.csv (138 filas: 3 niveles × 46 edades)
+    - outputs/tarificacion/tabla_primas.npz (RateTable para cotización, ver rate_table.py)
     - outputs/tarificacion/reporte_tarificacion.txt (diagnóstico)
 
 Fuente metodológica: docs/tarificacion_colectivo_mexico.md
@@ -24,9 +40,16 @@ Fuente metodológica: docs/tarificacion_colectivo_mexico.md
 
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
+import sys
 from pathlib import Path
 from datetime import datetime
 
+from causa_catalog import mapear_nivel
+# Factores de inflación médica para ajustar a pesos 2024: fuente única compartida
+# (por defecto Banxico, o la tendencia estimada por fit_trend.py --aplicar)
+from inflation_factors import INFLACION_MEDICA, fuente_factores
+
 # =============================================================================
 # CONFIGURACIÓN
 # =============================================================================
@@ -45,15 +68,14 @@ EDAD_MIN = 25
 EDAD_MAX = 70
 MIN_SINIESTROS_CREDIBILIDAD = 30
 
-# Factores de inflación médica para ajustar a pesos 2024
-# Basado en inflación de servicios médicos de Banxico (~8-10% anual)
-INFLACION_MEDICA = {
-    2020: 1.41,  # ~8.5% compuesto en 4 años
-    2021: 1.30,  # ~9% compuesto en 3 años
-    2022: 1.20,  # ~9.5% compuesto en 2 años
-    2023: 1.10,  # ~10% en 1 año
-    2024: 1.00   # año base
-}
+# Bandas de edad (censos colectivos, tendencia por banda y dashboard de pólizas)
+BANDAS_EDAD = [(25, 34), (35, 44), (45, 54), (55, 64), (65, 70)]
+ETIQUETAS_BANDA = [f"{ini}-{fin}" for ini, fin in BANDAS_EDAD]
+
+# Banda por edad: BANDA_POR_EDAD[edad - EDAD_MIN]
+BANDA_POR_EDAD = np.zeros(EDAD_MAX - EDAD_MIN + 1, dtype=np.int64)
+for _i, (_ini, _fin) in enumerate(BANDAS_EDAD):
+    BANDA_POR_EDAD[_ini - EDAD_MIN:_fin - EDAD_MIN + 1] = _i
 
 # Descripciones de niveles de complejidad
 NIVEL_DESCRIPCION = {
@@ -183,11 +205,8 @@ def preparar_datos(df_siniestros: pd.DataFrame,
     # --- 2.3 Unir clasificación de nivel ---
     print("\n  2.3 Asignación de nivel de complejidad...")
 
-    # Crear diccionario causa -> nivel
-    mapa_nivel = df_clasificacion.set_index('causa')['nivel'].to_dict()
-
-    # Asignar nivel
-    df_siniestros['NIVEL'] = df_siniestros['CAUSA'].map(mapa_nivel)
+    # Asignar nivel (por CAUSA_ID si está disponible el catálogo)
+    df_siniestros['NIVEL'] = mapear_nivel(df_siniestros, df_clasificacion)
 
     # Verificar causas sin clasificar
     sin_clasificar = df_siniestros['NIVEL'].isna()
@@ -209,16 +228,17 @@ def preparar_datos(df_siniestros: pd.DataFrame,
 
     # --- 2.4 Ajuste por inflación ---
     print("\n  2.4 Ajuste por inflación médica...")
-    print("      Factores aplicados:")
+    print(f"      Factores aplicados ({fuente_factores()}):")
     for anio, factor in sorted(INFLACION_MEDICA.items()):
         print(f"        {anio}: ×{factor:.2f}")
 
-    # Filtrar montos negativos (posibles devoluciones)
-    montos_negativos = (df_siniestros['MONTO_PAGADO'] < 0).sum()
+    # Filtrar montos negativos (posibles devoluciones) o nulos; misma regla que el cubo
+    valido = df_siniestros['MONTO_PAGADO'] >= 0
+    montos_negativos = int((~valido).sum())
     stats['montos_negativos'] = montos_negativos
     if montos_negativos > 0:
-        print(f"      Montos negativos excluidos: {montos_negativos:,}")
-        df_siniestros = df_siniestros[df_siniestros['MONTO_PAGADO'] >= 0].copy()
+        print(f"      Montos negativos o nulos excluidos: {montos_negativos:,}")
+        df_siniestros = df_siniestros[valido].copy()
 
     # Aplicar factor de inflación
     df_siniestros['FACTOR_INFLACION'] = df_siniestros['ANIO'].map(INFLACION_MEDICA)
@@ -237,6 +257,136 @@ def preparar_datos(df_siniestros: pd.DataFrame,
     return df_siniestros, df_polizas, stats
 
 
+def preparar_datos_baja_memoria() -> tuple:
+    """
+    Equivalente a cargar_datos() + preparar_datos() sin copias de los marcos completos.
+
+    - Lee solo las columnas que usa el cálculo
+    - Compone filtro de edad, clasificación y montos negativos en una sola máscara
+    - Calcula el monto ajustado solo para las filas que pasan la máscara y lo
+      agrega directamente por (EDAD, NIVEL)
+
+    Las sumas se hacen sobre las mismas filas y en el mismo orden que preparar_datos(),
+    por lo que los resultados son idénticos.
+
+    Returns:
+        tuple: (siniestros agregados por EDAD × NIVEL, pólizas agregadas por EDAD_INT, estadisticas)
+    """
+    print("\n" + "=" * 70)
+    print("PASOS 1-2: CARGA Y PREPARACIÓN (BAJA MEMORIA)")
+    print("=" * 70)
+
+    stats = {}
+    ruta_siniestros = DATA_CONSOLIDATED / "siniestros.parquet"
+    columnas = ['ANIO', 'EDAD', 'CAUSA', 'NUM_SINIESTROS', 'MONTO_PAGADO']
+    if 'CAUSA_ID' in pq.read_schema(ruta_siniestros).names:
+        columnas.append('CAUSA_ID')
+    df_siniestros = pd.read_parquet(ruta_siniestros, columns=columnas)
+    df_polizas = pd.read_parquet(DATA_CONSOLIDATED / "polizas.parquet",
+                                 columns=['EDAD', 'NUM_ASEGURADOS'])
+    df_clasificacion = pd.read_csv(DATA_CLASSIFIED / "all_causes_classified.csv")
+    print(f"  ✓ Siniestros: {len(df_siniestros):,} filas ({len(columnas)} columnas)")
+    print(f"  ✓ Pólizas: {len(df_polizas):,} filas (2 columnas)")
+
+    # --- Pólizas: edad entera y rango, agregadas por edad ---
+    edad_pol = pd.to_numeric(df_polizas['EDAD'], errors='coerce').to_numpy()
+    stats['edades_polizas_invalidas'] = int(np.isnan(edad_pol).sum())
+    en_rango_pol = (edad_pol >= EDAD_MIN) & (edad_pol <= EDAD_MAX)
+    stats['polizas_filtradas'] = int(len(edad_pol) - en_rango_pol.sum())
+    polizas = (df_polizas['NUM_ASEGURADOS'][en_rango_pol]
+               .groupby(edad_pol[en_rango_pol]).sum()
+               .rename_axis('EDAD_INT').reset_index())
+
+    # --- Siniestros: una sola máscara ---
+    edad = df_siniestros['EDAD'].to_numpy()
+    en_rango = (edad >= EDAD_MIN) & (edad <= EDAD_MAX)
+    stats['siniestros_filtrados'] = int(len(edad) - en_rango.sum())
+
+    nivel = mapear_nivel(df_siniestros, df_clasificacion).to_numpy()
+    sin_clasificar = en_rango & np.isnan(nivel)
+    stats['causas_sin_clasificar'] = df_siniestros['CAUSA'][sin_clasificar].nunique()
+    stats['siniestros_sin_clasificar'] = int(sin_clasificar.sum())
+    stats['cobertura_clasificacion'] = (1 - sin_clasificar.sum() / en_rango.sum()) * 100
+    print(f"\n  Causas sin clasificar: {stats['causas_sin_clasificar']:,}")
+    print(f"  Cobertura de clasificación: {stats['cobertura_clasificacion']:.1f}%")
+
+    mascara = en_rango & ~np.isnan(nivel)
+    monto = df_siniestros['MONTO_PAGADO'].to_numpy()
+    # Como en preparar_datos y el cubo: fuera montos negativos o nulos
+    excluidos = mascara & ~(monto >= 0)
+    stats['montos_negativos'] = int(excluidos.sum())
+    mascara &= ~excluidos
+
+    # Monto ajustado solo de las filas seleccionadas, directo a la agregación
+    monto_sel = monto[mascara]
+    factor = df_siniestros['ANIO'][mascara].map(INFLACION_MEDICA).to_numpy()
+    monto_ajustado = monto_sel * factor
+    claves = [edad[mascara], nivel[mascara].astype(int)]
+    siniestros = pd.DataFrame({
+        'NUM_SINIESTROS': df_siniestros['NUM_SINIESTROS'].to_numpy()[mascara],
+        'MONTO_AJUSTADO': monto_ajustado,
+    }).groupby(claves).sum().rename_axis(['EDAD', 'NIVEL']).reset_index()
+
+    stats['monto_original_total'] = pd.Series(monto_sel).sum()
+    stats['monto_ajustado_total'] = pd.Series(monto_ajustado).sum()
+    print(f"  Monto total ajustado (2024): ${stats['monto_ajustado_total']:,.0f}")
+
+    return siniestros, polizas, stats
+
+
+def memoria_pico_mb() -> float:
+    """RSS pico del proceso en MB (None si la plataforma no lo reporta)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB; macOS, bytes
+    return pico / 1024 ** 2 if sys.platform == 'darwin' else pico / 1024
+
+
+def preparar_desde_cubo() -> tuple:
+    """
+    Equivalente a cargar_datos() + preparar_datos() usando el cubo pre-agregado:
+    las celdas ya vienen filtradas por edad, con nivel y monto ajustado.
+
+    Returns:
+        tuple: (cubo_siniestros_prep, cubo_exposicion_prep, estadisticas)
+    """
+    from build_cube import cargar_cubo
+
+    print("\n" + "=" * 70)
+    print("PASOS 1-2: CARGA Y PREPARACIÓN DESDE CUBO")
+    print("=" * 70)
+
+    cubo_sin, cubo_exp, meta = cargar_cubo()
+    print(f"  ✓ Cubo de siniestros: {len(cubo_sin):,} celdas")
+    print(f"  ✓ Cubo de exposición: {len(cubo_exp):,} celdas")
+
+    stats = dict(meta['estadisticas'])
+
+    # Cobertura de clasificación (en filas, como en preparar_datos)
+    filas = cubo_sin['FILAS'] + cubo_sin['FILAS_EXCL']
+    sin_clasificar = cubo_sin['NIVEL'] == 0
+    stats['siniestros_sin_clasificar'] = int(filas[sin_clasificar].sum())
+    stats['cobertura_clasificacion'] = (1 - filas[sin_clasificar].sum() / filas.sum()) * 100
+    print(f"\n  Causas sin clasificar: {stats['causas_sin_clasificar']:,}")
+    print(f"  Cobertura de clasificación: {stats['cobertura_clasificacion']:.1f}%")
+
+    # Solo celdas clasificadas; las columnas *_EXCL (montos negativos o nulos) quedan fuera
+    cubo_sin = cubo_sin[~sin_clasificar]
+    stats['montos_negativos'] = int(cubo_sin['FILAS_EXCL'].sum())
+    cubo_sin = cubo_sin[['ANIO', 'EDAD', 'SEXO', 'ENTIDAD', 'NIVEL',
+                         'NUM_SINIESTROS', 'MONTO_PAGADO', 'MONTO_AJUSTADO']]
+
+    stats['monto_original_total'] = cubo_sin['MONTO_PAGADO'].sum()
+    stats['monto_ajustado_total'] = cubo_sin['MONTO_AJUSTADO'].sum()
+    print(f"  Monto total ajustado (2024): ${stats['monto_ajustado_total']:,.0f}")
+
+    cubo_exp = cubo_exp.rename(columns={'EDAD': 'EDAD_INT'})
+    return cubo_sin, cubo_exp, stats
+
+
 # =============================================================================
 # FUNCIONES DE CÁLCULO ACTUARIAL
 # =============================================================================
@@ -431,7 +581,11 @@ def generar_primas_por_nivel_edad(metricas: pd.DataFrame) -> pd.DataFrame:
     )
 
     # Rellenar valores faltantes
-    matriz['num_siniestros'] = matriz['num_siniestros'].fillna(0).astype(int)
+    matriz['num_siniestros'] = matriz['num_siniestros'].fillna(0)
+    # Con --asignacion-suave los conteos son fraccionarios: solo se pasan a
+    # entero si ya son enteros (asignación dura)
+    if (matriz['num_siniestros'] % 1 == 0).all():
+        matriz['num_siniestros'] = matriz['num_siniestros'].astype(int)
     matriz['monto_total'] = matriz['monto_total'].fillna(0)
     matriz['frecuencia'] = matriz['frecuencia'].fillna(0)
     matriz['credible'] = matriz['credible'].fillna(False)
@@ -527,6 +681,17 @@ def validar_resultados(primas_nivel: pd.DataFrame,
     print(f"      Suma % siniestros: {suma_pct_sin:.2f}% (esperado: 100%)")
     print(f"      Suma % monto: {suma_pct_monto:.2f}% (esperado: 100%)")
 
+    # 7.5 Frecuencia = siniestros / expuestos (también con conteos fraccionarios)
+    print("\n  7.5 Validación de frecuencia contra conteos...")
+    con_expuestos = primas_matriz['expuestos'] > 0
+    esperada = primas_matriz.loc[con_expuestos, 'num_siniestros'] / primas_matriz.loc[con_expuestos, 'expuestos']
+    discrepantes = int((~np.isclose(esperada, primas_matriz.loc[con_expuestos, 'frecuencia'],
+                                    rtol=1e-9, atol=0)).sum())
+    validaciones['frecuencia_discrepante'] = discrepantes
+    if discrepantes:
+        errores.append(f"{discrepantes} celdas con frecuencia distinta de siniestros / expuestos")
+    print(f"      Celdas con frecuencia ≠ siniestros / expuestos: {discrepantes}")
+
     # Resumen
     validaciones['errores'] = errores
     if errores:
@@ -668,13 +833,24 @@ def main():
     print(f"Rango de edades: {EDAD_MIN}-{EDAD_MAX} años")
     print(f"Ajuste de inflación: Sí (a pesos 2024)")
 
-    # 1. Cargar datos
-    df_siniestros, df_polizas, df_clasificacion = cargar_datos()
-
-    # 2. Preparar datos
-    df_siniestros_prep, df_polizas_prep, stats_prep = preparar_datos(
-        df_siniestros, df_polizas, df_clasificacion
-    )
+    if '--asignacion-suave' in sys.argv:
+        # 1-2. Nivel repartido según las probabilidades del clasificador
+        from soft_assignment import preparar_asignacion_suave
+        df_siniestros_prep, df_polizas_prep, stats_prep = preparar_asignacion_suave()
+    elif '--baja-memoria' in sys.argv:
+        # 1-2. Filas de siniestros sin copias intermedias
+        df_siniestros_prep, df_polizas_prep, stats_prep = preparar_datos_baja_memoria()
+    elif '--sin-cubo' in sys.argv:
+        # 1. Cargar datos
+        df_siniestros, df_polizas, df_clasificacion = cargar_datos()
+
+        # 2. Preparar datos
+        df_siniestros_prep, df_polizas_prep, stats_prep = preparar_datos(
+            df_siniestros, df_polizas, df_clasificacion
+        )
+    else:
+        # 1-2. Cubo pre-agregado
+        df_siniestros_prep, df_polizas_prep, stats_prep = preparar_desde_cubo()
 
     # 3. Calcular exposición
     df_exposicion = calcular_exposicion(df_polizas_prep)
@@ -709,6 +885,11 @@ def main():
     primas_matriz.to_csv(ruta_matriz, index=False)
     print(f"  ✓ {ruta_matriz}")
 
+    # Tabla binaria para cotización
+    from rate_table import RateTable, TABLA_FILE
+    RateTable.desde_matriz(primas_matriz).guardar(TABLA_FILE)
+    print(f"  ✓ {TABLA_FILE}")
+
     # Reporte
     ruta_reporte = OUTPUT_DIR / "reporte_tarificacion.txt"
     with open(ruta_reporte, 'w', encoding='utf-8') as f:
@@ -722,6 +903,7 @@ def main():
     print(f"\nArchivos generados en: {OUTPUT_DIR}/")
     print(f"  - primas_por_nivel.csv ({len(primas_nivel)} filas)")
     print(f"  - primas_por_nivel_edad.csv ({len(primas_matriz)} filas)")
+    print(f"  - tabla_primas.npz")
     print(f"  - reporte_tarificacion.txt")
 
     # Mostrar resumen de primas anuales y mensuales
@@ -740,6 +922,10 @@ def main():
     print(f"\n  Factor mensual 2025 (tasa {TASA_DESCUENTO_ANUAL_2025*100:.0f}%): {FACTOR_MENSUAL_2025:.6f}")
     print(f"  Recargo por pago mensual: ~{(FACTOR_MENSUAL_2025*12 - 1)*100:.1f}%")
 
+    pico = memoria_pico_mb()
+    if pico is not None:
+        print(f"  Memoria pico (RSS): {pico:,.0f} MB")
+
     return primas_nivel, primas_matriz
 
 
@@ -0,0 +1,236 @@
+"""
+causa_catalog.py
+Catálogo persistente de causas con identificadores enteros compartidos por todas las etapas.
+
+El texto de la causa deja de ser la llave de unión: cada causa distinta recibe un
+causa_id entero (estable, solo se agregan nuevos) y los siniestros consolidados
+llevan la columna CAUSA_ID. Los cruces posteriores (corrección de causas, nivel,
+probabilidad) se vuelven búsquedas en arreglos indexados por causa_id.
+
+Columnas del catálogo:
+    causa_id            int32, 0..n-1 en orden de alta
+    causa               texto original
+    causa_normalizada   mayúsculas, espacios simples y sin acentos
+    canonical_id        causa_id de la causa corregida (clean_causes.py)
+    nivel               nivel de complejidad (1-3, nulo si no está clasificada)
+    nivel_probabilidad  probabilidad del nivel (1.0 para manuales)
+    origen              'manual' / 'modelo'
+
+Uso:
+    python scripts/causa_catalog.py    # Actualiza catálogo y CAUSA_ID en siniestros.parquet
+
+Salida:
+    - data/consolidated/causas_catalogo.parquet
+"""
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+DATA_CONSOLIDATED = BASE_DIR / "data" / "consolidated"
+DATA_CLEANING = BASE_DIR / "data" / "cleaning"
+DATA_CLASSIFIED = BASE_DIR / "data" / "classified"
+CATALOGO_FILE = DATA_CONSOLIDATED / "causas_catalogo.parquet"
+
+# causa_id de las causas nulas o fuera del catálogo; quien indexe arreglos por
+# causa_id debe enmascararlo (ver buscar_por_id)
+SIN_CAUSA_ID = -1
+
+COLUMNAS_CATALOGO = [
+    'causa_id', 'causa', 'causa_normalizada', 'canonical_id',
+    'nivel', 'nivel_probabilidad', 'origen'
+]
+
+
+def cargar_catalogo() -> pd.DataFrame:
+    """Carga el catálogo (o uno vacío si aún no existe)."""
+    if CATALOGO_FILE.exists():
+        return pd.read_parquet(CATALOGO_FILE)
+    return pd.DataFrame({
+        'causa_id': pd.Series(dtype='int32'),
+        'causa': pd.Series(dtype='object'),
+        'causa_normalizada': pd.Series(dtype='object'),
+        'canonical_id': pd.Series(dtype='int32'),
+        'nivel': pd.Series(dtype='Int8'),
+        'nivel_probabilidad': pd.Series(dtype='float64'),
+        'origen': pd.Series(dtype='object'),
+    })
+
+
+def guardar_catalogo(catalogo: pd.DataFrame):
+    DATA_CONSOLIDATED.mkdir(parents=True, exist_ok=True)
+    catalogo[COLUMNAS_CATALOGO].to_parquet(CATALOGO_FILE, index=False)
+
+
+def agregar_causas(catalogo: pd.DataFrame, causas) -> pd.DataFrame:
+    """
+    Da de alta las causas que no estén en el catálogo.
+    Los causa_id existentes no cambian; las nuevas reciben n, n+1, ...
+    """
+    from clean_causes import normalizar_texto, remover_acentos
+
+    nuevas = pd.Index(pd.unique(pd.Series(causas).dropna())).difference(catalogo['causa'])
+    if len(nuevas) == 0:
+        return catalogo
+
+    inicio = len(catalogo)
+    ids = np.arange(inicio, inicio + len(nuevas), dtype='int32')
+    df_nuevas = pd.DataFrame({
+        'causa_id': ids,
+        'causa': nuevas.values,
+        'causa_normalizada': [remover_acentos(normalizar_texto(c)) for c in nuevas],
+        'canonical_id': ids,
+        'nivel': pd.array([pd.NA] * len(nuevas), dtype='Int8'),
+        'nivel_probabilidad': np.nan,
+        'origen': None,
+    })
+    return pd.concat([catalogo, df_nuevas], ignore_index=True)
+
+
+def asignar_causa_id(causas: pd.Series, catalogo: pd.DataFrame) -> np.ndarray:
+    """
+    Convierte textos de causa a causa_id (SIN_CAUSA_ID si la causa es nula o no
+    está en el catálogo). La búsqueda se hace una sola vez por valor distinto.
+    """
+    codigos, valores = pd.factorize(pd.Series(causas))
+    ids = pd.Index(catalogo['causa']).get_indexer(valores)
+    # Posición extra para los nulos (código -1 de factorize)
+    ids = np.append(ids, SIN_CAUSA_ID).astype('int32')
+    return ids[codigos]
+
+
+def buscar_por_id(tabla: np.ndarray, ids: np.ndarray, relleno=np.nan) -> np.ndarray:
+    """
+    tabla[ids] con `relleno` donde ids == SIN_CAUSA_ID (sin esto, -1 tomaría
+    en silencio el último elemento de la tabla).
+    """
+    ids = np.asarray(ids)
+    validos = ids != SIN_CAUSA_ID
+    resultado = np.full(len(ids), relleno, dtype=np.result_type(tabla.dtype, np.min_scalar_type(relleno)))
+    resultado[validos] = tabla[ids[validos]]
+    return resultado
+
+
+def asignar_canonicos(catalogo: pd.DataFrame, df_mapping: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica el mapeo causa_original → causa_corregida de clean_causes.py
+    como canonical_id. Las causas corregidas que no existían se dan de alta.
+    """
+    catalogo = agregar_causas(catalogo, df_mapping['causa_corregida'])
+    origen_id = asignar_causa_id(df_mapping['causa_original'], catalogo)
+    corregida_id = asignar_causa_id(df_mapping['causa_corregida'], catalogo)
+    validos = (origen_id != SIN_CAUSA_ID) & (corregida_id != SIN_CAUSA_ID)
+
+    canonical = catalogo['canonical_id'].to_numpy().copy()
+    canonical[origen_id[validos]] = corregida_id[validos]
+    catalogo['canonical_id'] = canonical
+    return catalogo
+
+
+def asignar_clasificacion(catalogo: pd.DataFrame, df_clasificacion: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copia nivel, probabilidad y origen de all_causes_classified.csv al catálogo.
+    Las causas sin clasificación directa heredan la de su causa canónica.
+    """
+    ids = asignar_causa_id(df_clasificacion['causa'], catalogo)
+    validos = ids != SIN_CAUSA_ID
+    n = len(catalogo)
+
+    nivel = np.zeros(n, dtype='int8')
+    probabilidad = np.full(n, np.nan)
+    origen = np.full(n, None, dtype=object)
+    nivel[ids[validos]] = df_clasificacion['nivel'].to_numpy()[validos]
+    probabilidad[ids[validos]] = df_clasificacion['nivel_probabilidad'].to_numpy()[validos]
+    origen[ids[validos]] = df_clasificacion['origen'].to_numpy()[validos]
+
+    # Heredar de la canónica cuando la causa original no se clasificó directamente
+    canonical = catalogo['canonical_id'].to_numpy()
+    sin_nivel = nivel == 0
+    nivel[sin_nivel] = nivel[canonical[sin_nivel]]
+    probabilidad[sin_nivel] = probabilidad[canonical[sin_nivel]]
+    origen[sin_nivel] = origen[canonical[sin_nivel]]
+
+    catalogo['nivel'] = pd.Series(nivel).where(nivel > 0).astype('Int8')
+    catalogo['nivel_probabilidad'] = probabilidad
+    catalogo['origen'] = origen
+    return catalogo
+
+
+def tabla_nivel(catalogo: pd.DataFrame, df_clasificacion: pd.DataFrame) -> np.ndarray:
+    """
+    Arreglo nivel[causa_id] (float, NaN si no está clasificada) construido a partir
+    de la clasificación vigente. Se consulta con buscar_por_id.
+    """
+    ids = asignar_causa_id(df_clasificacion['causa'], catalogo)
+    validos = ids != SIN_CAUSA_ID
+    tabla = np.full(len(catalogo), np.nan)
+    tabla[ids[validos]] = df_clasificacion['nivel'].to_numpy()[validos]
+    return tabla
+
+
+def mapear_nivel(df_siniestros: pd.DataFrame, df_clasificacion: pd.DataFrame) -> pd.Series:
+    """
+    Asigna el nivel de cada siniestro (NaN si la causa no está clasificada).
+
+    Si los siniestros traen CAUSA_ID y existe el catálogo, el cruce es una búsqueda
+    en arreglo; si no, se usa el mapeo por texto de la causa.
+    """
+    if 'CAUSA_ID' in df_siniestros.columns and CATALOGO_FILE.exists():
+        tabla = tabla_nivel(cargar_catalogo(), df_clasificacion)
+        niveles = buscar_por_id(tabla, df_siniestros['CAUSA_ID'].to_numpy())
+        return pd.Series(niveles, index=df_siniestros.index, name='NIVEL')
+
+    mapa_nivel = df_clasificacion.set_index('causa')['nivel'].to_dict()
+    return df_siniestros['CAUSA'].map(mapa_nivel).rename('NIVEL')
+
+
+def main():
+    print("=" * 70)
+    print("ACTUALIZACIÓN DEL CATÁLOGO DE CAUSAS")
+    print("=" * 70)
+
+    # 1. Causas presentes en siniestros
+    print("\n[1/4] Cargando siniestros consolidados...")
+    ruta_siniestros = DATA_CONSOLIDATED / "siniestros.parquet"
+    df = pd.read_parquet(ruta_siniestros)
+    catalogo = cargar_catalogo()
+    n_antes = len(catalogo)
+
+    catalogo = agregar_causas(catalogo, df['CAUSA'])
+    if 'CAUSA_ORIGINAL' in df.columns:
+        catalogo = agregar_causas(catalogo, df['CAUSA_ORIGINAL'])
+    print(f"  Causas en catálogo: {n_antes:,} → {len(catalogo):,}")
+
+    # 2. Canónicas (mapeo de limpieza)
+    print("\n[2/4] Asignando causas canónicas...")
+    ruta_mapping = DATA_CLEANING / "causa_mapping.csv"
+    if ruta_mapping.exists():
+        catalogo = asignar_canonicos(catalogo, pd.read_csv(ruta_mapping))
+        n_canonicas = (catalogo['canonical_id'] != catalogo['causa_id']).sum()
+        print(f"  Causas con canónica distinta: {n_canonicas:,}")
+    else:
+        print(f"  (sin {ruta_mapping.name}, cada causa es su propia canónica)")
+
+    # 3. Clasificación
+    print("\n[3/4] Asignando clasificación...")
+    ruta_clasificacion = DATA_CLASSIFIED / "all_causes_classified.csv"
+    if ruta_clasificacion.exists():
+        catalogo = asignar_clasificacion(catalogo, pd.read_csv(ruta_clasificacion))
+        print(f"  Causas clasificadas: {catalogo['nivel'].notna().sum():,}")
+    else:
+        print(f"  (sin {ruta_clasificacion.name})")
+
+    guardar_catalogo(catalogo)
+    print(f"  ✓ Guardado: {CATALOGO_FILE}")
+
+    # 4. CAUSA_ID en siniestros
+    print("\n[4/4] Asignando CAUSA_ID a siniestros...")
+    df['CAUSA_ID'] = asignar_causa_id(df['CAUSA'], catalogo)
+    df.to_parquet(ruta_siniestros, index=False)
+    print(f"  ✓ Guardado: {ruta_siniestros}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ import json
 from pathlib import Path
 import joblib
 
+import causa_catalog
+
 # Rutas
 BASE_DIR = Path(__file__).parent.parent
 SINIESTROS_FILE = BASE_DIR / "data/consolidated/siniestros.parquet"
@@ -40,10 +42,25 @@ print(f"   Causas clasificadas manualmente: {len(causas_manuales):,}")
 
 # Todas las causas únicas de siniestros
 df_siniestros = pd.read_parquet(SINIESTROS_FILE)
-causa_stats = df_siniestros.groupby('CAUSA').agg({
-    'NUM_SINIESTROS': 'sum'
-}).reset_index()
-causa_stats.columns = ['causa', 'frecuencia']
+usar_catalogo = 'CAUSA_ID' in df_siniestros.columns and causa_catalog.CATALOGO_FILE.exists()
+if usar_catalogo:
+    # Frecuencia por causa_id con bincount (sin agrupar por texto)
+    catalogo = causa_catalog.cargar_catalogo()
+    ids = df_siniestros['CAUSA_ID'].to_numpy()
+    con_causa = ids != causa_catalog.SIN_CAUSA_ID  # Causas nulas no cuentan
+    ids = ids[con_causa]
+    frecuencia = np.bincount(ids, weights=df_siniestros['NUM_SINIESTROS'].to_numpy()[con_causa],
+                             minlength=len(catalogo))
+    presentes = np.bincount(ids, minlength=len(catalogo)) > 0
+    causa_stats = pd.DataFrame({
+        'causa': catalogo['causa'].to_numpy()[presentes],
+        'frecuencia': frecuencia[presentes]
+    })
+else:
+    causa_stats = df_siniestros.groupby('CAUSA').agg({
+        'NUM_SINIESTROS': 'sum'
+    }).reset_index()
+    causa_stats.columns = ['causa', 'frecuencia']
 
 total_causas = len(causa_stats)
 print(f"   Total causas únicas: {total_causas:,}")
@@ -68,6 +85,10 @@ if len(causas_pendientes) > 0:
 
     causas_pendientes['nivel'] = y_pred
     causas_pendientes['nivel_probabilidad'] = max_proba
+    # Vector completo de probabilidades (asignación suave en la tarificación)
+    for nivel in [1, 2, 3]:
+        columna = list(modelo.classes_).index(nivel) if nivel in modelo.classes_ else None
+        causas_pendientes[f'prob_nivel_{nivel}'] = y_proba[:, columna] if columna is not None else 0.0
     causas_pendientes['origen'] = 'modelo'
 
     print(f"   ✓ {len(causas_pendientes):,} causas clasificadas")
@@ -96,11 +117,14 @@ print("\n[4/5] Combinando clasificaciones...")
 # Preparar datos manuales
 df_manual_final = df_manual[['causa', 'nivel', 'frecuencia']].copy()
 df_manual_final['nivel_probabilidad'] = 1.0  # 100% confianza para manuales
+for nivel in [1, 2, 3]:
+    df_manual_final[f'prob_nivel_{nivel}'] = (df_manual_final['nivel'] == nivel).astype(float)
 df_manual_final['origen'] = 'manual'
 
 # Combinar
 if len(causas_pendientes) > 0:
-    df_modelo = causas_pendientes[['causa', 'nivel', 'frecuencia', 'nivel_probabilidad', 'origen']]
+    df_modelo = causas_pendientes[['causa', 'nivel', 'frecuencia', 'nivel_probabilidad', 'origen',
+                                   'prob_nivel_1', 'prob_nivel_2', 'prob_nivel_3']]
     df_all = pd.concat([df_manual_final, df_modelo], ignore_index=True)
 else:
     df_all = df_manual_final
@@ -132,6 +156,12 @@ if len(df_low_conf) > 0:
     df_low_conf.to_csv(low_conf_file, index=False)
     print(f"   ✓ {low_conf_file} ({len(df_low_conf)} causas)")
 
+# Nivel, probabilidad y origen en el catálogo de causas
+if usar_catalogo:
+    catalogo = causa_catalog.asignar_clasificacion(catalogo, df_all)
+    causa_catalog.guardar_catalogo(catalogo)
+    print(f"   ✓ {causa_catalog.CATALOGO_FILE}")
+
 # Generar reporte
 print("\n" + "=" * 80)
 print("REPORTE DE CLASIFICACIÓN - FASE 2")
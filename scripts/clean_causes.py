@@ -22,6 +22,8 @@ from pathlib import Path
 from difflib import SequenceMatcher
 import sys
 
+import causa_catalog
+
 # Rutas
 BASE_DIR = Path(__file__).parent.parent
 DATA_CONSOLIDATED = BASE_DIR / "data" / "consolidated"
@@ -301,9 +303,6 @@ def aplicar_correcciones():
     df_mapping = pd.read_csv(mapping_path)
     print(f"  Filas en mapeo: {len(df_mapping):,}")
 
-    # Crear diccionario de mapeo
-    mapeo = dict(zip(df_mapping['causa_original'], df_mapping['causa_corregida']))
-
     # Cargar datos
     print("\n[2/4] Cargando datos consolidados...")
     df = pd.read_parquet(DATA_CONSOLIDATED / "siniestros.parquet")
@@ -313,7 +312,20 @@ def aplicar_correcciones():
     # Aplicar correcciones
     print("\n[3/4] Aplicando correcciones...")
     df['CAUSA_ORIGINAL'] = df['CAUSA']  # Guardar original
-    df['CAUSA'] = df['CAUSA'].map(mapeo).fillna(df['CAUSA'])
+    if 'CAUSA_ID' in df.columns:
+        # Vía catálogo: la corrección es una búsqueda por causa_id → canonical_id
+        catalogo = causa_catalog.asignar_canonicos(causa_catalog.cargar_catalogo(), df_mapping)
+        causa_catalog.guardar_catalogo(catalogo)
+
+        canonical = catalogo['canonical_id'].to_numpy()
+        texto = catalogo['causa'].to_numpy()
+        # Las causas nulas (SIN_CAUSA_ID) siguen sin causa
+        df['CAUSA_ID'] = causa_catalog.buscar_por_id(
+            canonical, df['CAUSA_ID'].to_numpy(), relleno=causa_catalog.SIN_CAUSA_ID).astype('int32')
+        df['CAUSA'] = pd.Categorical.from_codes(df['CAUSA_ID'], categories=texto).astype(object)
+    else:
+        mapeo = dict(zip(df_mapping['causa_original'], df_mapping['causa_corregida']))
+        df['CAUSA'] = df['CAUSA'].map(mapeo).fillna(df['CAUSA'])
 
     causas_despues = df['CAUSA'].nunique()
     print(f"  Causas únicas después: {causas_despues:,}")
@@ -7,8 +7,9 @@ Transformaciones:
 - 2020: Renombra columnas, calcula MONTO_PAGADO, agrega columnas faltantes como NULL
 
 Salida:
-- data/consolidated/siniestros.parquet
+- data/consolidated/siniestros.parquet (con CAUSA_ID del catálogo de causas)
 - data/consolidated/polizas.parquet
+- data/consolidated/causas_catalogo.parquet
 - outputs/reporte_calidad_datos.txt
 """
 
@@ -16,6 +17,8 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 
+import causa_catalog
+
 # Rutas
 BASE_DIR = Path(__file__).parent.parent
 DATA_PROCESSED = BASE_DIR / "data" / "processed"
@@ -135,8 +138,8 @@ def transformar_emision_2021_2024(year: int) -> pd.DataFrame:
     print(f"  Procesando emisión {year}...")
     df = pd.read_parquet(DATA_PROCESSED / f"{year}_emision.parquet")
 
-    # Convertir PRIMA EMITIDA a numérico si es string (2024)
-    if df['PRIMA EMITIDA'].dtype == 'object':
+    # Convertir PRIMA EMITIDA a numérico si es string (2024; 'object' o 'str' según pandas)
+    if not pd.api.types.is_numeric_dtype(df['PRIMA EMITIDA']):
         df['PRIMA EMITIDA'] = pd.to_numeric(df['PRIMA EMITIDA'], errors='coerce')
 
     df_transformed = pd.DataFrame({
@@ -282,6 +285,12 @@ def main():
     ]
     df_siniestros = df_siniestros[cols_siniestros]
 
+    # Asignar identificador entero de causa (catálogo persistente)
+    catalogo = causa_catalog.agregar_causas(causa_catalog.cargar_catalogo(), df_siniestros['CAUSA'])
+    causa_catalog.guardar_catalogo(catalogo)
+    df_siniestros['CAUSA_ID'] = causa_catalog.asignar_causa_id(df_siniestros['CAUSA'], catalogo)
+    print(f"\n  Catálogo de causas: {len(catalogo):,} causas")
+
     # Guardar siniestros
     output_siniestros = DATA_CONSOLIDATED / "siniestros.parquet"
     df_siniestros.to_parquet(output_siniestros, index=False)
@@ -0,0 +1,203 @@
+"""
+credibility.py
+Credibilidad de Bühlmann-Straub para todas las celdas edad × nivel.
+
+Sustituye la bandera binaria `credible` (>= 30 siniestros) por un peso de
+credibilidad Z en [0, 1] estimado con la experiencia anual de cada celda:
+
+    X_ij  = monto_ajustado_ij / expuestos_ij        (costo por expuesto, celda i, año j)
+    w_ij  = expuestos_ij
+    X̄_i   = Σ_j w_ij X_ij / w_i                     (prima de riesgo observada)
+
+    s²    = Σ_i Σ_j w_ij (X_ij - X̄_i)² / Σ_i (n_i - 1)                   (varianza dentro, EPV)
+    a     = max(0, [Σ_i w_i (X̄_i - X̄)² - (I - 1) s²] / (w - Σ_i w_i² / w))  (varianza entre, VHM)
+    Z_i   = w_i / (w_i + s² / a)
+
+    prima_credibilidad_i = Z_i X̄_i + (1 - Z_i) complemento_i
+
+Los parámetros estructurales (s², a) se estiman por nivel, sobre las edades de ese nivel.
+Complementos disponibles:
+    'nivel'        media colectiva del nivel ponderada por credibilidad (Σ Z_i X̄_i / Σ Z_i)
+    'edad_vecina'  media ponderada por exposición de las edades vecinas (± vecinos) del mismo nivel
+
+Todas las operaciones son de arreglos con forma (..., Y, E, N): las dimensiones
+iniciales (escenarios, segmentos) se calculan en la misma pasada.
+
+Uso:
+    python scripts/credibility.py
+    python scripts/credibility.py --complemento edad_vecina --vecinos 3
+
+Salida:
+    - outputs/tarificacion/primas_credibilidad.csv
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from calculate_tarificacion import (
+    INFLACION_MEDICA, MIN_SINIESTROS_CREDIBILIDAD, NIVEL_DESCRIPCION, FACTOR_MENSUAL_2025,
+)
+from build_cube import cargar_cubo, arreglos_por_anio
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "outputs" / "tarificacion"
+CREDIBILIDAD_FILE = OUTPUT_DIR / "primas_credibilidad.csv"
+
+COMPLEMENTOS = ('nivel', 'edad_vecina')
+VECINOS = 2
+
+
+def _suma_ventana(a: np.ndarray, vecinos: int, eje: int) -> np.ndarray:
+    """Suma móvil centrada de ancho 2·vecinos + 1 a lo largo de un eje (con bordes truncados)."""
+    a = np.moveaxis(a, eje, -1)
+    n = a.shape[-1]
+    acumulada = np.concatenate([np.zeros(a.shape[:-1] + (1,)), np.cumsum(a, axis=-1)], axis=-1)
+    indices = np.arange(n)
+    superior = np.minimum(indices + vecinos + 1, n)
+    inferior = np.maximum(indices - vecinos, 0)
+    return np.moveaxis(acumulada[..., superior] - acumulada[..., inferior], -1, eje)
+
+
+def buhlmann_straub(monto: np.ndarray, expuestos: np.ndarray,
+                    complemento: str = 'nivel', vecinos: int = VECINOS) -> dict:
+    """
+    Credibilidad de Bühlmann-Straub vectorizada.
+
+    Args:
+        monto: monto ajustado (..., Y, E, N)
+        expuestos: expuestos, transmisible a la forma de monto (p. ej. (..., Y, E, 1))
+        complemento: 'nivel' o 'edad_vecina'
+        vecinos: edades a cada lado para el complemento 'edad_vecina'
+
+    Returns:
+        dict con arreglos (..., E, N): prima_observada, z, complemento, prima_credibilidad,
+        expuestos; y (..., N): epv, vhm, k
+    """
+    if complemento not in COMPLEMENTOS:
+        raise ValueError(f"Complemento '{complemento}' no válido. Opciones: {COMPLEMENTOS}")
+
+    monto = np.asarray(monto, dtype='float64')
+    w_ij = np.broadcast_to(np.asarray(expuestos, dtype='float64'), monto.shape)
+    observado = w_ij > 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_ij = np.where(observado, monto / w_ij, 0.0)
+
+        # Por celda (se suma sobre años, eje -3)
+        w_i = w_ij.sum(axis=-3)                                           # (..., E, N)
+        n_i = observado.sum(axis=-3)
+        x_i = np.where(w_i > 0, monto.sum(axis=-3) / w_i, np.nan)
+
+        # Varianza dentro de celdas (EPV), por nivel (se suma sobre años y edades)
+        desvio = np.where(observado, w_ij * (x_ij - np.nan_to_num(x_i)[..., None, :, :]) ** 2, 0.0)
+        grados = np.maximum(n_i - 1, 0).sum(axis=-2)                      # (..., N)
+        epv = desvio.sum(axis=(-3, -2)) / grados
+
+        # Varianza entre celdas (VHM), por nivel
+        con_datos = w_i > 0
+        w = w_i.sum(axis=-2)                                              # (..., N)
+        x_barra = np.nansum(w_i * np.nan_to_num(x_i), axis=-2) / w
+        n_celdas = con_datos.sum(axis=-2)
+        dispersion = np.where(con_datos, w_i * (np.nan_to_num(x_i) - x_barra[..., None, :]) ** 2, 0.0)
+        vhm = (dispersion.sum(axis=-2) - (n_celdas - 1) * epv) / (w - (w_i ** 2).sum(axis=-2) / w)
+        vhm = np.maximum(np.nan_to_num(vhm), 0.0)
+
+        # Z = w_i / (w_i + k); con a = 0 no hay heterogeneidad y Z = 0
+        k = np.where(vhm > 0, epv / vhm, np.inf)
+        z = np.where(con_datos & np.isfinite(k[..., None, :]), w_i / (w_i + k[..., None, :]), 0.0)
+
+        if complemento == 'nivel':
+            suma_z = z.sum(axis=-2)
+            colectiva = np.where(suma_z > 0, (z * np.nan_to_num(x_i)).sum(axis=-2) / suma_z, x_barra)
+            comp = np.broadcast_to(colectiva[..., None, :], z.shape)
+        else:
+            # Media de las edades vecinas sin la propia celda
+            wx = w_i * np.nan_to_num(x_i)
+            suma_wx = _suma_ventana(wx, vecinos, eje=-2) - wx
+            suma_w = _suma_ventana(w_i, vecinos, eje=-2) - w_i
+            comp = np.where(suma_w > 0, suma_wx / suma_w, x_barra[..., None, :])
+
+        prima = z * np.nan_to_num(x_i) + (1 - z) * comp
+
+    return {
+        'prima_observada': x_i,
+        'z': z,
+        'complemento': comp,
+        'prima_credibilidad': prima,
+        'expuestos': w_i,
+        'epv': epv,
+        'vhm': vhm,
+        'k': k,
+    }
+
+
+def credibilidad_desde_cubo(cubo_siniestros: pd.DataFrame, cubo_exposicion: pd.DataFrame,
+                            complemento: str = 'nivel', vecinos: int = VECINOS) -> tuple:
+    """
+    Aplica Bühlmann-Straub a la experiencia anual del cubo con los factores de
+    INFLACION_MEDICA.
+
+    Returns:
+        tuple: (resultado de buhlmann_straub, datos de arreglos_por_anio)
+    """
+    datos = arreglos_por_anio(cubo_siniestros, cubo_exposicion)
+    factores = np.array([INFLACION_MEDICA.get(int(a), 1.0) for a in datos['anios']])
+    monto = datos['monto_pagado'] * factores[:, None, None]
+    resultado = buhlmann_straub(monto, datos['expuestos'][..., None], complemento, vecinos)
+    return resultado, datos
+
+
+def a_dataframe(resultado: dict, datos: dict) -> pd.DataFrame:
+    """Tabla edad × nivel con prima observada, Z, complemento y prima con credibilidad."""
+    edades = datos['edades']
+    niveles = np.arange(1, resultado['z'].shape[-1] + 1)
+    siniestros = datos['siniestros'].sum(axis=0)
+    tabla = pd.DataFrame({
+        'edad': np.repeat(edades, len(niveles)),
+        'nivel': np.tile(niveles, len(edades)),
+        'num_siniestros': siniestros.ravel().astype(int),
+        'expuestos': resultado['expuestos'].ravel(),
+        'prima_observada': resultado['prima_observada'].ravel(),
+        'z': resultado['z'].ravel(),
+        'complemento': resultado['complemento'].ravel(),
+        'prima_credibilidad': resultado['prima_credibilidad'].ravel(),
+    })
+    tabla.insert(2, 'descripcion', tabla['nivel'].map(NIVEL_DESCRIPCION))
+    tabla['prima_mensual'] = tabla['prima_credibilidad'] * FACTOR_MENSUAL_2025
+    tabla['credible'] = tabla['num_siniestros'] >= MIN_SINIESTROS_CREDIBILIDAD
+    return tabla
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Credibilidad de Bühlmann-Straub por celda")
+    parser.add_argument('--complemento', choices=COMPLEMENTOS, default='nivel')
+    parser.add_argument('--vecinos', type=int, default=VECINOS)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("CREDIBILIDAD DE BÜHLMANN-STRAUB")
+    print("=" * 70)
+
+    cubo_sin, cubo_exp, _ = cargar_cubo()
+    resultado, datos = credibilidad_desde_cubo(cubo_sin, cubo_exp, args.complemento, args.vecinos)
+    tabla = a_dataframe(resultado, datos)
+
+    print(f"\n  Complemento: {args.complemento}" +
+          (f" (± {args.vecinos} edades)" if args.complemento == 'edad_vecina' else ""))
+    print(f"  {'Nivel':<20} {'EPV (s²)':>14} {'VHM (a)':>12} {'k = s²/a':>14} {'Z media':>8}")
+    for n, desc in NIVEL_DESCRIPCION.items():
+        z_media = tabla.loc[tabla['nivel'] == n, 'z'].mean()
+        print(f"  {desc:<20} {resultado['epv'][n - 1]:>14,.1f} {resultado['vhm'][n - 1]:>12,.2f} "
+              f"{resultado['k'][n - 1]:>14,.0f} {z_media:>8.3f}")
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    tabla.to_csv(CREDIBILIDAD_FILE, index=False)
+    print(f"\n  ✓ {CREDIBILIDAD_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+fit_glm.py
+Modelos lineales generalizados de frecuencia y severidad sobre el cubo agregado.
+
+En lugar del cociente por celda de calculate_tarificacion.py se ajustan
+relatividades multiplicativas (liga logarítmica) por edad, nivel y las dimensiones
+elegidas del cubo (sexo, entidad):
+
+    Frecuencia: NUM_SINIESTROS ~ Poisson,  log μ = log(expuestos) + Xβ
+    Severidad:  MONTO / NUM_SINIESTROS ~ Gamma,  log μ = Xγ,  pesos = NUM_SINIESTROS
+                (solo celdas con monto > 0: la Gamma no admite severidad cero)
+
+Ambos se ajustan por IRLS sobre matrices de diseño one-hot dispersas (nivel base =
+el de mayor exposición) y directamente sobre celdas agregadas: cada celda del cubo
+es una observación, por lo que un ajuste completo toma segundos aunque los
+siniestros sean millones de filas. Para la frecuencia se incluyen las celdas con
+exposición y cero siniestros.
+
+La prima ajustada exp(Xβ) × exp(Xγ) se exporta como RateTable con las dimensiones
+del modelo, lista para cotizar con rate_table.py / price_census.py.
+
+Uso:
+    python scripts/fit_glm.py                     # EDAD + NIVEL + SEXO + ENTIDAD
+    python scripts/fit_glm.py --factores SEXO     # EDAD + NIVEL + SEXO
+
+Salida:
+    - outputs/tarificacion/glm_relatividades.csv
+    - outputs/tarificacion/tabla_primas_glm.npz
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from calculate_tarificacion import FACTOR_MENSUAL_2025
+from build_cube import cargar_cubo, arreglos_por_segmento
+from rate_table import RateTable
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "outputs" / "tarificacion"
+RELATIVIDADES_FILE = OUTPUT_DIR / "glm_relatividades.csv"
+TABLA_GLM_FILE = OUTPUT_DIR / "tabla_primas_glm.npz"
+
+FACTORES = ['SEXO', 'ENTIDAD']
+MAX_ITERACIONES = 50
+TOLERANCIA = 1e-8
+Z_95 = 1.959963984540054
+
+
+# =============================================================================
+# DISEÑO
+# =============================================================================
+
+def celdas_modelo(datos: dict, factores: list) -> pd.DataFrame:
+    """
+    Una fila por segmento × edad × nivel con exposición > 0.
+    """
+    segmentos = datos['segmentos']
+    g, n_edades, n_niveles = datos['siniestros'].shape
+    seg, e, n = np.meshgrid(np.arange(g), np.arange(n_edades), np.arange(n_niveles), indexing='ij')
+
+    celdas = segmentos.iloc[seg.ravel()].reset_index(drop=True)
+    celdas['EDAD'] = datos['edades'][e.ravel()]
+    celdas['NIVEL'] = n.ravel() + 1
+    celdas['siniestros'] = datos['siniestros'].ravel()
+    celdas['monto'] = datos['monto'].ravel()
+    celdas['expuestos'] = np.broadcast_to(datos['expuestos'][..., None], datos['siniestros'].shape).ravel()
+    return celdas[celdas['expuestos'] > 0].reset_index(drop=True)
+
+
+def matriz_diseno(celdas: pd.DataFrame, variables: list, pesos: np.ndarray) -> tuple:
+    """
+    Matriz one-hot dispersa (CSR) con intercepto; por variable se omite el nivel
+    base (el de mayor peso).
+
+    Returns:
+        tuple: (X, columnas) con columnas = [(variable, valor), ...]
+    """
+    n = len(celdas)
+    bloques = [sparse.csr_matrix(np.ones((n, 1)))]
+    columnas = [('intercepto', '')]
+    for var in variables:
+        codigos, valores = pd.factorize(celdas[var], sort=True)
+        base = np.bincount(codigos, weights=pesos, minlength=len(valores)).argmax()
+        otros = [i for i in range(len(valores)) if i != base]
+        # Columna j del bloque corresponde al valor otros[j]
+        mapa = np.full(len(valores), -1)
+        mapa[otros] = np.arange(len(otros))
+        col = mapa[codigos]
+        filas = np.flatnonzero(col >= 0)
+        bloques.append(sparse.csr_matrix((np.ones(len(filas)), (filas, col[filas])),
+                                         shape=(n, len(otros))))
+        columnas += [(var, valores[i]) for i in otros]
+        columnas.append((var, valores[base], 'base'))
+    X = sparse.hstack(bloques, format='csr')
+    return X, columnas
+
+
+# =============================================================================
+# IRLS
+# =============================================================================
+
+def irls(X: sparse.csr_matrix, y: np.ndarray, familia: str, offset: np.ndarray = None,
+         pesos: np.ndarray = None) -> dict:
+    """
+    Ajuste por mínimos cuadrados iterativamente reponderados con liga log.
+
+    Args:
+        familia: 'poisson' o 'gamma'
+        offset: término fijo en el predictor lineal (log exposición)
+        pesos: pesos previos (número de siniestros para la severidad)
+
+    Returns:
+        dict con beta, error_estandar, dispersion, desviacion, iteraciones y
+        convergio (False si se agotaron MAX_ITERACIONES)
+    """
+    n, p = X.shape
+    offset = np.zeros(n) if offset is None else offset
+    pesos = np.ones(n) if pesos is None else pesos
+    if familia == 'gamma' and not (y > 0).all():
+        raise ValueError("La familia Gamma requiere y > 0 en todas las observaciones")
+
+    # Arranque: predictor lineal en la media ponderada
+    media = np.average(y, weights=pesos) if familia == 'gamma' else y.sum() / np.exp(offset).sum()
+    beta = np.zeros(p)
+    beta[0] = np.log(media)
+    desviacion_anterior = np.inf
+    convergio = False
+
+    for iteracion in range(1, MAX_ITERACIONES + 1):
+        eta = X @ beta + offset
+        mu = np.exp(eta)
+        if familia == 'poisson':
+            w = pesos * mu
+            with np.errstate(divide='ignore', invalid='ignore'):
+                termino = np.where(y > 0, y * np.log(y / mu), 0.0) - (y - mu)
+            desviacion = 2 * (pesos * termino).sum()
+        else:
+            w = pesos
+            desviacion = 2 * (pesos * (-np.log(y / mu) + (y - mu) / mu)).sum()
+
+        z = eta - offset + (y - mu) / mu
+        XtW = X.T.multiply(w).tocsr()
+        XtWX = (XtW @ X).toarray()
+        beta = np.linalg.solve(XtWX, XtW @ z)
+
+        if not np.isfinite(desviacion):
+            raise ValueError(f"Desviación no finita en la iteración {iteracion}")
+        if abs(desviacion_anterior - desviacion) <= TOLERANCIA * (abs(desviacion) + 0.1):
+            convergio = True
+            break
+        desviacion_anterior = desviacion
+
+    # Parámetros finales
+    mu = np.exp(X @ beta + offset)
+    w = pesos * mu if familia == 'poisson' else pesos
+    covarianza = np.linalg.inv((X.T.multiply(w).tocsr() @ X).toarray())
+    if familia == 'gamma':
+        dispersion = (pesos * ((y - mu) / mu) ** 2).sum() / max(n - p, 1)
+    else:
+        dispersion = 1.0
+
+    return {
+        'beta': beta,
+        'error_estandar': np.sqrt(np.diag(covarianza) * dispersion),
+        'dispersion': dispersion,
+        'desviacion': desviacion,
+        'iteraciones': iteracion,
+        'convergio': convergio,
+    }
+
+
+def expandir_ajuste(ajuste: dict, presentes: np.ndarray) -> dict:
+    """
+    Lleva un ajuste hecho sin las columnas ausentes de vuelta al diseño completo:
+    las columnas sin observaciones quedan en el nivel base (coeficiente 0) y sin
+    error estándar.
+    """
+    completo = dict(ajuste)
+    completo['beta'] = np.zeros(len(presentes))
+    completo['beta'][presentes] = ajuste['beta']
+    completo['error_estandar'] = np.full(len(presentes), np.nan)
+    completo['error_estandar'][presentes] = ajuste['error_estandar']
+    return completo
+
+
+def tabla_relatividades(modelo: str, ajuste: dict, columnas: list) -> pd.DataFrame:
+    """Relatividades exp(β) con IC 95%; el nivel base de cada variable vale 1."""
+    filas = []
+    i = 0
+    for col in columnas:
+        if len(col) == 3:
+            filas.append({'modelo': modelo, 'variable': col[0], 'valor': col[1],
+                          'coeficiente': 0.0, 'error_estandar': 0.0})
+            continue
+        filas.append({'modelo': modelo, 'variable': col[0], 'valor': col[1],
+                      'coeficiente': ajuste['beta'][i], 'error_estandar': ajuste['error_estandar'][i]})
+        i += 1
+    tabla = pd.DataFrame(filas)
+    tabla['relatividad'] = np.exp(tabla['coeficiente'])
+    tabla['ic_inf'] = np.exp(tabla['coeficiente'] - Z_95 * tabla['error_estandar'])
+    tabla['ic_sup'] = np.exp(tabla['coeficiente'] + Z_95 * tabla['error_estandar'])
+    tabla['base'] = [len(c) == 3 for c in columnas]
+    return tabla
+
+
+def prima_ajustada(relatividades: pd.DataFrame, variables: list) -> pd.DataFrame:
+    """
+    Prima de riesgo ajustada (frecuencia × severidad) en la rejilla completa de
+    valores de las variables del modelo.
+    """
+    niveles = {v: pd.unique(relatividades.loc[relatividades['variable'] == v, 'valor']).tolist()
+               for v in variables}
+    indice = pd.MultiIndex.from_product(niveles.values(), names=variables)
+    rejilla = indice.to_frame(index=False)
+
+    for modelo in ['frecuencia', 'severidad']:
+        rel = relatividades[relatividades['modelo'] == modelo]
+        log_mu = np.full(len(rejilla), rel.loc[rel['variable'] == 'intercepto', 'coeficiente'].iloc[0])
+        for v in variables:
+            coef = rel[rel['variable'] == v].set_index('valor')['coeficiente']
+            log_mu = log_mu + rejilla[v].map(coef).to_numpy()
+        rejilla[modelo] = np.exp(log_mu)
+
+    rejilla['prima_riesgo'] = rejilla['frecuencia'] * rejilla['severidad']
+    rejilla['prima_mensual'] = rejilla['prima_riesgo'] * FACTOR_MENSUAL_2025
+    return rejilla
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GLM Poisson/Gamma sobre el cubo")
+    parser.add_argument('--factores', nargs='*', default=FACTORES,
+                        help="Dimensiones del cubo además de EDAD y NIVEL")
+    args = parser.parse_args()
+    variables = ['EDAD', 'NIVEL'] + list(args.factores)
+
+    print("=" * 70)
+    print("AJUSTE GLM DE FRECUENCIA Y SEVERIDAD")
+    print("=" * 70)
+
+    print("\n[1/4] Preparando celdas...")
+    cubo_sin, cubo_exp, _ = cargar_cubo()
+    celdas = celdas_modelo(arreglos_por_segmento(cubo_sin, cubo_exp, args.factores), args.factores)
+    con_siniestros = celdas['siniestros'] > 0
+    print(f"  ✓ Celdas (exposición > 0): {len(celdas):,} | con siniestros: {con_siniestros.sum():,}")
+    print(f"  Variables: {variables}")
+
+    inicio = time.perf_counter()
+    print("\n[2/4] Frecuencia (Poisson, offset log exposición)...")
+    X, columnas = matriz_diseno(celdas, variables, celdas['expuestos'].to_numpy())
+    ajuste_f = irls(X, celdas['siniestros'].to_numpy(), 'poisson',
+                    offset=np.log(celdas['expuestos'].to_numpy()))
+    print(f"  {'✓' if ajuste_f['convergio'] else '⚠'} {X.shape[1]} parámetros, "
+          f"{ajuste_f['iteraciones']} iteraciones, desviación {ajuste_f['desviacion']:,.1f}")
+
+    print("\n[3/4] Severidad (Gamma, pesos = siniestros)...")
+    # Siniestros con monto pagado cero no tienen severidad Gamma: quedan fuera
+    con_monto = con_siniestros & (celdas['monto'] > 0)
+    if (con_siniestros & ~con_monto).any():
+        print(f"  Celdas con siniestros y monto cero excluidas: {(con_siniestros & ~con_monto).sum():,}")
+    sev = celdas[con_monto].reset_index(drop=True)
+    # Mismo diseño (mismas columnas y niveles base) restringido a celdas con monto
+    X_s = X[np.flatnonzero(con_monto)]
+    # Valores con exposición pero sin siniestros pagados no identifican severidad
+    presentes = np.asarray((X_s != 0).sum(axis=0)).ravel() > 0
+    if not presentes.all():
+        libres = [c for c in columnas if len(c) != 3]
+        ausentes = ', '.join(f"{libres[i][0]}={libres[i][1]}" for i in np.flatnonzero(~presentes))
+        print(f"  Sin severidad observada (quedan en el nivel base): {ausentes}")
+    ajuste_s = irls(X_s[:, np.flatnonzero(presentes)], (sev['monto'] / sev['siniestros']).to_numpy(),
+                    'gamma', pesos=sev['siniestros'].to_numpy())
+    ajuste_s = expandir_ajuste(ajuste_s, presentes)
+    print(f"  {'✓' if ajuste_s['convergio'] else '⚠'} {ajuste_s['iteraciones']} iteraciones, "
+          f"dispersión {ajuste_s['dispersion']:,.4f}")
+    for nombre, ajuste in [('Frecuencia', ajuste_f), ('Severidad', ajuste_s)]:
+        if not ajuste['convergio']:
+            print(f"  ⚠ {nombre}: sin convergencia en {MAX_ITERACIONES} iteraciones; "
+                  f"las relatividades no son confiables")
+    print(f"  Tiempo de ajuste: {time.perf_counter() - inicio:.2f} s")
+
+    print("\n[4/4] Exportando...")
+    relatividades = pd.concat([
+        tabla_relatividades('frecuencia', ajuste_f, columnas),
+        tabla_relatividades('severidad', ajuste_s, columnas),
+    ], ignore_index=True)
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    relatividades.to_csv(RELATIVIDADES_FILE, index=False)
+    print(f"  ✓ {RELATIVIDADES_FILE}")
+
+    rejilla = prima_ajustada(relatividades, variables)
+    rejilla = rejilla.rename(columns={v: v.lower() for v in variables})
+    tabla = RateTable.desde_matriz(rejilla, dimensiones=[f.lower() for f in args.factores])
+    tabla.guardar(TABLA_GLM_FILE)
+    print(f"  ✓ {TABLA_GLM_FILE} ({tabla})")
+
+    print("\n  Relatividades por nivel (frecuencia × severidad):")
+    for modelo in ['frecuencia', 'severidad']:
+        rel = relatividades[(relatividades['modelo'] == modelo) & (relatividades['variable'] == 'NIVEL')].sort_values('valor')
+        valores = ', '.join(f"N{int(r['valor'])}={r['relatividad']:.3f}" for _, r in rel.iterrows())
+        print(f"    {modelo:<11} {valores}")
+
+
+if __name__ == "__main__":
+    main()
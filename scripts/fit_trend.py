@@ -0,0 +1,210 @@
+"""
+fit_trend.py
+Tendencia anual de severidad estimada de los datos (en lugar de factores fijos).
+
+Para cada segmento (total, nivel y, con --bandas, nivel × banda de edad) ajusta una
+regresión log-lineal ponderada de la severidad nominal contra el año:
+
+    log(monto_y / siniestros_y) = a + b · (anio_y - anio_medio),   peso = siniestros_y
+
+    tendencia anual = exp(b) - 1
+    factor al año base = exp(b · (anio_base - anio))
+
+Los agregados año × edad × nivel salen del cubo (montos nominales) y todos los
+segmentos se ajustan a la vez con la solución cerrada de mínimos cuadrados
+ponderados sobre una matriz segmentos × años; no hay un ciclo por segmento.
+
+Con --aplicar, los factores de la tendencia total se escriben en la fuente única
+de inflación (data/parameters/inflacion_medica.json), que leen la tarificación,
+el cubo, los escenarios y la web. Sin --aplicar solo se reporta.
+
+Uso:
+    python scripts/fit_trend.py              # Tendencia total y por nivel
+    python scripts/fit_trend.py --bandas     # Además por nivel × banda de edad
+    python scripts/fit_trend.py --aplicar    # Reemplaza los factores vigentes
+
+Salida:
+    - outputs/tarificacion/tendencia_severidad.csv
+    - data/parameters/inflacion_medica.json (con --aplicar)
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from calculate_tarificacion import NIVEL_DESCRIPCION, BANDA_POR_EDAD, ETIQUETAS_BANDA
+from build_cube import cargar_cubo, arreglos_por_anio
+from inflation_factors import INFLACION_MEDICA, FACTORES_FILE, fuente_factores, guardar_factores
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "outputs" / "tarificacion"
+TENDENCIA_FILE = OUTPUT_DIR / "tendencia_severidad.csv"
+
+TODOS = 'TODOS'
+NIVEL_CONFIANZA = 0.95
+
+
+# =============================================================================
+# AJUSTE
+# =============================================================================
+
+def tendencia_severidad(siniestros: np.ndarray, monto: np.ndarray, anios: np.ndarray) -> dict:
+    """
+    Regresión log-lineal ponderada de la severidad contra el año, para un lote de
+    segmentos a la vez.
+
+    Args:
+        siniestros, monto: (G, Y) agregados por segmento y año (montos nominales)
+        anios: (Y,)
+
+    Returns:
+        dict (G,): tendencia (b), error_estandar de b, severidad_media (exp(a) en el
+        año medio ponderado), anio_medio, anios (años con siniestros) y siniestros
+    """
+    x = np.asarray(anios, dtype='float64')[None, :]
+    w = np.where((siniestros > 0) & (monto > 0), siniestros, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = np.where(w > 0, np.log(monto / siniestros), 0.0)
+
+        suma_w = w.sum(axis=1)
+        x_medio = (w * x).sum(axis=1) / suma_w
+        y_medio = (w * y).sum(axis=1) / suma_w
+        dx = x - x_medio[:, None]
+        sxx = (w * dx ** 2).sum(axis=1)
+        b = (w * dx * (y - y_medio[:, None])).sum(axis=1) / sxx
+
+        # Varianza residual por siniestro: Var(log sev_y) ≈ σ² / siniestros_y
+        n = (w > 0).sum(axis=1)
+        residuo = y - y_medio[:, None] - b[:, None] * dx
+        sigma2 = np.where(n > 2, (w * residuo ** 2).sum(axis=1) / (n - 2), np.nan)
+        error = np.sqrt(sigma2 / sxx)
+
+    b = np.where(n >= 2, b, np.nan)
+    return {
+        'tendencia': b,
+        'error_estandar': error,
+        'severidad_media': np.exp(y_medio),
+        'anio_medio': x_medio,
+        'anios': n,
+        'siniestros': suma_w,
+    }
+
+
+def segmentos_por_anio(datos: dict, bandas: bool = False) -> tuple:
+    """
+    Apila los segmentos (total, nivel y opcionalmente nivel × banda) como matrices
+    (G, Y) de siniestros y montos nominales.
+
+    Returns:
+        (DataFrame de etiquetas nivel/banda, siniestros (G, Y), monto (G, Y))
+    """
+    S, M = datos['siniestros'], datos['monto_pagado']          # (Y, E, 3)
+    n_niveles = S.shape[2]
+    etiquetas = [(TODOS, TODOS)] + [(n + 1, TODOS) for n in range(n_niveles)]
+    bloques_s = [S.sum(axis=(1, 2))[None, :], S.sum(axis=1).T]
+    bloques_m = [M.sum(axis=(1, 2))[None, :], M.sum(axis=1).T]
+
+    if bandas:
+        banda = BANDA_POR_EDAD[datos['edades'] - datos['edades'].min()]
+        H = np.eye(len(ETIQUETAS_BANDA))[banda]                  # (E, B) pertenencia
+        S_b = np.einsum('yen,eb->nby', S, H).reshape(-1, S.shape[0])
+        M_b = np.einsum('yen,eb->nby', M, H).reshape(-1, M.shape[0])
+        etiquetas += [(n + 1, b) for n in range(n_niveles) for b in ETIQUETAS_BANDA]
+        bloques_s.append(S_b)
+        bloques_m.append(M_b)
+
+    segmentos = pd.DataFrame(etiquetas, columns=['nivel', 'banda'])
+    return segmentos, np.vstack(bloques_s), np.vstack(bloques_m)
+
+
+def factores_desde_tendencia(tendencia: float, anios, anio_base: int) -> dict:
+    """Factores {anio: exp(b · (anio_base - anio))} para llevar montos al año base."""
+    return {int(a): float(np.exp(tendencia * (anio_base - a))) for a in anios}
+
+
+def a_dataframe(segmentos: pd.DataFrame, ajuste: dict, anio_base: int) -> pd.DataFrame:
+    """Tabla por segmento con tendencia anual, intervalo y severidad proyectada al año base."""
+    b, error = ajuste['tendencia'], ajuste['error_estandar']
+    with np.errstate(invalid='ignore'):
+        t = stats.t.ppf(0.5 + NIVEL_CONFIANZA / 2, np.maximum(ajuste['anios'] - 2, 1))
+    t = np.where(ajuste['anios'] > 2, t, np.nan)
+
+    tabla = segmentos.copy()
+    tabla['descripcion'] = tabla['nivel'].map(NIVEL_DESCRIPCION).fillna(TODOS)
+    tabla['anios'] = ajuste['anios']
+    tabla['num_siniestros'] = ajuste['siniestros'].astype(int)
+    tabla['tendencia_anual'] = np.expm1(b)
+    tabla['error_estandar'] = error
+    tabla['ic_inferior'] = np.expm1(b - t * error)
+    tabla['ic_superior'] = np.expm1(b + t * error)
+    tabla[f'severidad_{anio_base}'] = ajuste['severidad_media'] * np.exp(b * (anio_base - ajuste['anio_medio']))
+    return tabla
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tendencia de severidad estimada de los datos")
+    parser.add_argument('--bandas', action='store_true', help="Ajustar también por nivel × banda de edad")
+    parser.add_argument('--aplicar', action='store_true',
+                        help=f"Escribir los factores en {FACTORES_FILE.relative_to(BASE_DIR)}")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("TENDENCIA DE SEVERIDAD")
+    print("=" * 70)
+
+    print("\n[1/3] Cargando agregados año × edad × nivel del cubo...")
+    cubo_sin, cubo_exp, _ = cargar_cubo()
+    datos = arreglos_por_anio(cubo_sin, cubo_exp)
+    anios = datos['anios']
+    anio_base = int(anios.max())
+    print(f"  ✓ Años: {anios.min()}-{anio_base}")
+
+    print("\n[2/3] Ajustando regresión log-lineal ponderada...")
+    segmentos, siniestros, monto = segmentos_por_anio(datos, args.bandas)
+    ajuste = tendencia_severidad(siniestros, monto, anios)
+    tabla = a_dataframe(segmentos, ajuste, anio_base)
+    print(f"  ✓ {len(tabla)} segmentos ajustados")
+
+    resumen = tabla[tabla['banda'] == TODOS]
+    print(f"\n  {'Segmento':<20} {'Tendencia':>10} {'IC 95%':>20} {'Siniestros':>12}")
+    for _, fila in resumen.iterrows():
+        ic = f"[{fila['ic_inferior']:+.1%}, {fila['ic_superior']:+.1%}]"
+        print(f"  {fila['descripcion']:<20} {fila['tendencia_anual']:>+10.1%} {ic:>20} "
+              f"{fila['num_siniestros']:>12,}")
+
+    total = ajuste['tendencia'][0]
+    factores = factores_desde_tendencia(total, anios, anio_base)
+    print(f"\n  Factores al año base {anio_base}:")
+    print(f"  {'Año':<6} {'Vigente':>10} {'Estimado':>10}")
+    for anio, factor in factores.items():
+        vigente = INFLACION_MEDICA.get(anio)
+        vigente = f"{vigente:.3f}" if vigente is not None else '-'
+        print(f"  {anio:<6} {vigente:>10} {factor:>10.3f}")
+    print(f"  (vigentes: {fuente_factores()})")
+
+    print("\n[3/3] Guardando resultados...")
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    tabla.to_csv(TENDENCIA_FILE, index=False)
+    print(f"  ✓ {TENDENCIA_FILE}")
+
+    if args.aplicar:
+        if not np.isfinite(total):
+            raise ValueError("No hay años suficientes para estimar la tendencia total")
+        por_nivel = {str(int(f['nivel'])): round(float(f['tendencia_anual']), 6)
+                     for _, f in resumen.iterrows() if f['nivel'] != TODOS}
+        guardar_factores(factores, {
+            'fuente': 'fit_trend.py',
+            'anio_base': anio_base,
+            'tendencia_anual': round(float(np.expm1(total)), 6),
+            'error_estandar': round(float(ajuste['error_estandar'][0]), 6),
+            'tendencia_por_nivel': por_nivel,
+        })
+        print(f"  ✓ {FACTORES_FILE} (el cubo se reconstruirá en el próximo uso)")
+
+
+if __name__ == "__main__":
+    main()
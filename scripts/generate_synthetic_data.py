@@ -0,0 +1,483 @@
+"""
+generate_synthetic_data.py
+Genera datos sintéticos con la forma de los archivos CNSF para pruebas de carga.
+
+Los libros originales de la CNSF no están en el repositorio; este script escribe
+data/processed/{anio}_siniestros.parquet y {anio}_emision.parquet con los mismos
+esquemas por año que espera consolidate_data.py:
+
+- 2020: layout propio (SIN_CAUSA, ENTIDAD_ORIGEN, montos itemizados, EDAD entera,
+  beneficios 1 y 2 en emisión) y causas truncadas a 50 caracteres, casi sin acentos
+- 2021-2024: formato largo (varios renglones por perfil, mismo NUMERO DE SINIESTROS
+  y montos repartidos), EDAD de emisión como texto con 'No disponible ',
+  NUMERO DE RECLAMACIONES solo en 2022-2023 y PRIMA EMITIDA como texto en 2024
+
+Distribuciones:
+- Causas del catálogo clasificado con frecuencia Zipf por rango (1/rango^s); cada
+  causa tiene variantes fijas sin acentos y con un error de captura
+- Edad, sexo y entidad con las mezclas observadas en la emisión 2020/2022
+- Severidad lognormal por nivel de la causa, con recargo por edad
+
+Cada año y archivo usa su propio generador (semilla, año, archivo, bloque), así que
+la misma semilla y el mismo --bloque producen archivos idénticos. La salida se
+escribe por bloques con ParquetWriter, sin materializar el año completo.
+
+Uso:
+    python scripts/generate_synthetic_data.py                         # ~ volumen de producción
+    python scripts/generate_synthetic_data.py --filas 20_000_000      # 10× producción
+    python scripts/generate_synthetic_data.py --filas 10_000 --destino /tmp/gmm/data/processed
+    python scripts/generate_synthetic_data.py --semilla 7 --forzar    # sobrescribe
+
+Salida:
+    - data/processed/{2020..2024}_siniestros.parquet
+    - data/processed/{2020..2024}_emision.parquet
+    - data/processed/sintetico.json (parámetros y filas generadas)
+"""
+
+import argparse
+import json
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+DATA_PROCESSED = BASE_DIR / "data" / "processed"
+CLASIFICACION_FILE = BASE_DIR / "data" / "classified" / "all_causes_classified.csv"
+
+ANIOS = [2020, 2021, 2022, 2023, 2024]
+TAMANO_BLOQUE = 1_000_000
+
+# Filas consolidadas de producción por año (outputs/reporte_calidad_datos.txt)
+FILAS_SINIESTROS = {2020: 284_017, 2021: 401_100, 2022: 409_032, 2023: 479_304, 2024: 400_707}
+FILAS_EMISION = {2020: 104_539, 2021: 225_649, 2022: 178_217, 2023: 193_865, 2024: 223_676}
+ANIOS_CON_RECLAMACIONES = {2022, 2023}
+
+# ============================================
+# MEZCLAS OBSERVADAS
+# ============================================
+
+# Emisión 2022 (proporción de renglones)
+ENTIDADES = {
+    'Ciudad de México': 0.1052, 'Nuevo León': 0.0678, 'Estado de México': 0.0604,
+    'Jalisco': 0.0574, 'Baja California': 0.0499, 'Querétaro': 0.0479,
+    'Guanajuato': 0.0416, 'Coahuila': 0.0377, 'Puebla': 0.0375, 'Chihuahua': 0.0374,
+    'San Luis Potosí': 0.0363, 'Tamaulipas': 0.0346, 'Sinaloa': 0.0316,
+    'Veracruz': 0.0287, 'Yucatán': 0.0266, 'Quintana Roo': 0.0253, 'Sonora': 0.0253,
+    'Aguascalientes': 0.0232, 'Baja California Sur': 0.0228, 'Michoacán': 0.0214,
+    'Morelos': 0.0209, 'Hidalgo': 0.0194, 'Nayarit': 0.0189, 'Tabasco': 0.0180,
+    'Durango': 0.0150, 'Colima': 0.0150, 'Oaxaca': 0.0129, 'Campeche': 0.0127,
+    'Zacatecas': 0.0124, 'Chiapas': 0.0116, 'Tlaxcala': 0.0115, 'Guerrero': 0.0081,
+    'Extranjero': 0.0049, 'Desconocido ó Sin domicilio fijo': 0.0003,
+}
+COBERTURAS = {
+    'Gastos medicos  en el territorio nacional': 0.2365,
+    'Emergencia médica en el extranjero': 0.1450, 'Gastos médicos dentales': 0.1426,
+    'Gastos médicos salud visual': 0.1264, 'Maternidad': 0.0797,
+    'Servicios de asistencia': 0.0743, 'Gastos médicos en el extranjero': 0.0481,
+    'Otro': 0.0413, 'Gastos funerarios': 0.0359, 'Exención de deducible': 0.0243,
+    'Muerte accidental': 0.0147, 'Conversión': 0.0109,
+    'Renta diaria por hospitalización': 0.0094, 'Enfermedades graves': 0.0069,
+    'Gastos Médicos en Exceso': 0.0029, 'Padecimientos Preexistentes': 0.0013,
+}
+FORMAS_VENTA = {
+    'Agentes Persona Física': 0.4010, 'Agentes Persona Moral': 0.3560,
+    'Fuerza de Venta Interna o Casa Matriz': 0.1232, 'Empresas Comerciales': 0.0452,
+    'Red de Sucursales Bancarias': 0.0300, 'Otros Canales de Venta Masiva': 0.0225,
+    'Módulos de Venta': 0.0059, 'Internet': 0.0045, 'Telemercadeo': 0.0039,
+    'Descuento por Nómina': 0.0037, 'Concesionarios Automotrices': 0.0022,
+    'Otra Forma de Venta': 0.0018,
+}
+TIPOS_SEGURO = {
+    'GM Plan Amplio': 0.4264, 'GM Plan Limitado': 0.2689,
+    'GM Indemnizatorios': 0.1563, 'GM Plan Internacional': 0.1483,
+}
+SUBTIPOS = {'Otro': 0.8254, 'Indemnizatorio': 0.1746}
+MONEDAS = {'Nacional': 0.973, 'Extranjera': 0.027}
+TIPOS_PAGO = {'Pago directo': 0.62, 'Reembolso': 0.35, 'Mixto': 0.03}
+SEXOS = ['Femenino', 'Masculino']
+
+# Emisión 2020
+ESTATUS_POLIZA = {'Vigor': 0.449, 'Expirada o terminada': 0.346, 'Cancelada ': 0.171,
+                  'Anticipada o diferida': 0.034}
+ESTATUS_CERTIFICADO = {'Cancelada ': 0.457, 'Vigor': 0.263, 'Expirada o terminada': 0.209,
+                       'Anticipada o diferida': 0.071}
+MODALIDADES = {'Suma Asegurada Limitada': 0.818, 'Sin Limite de Suma Asegurada': 0.182}
+
+NO_DISPONIBLE = 'No disponible '
+PROB_NO_DISPONIBLE = 3e-5  # renglones 'No disponible' en emisión 2021-2024
+
+# ============================================
+# VARIANTES DE CAUSA
+# ============================================
+
+LONGITUD_CAUSA_2020 = 50
+VARIANTES = ['original', 'sin_acentos', 'typo']
+PROB_VARIANTE = {'sin_acentos': 0.12, 'typo': 0.01}
+PROB_VARIANTE_2020 = {'sin_acentos': 0.60, 'typo': 0.01}
+
+# Severidad (lognormal) por nivel de la causa; nivel 0 = sin clasificar
+MU_SEVERIDAD = np.array([9.0, 8.3, 9.6, 11.0])
+SIGMA_SEVERIDAD = 1.3
+
+
+def quitar_acentos(texto: str) -> str:
+    """CESÁREA → CESAREA, RIÑÓN → RINON (como en la captura de 2020)."""
+    nfd = unicodedata.normalize('NFD', texto)
+    return ''.join(c for c in nfd if unicodedata.category(c) != 'Mn')
+
+
+def con_error_captura(texto: str, rng: np.random.Generator) -> str:
+    """Una transposición, omisión o duplicación de letra dentro de una palabra."""
+    posiciones = [i for i in range(1, len(texto) - 1)
+                  if texto[i].isalpha() and texto[i + 1].isalpha()]
+    if not posiciones:
+        return texto + '.'
+    i = posiciones[rng.integers(len(posiciones))]
+    operacion = rng.integers(3)
+    if operacion == 0:
+        return texto[:i] + texto[i + 1] + texto[i] + texto[i + 2:]
+    if operacion == 1:
+        return texto[:i] + texto[i + 1:]
+    return texto[:i] + texto[i] + texto[i:]
+
+
+def cargar_causas(semilla: int, zipf: float) -> dict:
+    """
+    Catálogo de causas en orden de frecuencia con sus variantes fijas.
+
+    vocabulario[v * n + c] es la variante v de la causa c; vocabulario_2020 es
+    el mismo truncado a LONGITUD_CAUSA_2020 caracteres.
+    """
+    clasificacion = pd.read_csv(CLASIFICACION_FILE)
+    clasificacion['frecuencia'] = clasificacion['frecuencia'].fillna(0)
+    clasificacion = clasificacion.sort_values('frecuencia', ascending=False, kind='stable')
+
+    causas = clasificacion['causa'].astype(str).tolist()
+    rng = np.random.default_rng([semilla, 0])
+    vocabulario = (causas
+                   + [quitar_acentos(c) for c in causas]
+                   + [con_error_captura(c, rng) for c in causas])
+
+    pesos = 1.0 / np.arange(1, len(causas) + 1) ** zipf
+    return {
+        'n': len(causas),
+        'acumulada': np.cumsum(pesos / pesos.sum()),
+        'nivel': clasificacion['nivel'].fillna(0).clip(0, 3).astype(np.int64).to_numpy(),
+        'vocabulario': pa.array(vocabulario, type=pa.string()),
+        'vocabulario_2020': pa.array([v[:LONGITUD_CAUSA_2020] for v in vocabulario], type=pa.string()),
+    }
+
+
+# ============================================
+# MUESTREO
+# ============================================
+
+def elegir(rng: np.random.Generator, mezcla: dict, n: int) -> np.ndarray:
+    """Códigos (posición en la mezcla) con las probabilidades de la mezcla."""
+    p = np.fromiter(mezcla.values(), dtype=float)
+    acumulada = np.cumsum(p / p.sum())
+    return np.minimum(np.searchsorted(acumulada, rng.random(n), side='right'), len(p) - 1)
+
+
+def texto(codigos: np.ndarray, vocabulario, nulos: np.ndarray = None) -> pa.Array:
+    """Columna de texto a partir de códigos, sin crear objetos de Python por fila."""
+    if not isinstance(vocabulario, pa.Array):
+        vocabulario = pa.array(list(vocabulario), type=pa.string())
+    indices = pa.array(codigos.astype(np.int32), mask=nulos)
+    return pa.DictionaryArray.from_arrays(indices, vocabulario).cast(pa.string())
+
+
+def edades(rng: np.random.Generator, n: int, media: float, desviacion: float,
+           prob_menores: float) -> np.ndarray:
+    """Mezcla de menores (0-17, dependientes) y adultos normales, en 0-110."""
+    adultos = rng.normal(media, desviacion, n)
+    menores = rng.integers(0, 18, n)
+    edad = np.where(rng.random(n) < prob_menores, menores, np.rint(adultos))
+    return np.clip(edad, 0, 110).astype(np.int64)
+
+
+def causas_y_montos(rng: np.random.Generator, causas: dict, edad: np.ndarray,
+                    prob_variante: dict) -> tuple:
+    """Código de causa (con variante), número de siniestros y monto total."""
+    n = len(edad)
+    causa = np.minimum(np.searchsorted(causas['acumulada'], rng.random(n), side='right'),
+                       causas['n'] - 1)
+    variante = elegir(rng, {'original': 1 - sum(prob_variante.values()), **prob_variante}, n)
+
+    num = rng.geometric(0.55, n)
+    recargo_edad = np.clip(1 + 0.012 * (edad - 40), 0.5, None)
+    severidad = rng.lognormal(MU_SEVERIDAD[causas['nivel'][causa]], SIGMA_SEVERIDAD) * recargo_edad
+    return variante * causas['n'] + causa, num, severidad * num
+
+
+def repartir(rng: np.random.Generator, perfil: np.ndarray, monto: np.ndarray) -> np.ndarray:
+    """Reparte el monto de cada perfil entre sus renglones (formato largo)."""
+    fraccion = rng.random(len(perfil)) + 0.05
+    return monto * fraccion / np.bincount(perfil, fraccion)[perfil]
+
+
+def centavos(x: np.ndarray) -> np.ndarray:
+    return np.round(x, 2)
+
+
+# ============================================
+# SINIESTROS
+# ============================================
+
+def bloque_siniestros_2020(rng: np.random.Generator, n: int, causas: dict) -> pa.Table:
+    edad = edades(rng, n, 44, 17, 0.14)
+    causa, num, total = causas_y_montos(rng, causas, edad, PROB_VARIANTE_2020)
+
+    # Honorarios, hospital, medicamentos, estudios, otros
+    reparto = rng.dirichlet([2.0, 4.0, 2.0, 1.0, 0.5], n) * total[:, None]
+    deducible = total * rng.beta(1, 12, n)
+    coaseguro = np.where(rng.random(n) < 0.7, (total - deducible) * 0.1, 0.0)
+
+    return pa.table({
+        'EDAD': edad,
+        'SEXO': texto(elegir(rng, {'Femenino': 0.54, 'Masculino': 0.46}, n), SEXOS),
+        'ENTIDAD_ORIGEN': texto(elegir(rng, ENTIDADES, n), ENTIDADES),
+        'SIN_CAUSA': texto(causa, causas['vocabulario_2020']),
+        'MONEDA': texto(elegir(rng, MONEDAS, n), MONEDAS),
+        'NUM SINIESTROS': num,
+        'NUM RECLAMACIONES': num + rng.geometric(0.5, n) - 1,
+        'MONTO HONORARIOS MEDICOS': centavos(reparto[:, 0]),
+        'MONTO GASTOS HOSPITALARIOS': centavos(reparto[:, 1]),
+        'MONTO MEDICAMENTOS': centavos(reparto[:, 2]),
+        'MONTO ESTUDIOS AUXILIARES': centavos(reparto[:, 3]),
+        'OTROS GASTOS DEL SINIESTRO': centavos(reparto[:, 4]),
+        'DEDUCIBLE': centavos(deducible),
+        'COASEGURO': centavos(coaseguro),
+    })
+
+
+def bloque_siniestros(rng: np.random.Generator, n: int, causas: dict, anio: int) -> pa.Table:
+    """Formato largo: 1-3 renglones por perfil con el mismo NUMERO DE SINIESTROS."""
+    renglones = rng.choice([1, 2, 3], size=n, p=[0.6, 0.3, 0.1])
+    perfiles = int(np.searchsorted(np.cumsum(renglones), n)) + 1
+    perfil = np.repeat(np.arange(perfiles), renglones[:perfiles])[:n]
+
+    edad = edades(rng, perfiles, 44, 17, 0.14)
+    causa, num, total = causas_y_montos(rng, causas, edad, PROB_VARIANTE)
+    columnas = {
+        'EDAD': edad,
+        'SEXO': texto(elegir(rng, {'Femenino': 0.54, 'Masculino': 0.46}, perfiles), SEXOS),
+        'ENTIDAD': texto(elegir(rng, ENTIDADES, perfiles), ENTIDADES),
+        'CAUSA DEL SINIESTRO': texto(causa, causas['vocabulario']),
+        'MONEDA': texto(elegir(rng, MONEDAS, perfiles), MONEDAS),
+        'TIPO DE SEGURO': texto(elegir(rng, TIPOS_SEGURO, perfiles), TIPOS_SEGURO),
+        'SUBTIPO': texto(elegir(rng, SUBTIPOS, perfiles), SUBTIPOS),
+        'TPO DE PAGO': texto(elegir(rng, TIPOS_PAGO, perfiles), TIPOS_PAGO),
+        'NUMERO DE SINIESTROS': num,
+    }
+    if anio in ANIOS_CON_RECLAMACIONES:
+        columnas['NUMERO DE RECLAMACIONES'] = num + rng.geometric(0.5, perfiles) - 1
+    # Atributos del perfil repetidos en cada renglón
+    tabla = pa.table(columnas).take(pa.array(perfil))
+
+    reclamado = repartir(rng, perfil, total[perfil] * rng.uniform(1.0, 1.3, perfiles)[perfil])
+    deducible = reclamado * rng.beta(1, 12, n)
+    coaseguro = np.where(rng.random(n) < 0.7, (reclamado - deducible) * 0.1, 0.0)
+    pagado = reclamado - deducible - coaseguro
+    pagado = np.where(rng.random(n) < 0.004, -0.1 * pagado, pagado)  # Ajustes negativos
+    reaseguro = np.where(rng.random(n) < 0.05, pagado * rng.beta(2, 5, n), 0.0)
+
+    for nombre, valores in [('MONTO RECLAMADO', reclamado), ('MONTO DE DEDUCIBLE', deducible),
+                            ('MONTO DE COASEGURO', coaseguro), ('MONTO PAGADO', pagado),
+                            ('MONTO DE REASEGURO', reaseguro)]:
+        tabla = tabla.append_column(nombre, pa.array(centavos(valores)))
+    return tabla
+
+
+# ============================================
+# EMISIÓN
+# ============================================
+
+def asegurados_y_primas(rng: np.random.Generator, edad: np.ndarray) -> tuple:
+    n = len(edad)
+    asegurados = np.clip(np.ceil(rng.lognormal(2.2, 2.0, n)), 1, 500_000).astype(np.int64)
+    recargo_edad = np.clip(1 + 0.03 * (edad - 35), 0.4, None)
+    prima = asegurados * rng.lognormal(7.5, 1.5, n) * recargo_edad
+    prima = np.where(rng.random(n) < 0.01, -0.3 * prima, prima)  # Cancelaciones
+    suma = np.where(rng.random(n) < 0.1, 0, asegurados * rng.lognormal(13.5, 1.5, n))
+    return asegurados, centavos(prima), np.rint(suma).astype(np.int64)
+
+
+def bloque_emision_2020(rng: np.random.Generator, n: int) -> pa.Table:
+    edad = edades(rng, n, 38, 16, 0.22)
+    asegurados, prima, suma = asegurados_y_primas(rng, edad)
+    con_beneficio_2 = rng.random(n) < 0.5
+    parte_2 = np.where(con_beneficio_2, rng.beta(1, 8, n), 0.0)
+
+    return pa.table({
+        'SEXO': texto(elegir(rng, {'Femenino': 0.48, 'Masculino': 0.52}, n), SEXOS),
+        'MONEDA': texto(np.zeros(n, dtype=np.int64), ['Nacional']),
+        'ESTATUS_POLIZA': texto(elegir(rng, ESTATUS_POLIZA, n), ESTATUS_POLIZA),
+        'ESTATUS_CERTIFICADO': texto(elegir(rng, ESTATUS_CERTIFICADO, n), ESTATUS_CERTIFICADO),
+        'ENTIDAD_ORIGEN': texto(elegir(rng, ENTIDADES, n), ENTIDADES),
+        'MODALIDAD_POLIZA': texto(elegir(rng, MODALIDADES, n), MODALIDADES),
+        'EDAD': edad,
+        'FORMA_VENTA': texto(elegir(rng, FORMAS_VENTA, n), FORMAS_VENTA),
+        'NUM_POLIZAS': np.maximum(1, np.rint(asegurados * rng.beta(2, 3, n))).astype(np.int64),
+        'NUM_ASEG': asegurados,
+        'SA_BENEFICIO_1': np.rint(suma * (1 - parte_2)).astype(np.int64),
+        'SA_BENEFICIO_2': np.rint(suma * parte_2).astype(np.int64),
+        'PRIMA BENEFICIO_1': centavos(prima * (1 - parte_2)),
+        'PRIMA BENEFICIO_2': centavos(prima * parte_2),
+    })
+
+
+def bloque_emision(rng: np.random.Generator, n: int, anio: int) -> pa.Table:
+    edad = edades(rng, n, 38, 16, 0.22)
+    asegurados, prima, suma = asegurados_y_primas(rng, edad)
+    devengada = centavos(prima * rng.lognormal(0, 0.4, n))
+    no_disponible = rng.random(n) < PROB_NO_DISPONIBLE
+
+    # EDAD como texto: '0'..'110' y 'No disponible '
+    vocabulario_edad = [str(e) for e in range(111)] + [NO_DISPONIBLE]
+    codigo_edad = np.where(no_disponible, len(vocabulario_edad) - 1, edad)
+
+    prima_emitida = pa.array(prima)
+    if anio == 2024:
+        # En 2024 la columna llegó como texto (consolidate_data la convierte)
+        prima_emitida = prima_emitida.cast(pa.string())
+
+    return pa.table({
+        'EDAD': texto(codigo_edad, vocabulario_edad),
+        'COBERTURA': texto(elegir(rng, COBERTURAS, n), COBERTURAS),
+        'TIPO DE SEGURO': texto(elegir(rng, TIPOS_SEGURO, n), TIPOS_SEGURO),
+        'MONEDA': texto(elegir(rng, MONEDAS, n), MONEDAS),
+        'ENTIDAD': texto(elegir(rng, ENTIDADES, n), ENTIDADES),
+        'SEXO': texto(elegir(rng, {'Femenino': 0.49, 'Masculino': 0.51}, n), SEXOS,
+                      nulos=no_disponible),
+        'FORMA DE VENTA': texto(elegir(rng, FORMAS_VENTA, n), FORMAS_VENTA),
+        'SUBTIPO': texto(elegir(rng, SUBTIPOS, n), SUBTIPOS),
+        'NUMERO DE ASEGURADOS': asegurados,
+        'PRIMA EMITIDA': prima_emitida,
+        'PRIMA DEVENGADA': devengada,
+        'SUMA ASEGURADA': suma,
+    })
+
+
+# ============================================
+# ESCRITURA
+# ============================================
+
+def repartir_filas(total: int, pesos: dict) -> dict:
+    """Filas por año proporcionales a producción (suman exactamente total)."""
+    p = np.array([pesos[a] for a in ANIOS], dtype=float)
+    filas = np.floor(total * p / p.sum()).astype(np.int64)
+    filas[np.argsort(-p)[:total - filas.sum()]] += 1
+    return dict(zip(ANIOS, filas.tolist()))
+
+
+def escribir_parquet(ruta: Path, filas: int, bloque: int, semilla: list, generar) -> None:
+    """
+    Escribe generar(rng, n) bloque por bloque; el archivo final solo aparece
+    completo (se escribe a un temporal y se renombra).
+    """
+    temporal = ruta.with_name(ruta.name + '.parcial')
+    escritor = None
+    try:
+        for i, inicio in enumerate(range(0, filas, bloque)):
+            rng = np.random.default_rng(semilla + [i])
+            tabla = generar(rng, min(bloque, filas - inicio))
+            if escritor is None:
+                escritor = pq.ParquetWriter(temporal, tabla.schema)
+            escritor.write_table(tabla)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    temporal.replace(ruta)
+
+
+def generar(destino: Path, filas: int, semilla: int, zipf: float, bloque: int) -> dict:
+    causas = cargar_causas(semilla, zipf)
+    filas_emision = round(filas * sum(FILAS_EMISION.values()) / sum(FILAS_SINIESTROS.values()))
+    por_anio = {
+        'siniestros': repartir_filas(filas, FILAS_SINIESTROS),
+        'emision': repartir_filas(max(filas_emision, len(ANIOS)), FILAS_EMISION),
+    }
+
+    generadores = {
+        'siniestros': lambda anio: (
+            (lambda rng, n: bloque_siniestros_2020(rng, n, causas)) if anio == 2020
+            else (lambda rng, n: bloque_siniestros(rng, n, causas, anio))),
+        'emision': lambda anio: (
+            bloque_emision_2020 if anio == 2020
+            else (lambda rng, n: bloque_emision(rng, n, anio))),
+    }
+
+    for k, (archivo, etiqueta) in enumerate([('siniestros', 'Siniestros'), ('emision', 'Emisión')], start=1):
+        print(f"\n[{k}/2] {etiqueta}...")
+        for anio in ANIOS:
+            inicio = time.perf_counter()
+            ruta = destino / f"{anio}_{archivo}.parquet"
+            n = por_anio[archivo][anio]
+            escribir_parquet(ruta, n, bloque, [semilla, anio, k], generadores[archivo](anio))
+            segundos = time.perf_counter() - inicio
+            print(f"  ✓ {ruta.name}: {n:,} filas, {ruta.stat().st_size / 2**20:,.1f} MB "
+                  f"({segundos:.1f} s, {n / max(segundos, 1e-9):,.0f} filas/s)")
+
+    return por_anio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Datos sintéticos CNSF para pruebas de carga")
+    parser.add_argument('--filas', type=int, default=sum(FILAS_SINIESTROS.values()),
+                        help="Filas de siniestros en total (default: volumen de producción); "
+                             "la emisión se escala en la misma proporción")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--zipf', type=float, default=1.1,
+                        help="Exponente de la frecuencia de causas por rango (default: 1.1)")
+    parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help="Filas por bloque")
+    parser.add_argument('--destino', type=Path, default=DATA_PROCESSED)
+    parser.add_argument('--forzar', action='store_true', help="Sobrescribir archivos existentes")
+    args = parser.parse_args()
+
+    if args.filas < len(ANIOS) or args.bloque < 1:
+        parser.error(f"--filas debe ser al menos {len(ANIOS)} y --bloque positivo")
+
+    existentes = [args.destino / f"{anio}_{archivo}.parquet"
+                  for archivo in ['siniestros', 'emision'] for anio in ANIOS]
+    existentes = [ruta for ruta in existentes if ruta.exists()]
+    if existentes and not args.forzar:
+        print(f"ERROR: ya existen {len(existentes)} archivos en {args.destino} "
+              f"(p. ej. {existentes[0].name}). Use --forzar para sobrescribirlos o --destino.")
+        sys.exit(1)
+
+    print("=" * 70)
+    print("GENERACIÓN DE DATOS SINTÉTICOS CNSF")
+    print("=" * 70)
+    print(f"  Destino: {args.destino}")
+    print(f"  Filas de siniestros: {args.filas:,} | Semilla: {args.semilla} | "
+          f"Zipf: {args.zipf} | Bloque: {args.bloque:,}")
+
+    args.destino.mkdir(parents=True, exist_ok=True)
+    inicio = time.perf_counter()
+    por_anio = generar(args.destino, args.filas, args.semilla, args.zipf, args.bloque)
+    segundos = time.perf_counter() - inicio
+
+    parametros = {
+        'filas': args.filas, 'semilla': args.semilla, 'zipf': args.zipf, 'bloque': args.bloque,
+        'filas_por_anio': {archivo: {str(a): n for a, n in filas.items()}
+                           for archivo, filas in por_anio.items()},
+        'segundos': round(segundos, 2),
+    }
+    with open(args.destino / 'sintetico.json', 'w', encoding='utf-8') as f:
+        json.dump(parametros, f, ensure_ascii=False, indent=2)
+
+    total = sum(sum(filas.values()) for filas in por_anio.values())
+    print(f"\n  Total: {total:,} filas en {segundos:.1f} s ({total / max(segundos, 1e-9):,.0f} filas/s)")
+    print(f"  ✓ {args.destino / 'sintetico.json'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+graduation.py
+Graduación de curvas por edad (Whittaker-Henderson) para muchos segmentos a la vez.
+
+Las primas de primas_por_nivel_edad.csv son cocientes crudos y las celdas sin
+siniestros quedan con severidad/prima NaN. La graduación de Whittaker-Henderson
+suaviza cada curva sobre EDAD 25-70 y rellena las celdas vacías:
+
+    min_g  Σ_x w_x (y_x - g_x)² + λ Σ_x (Δ^d g_x)²   →   (W + λ DᵀD) g = W y
+
+    frecuencia: y = siniestros / expuestos,  w = expuestos
+    severidad:  y = monto / siniestros,      w = siniestros
+    prima:      frecuencia graduada × severidad graduada
+
+Los pesos se normalizan a media 1 en cada curva, de modo que λ tiene el mismo
+significado en curvas grandes y chicas. Las celdas con peso 0 se rellenan con la
+tendencia de la penalización (interpolación/extrapolación polinómica de grado d-1).
+
+Todas las curvas (nivel × sexo × entidad × escenario ...) se apilan en una sola
+matriz simétrica bandeada, diagonal por bloques con ancho de banda d, y se
+resuelven con una sola llamada a scipy.linalg.solveh_banded.
+
+Uso:
+    python scripts/graduation.py                          # 3 curvas: una por nivel
+    python scripts/graduation.py --segmentos SEXO ENTIDAD # Nivel × sexo × entidad
+    python scripts/graduation.py --lambda-frecuencia 200 --orden 3
+
+Salida:
+    - outputs/tarificacion/primas_graduadas.csv
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import solveh_banded
+
+from calculate_tarificacion import NIVEL_DESCRIPCION, FACTOR_MENSUAL_2025
+from build_cube import cargar_cubo, arreglos_por_segmento
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "outputs" / "tarificacion"
+GRADUADAS_FILE = OUTPUT_DIR / "primas_graduadas.csv"
+
+ORDEN = 2
+LAMBDA_FRECUENCIA = 50.0
+LAMBDA_SEVERIDAD = 50.0
+
+
+def banda_penalizacion(n: int, orden: int) -> np.ndarray:
+    """DᵀD de diferencias de orden d para una curva de n puntos, en formato bandeado superior."""
+    D = np.diff(np.eye(n), n=orden, axis=0)
+    DtD = D.T @ D
+    banda = np.zeros((orden + 1, n))
+    for k in range(orden + 1):
+        # Diagonal superior k en la fila (orden - k), alineada a la derecha
+        banda[orden - k, k:] = np.diagonal(DtD, offset=k)
+    return banda
+
+
+def graduar(y: np.ndarray, w: np.ndarray, lam=LAMBDA_FRECUENCIA, orden: int = ORDEN) -> np.ndarray:
+    """
+    Whittaker-Henderson para un lote de curvas.
+
+    Args:
+        y: valores observados (..., n); NaN donde no hay observación
+        w: pesos (..., n); 0 donde no hay observación
+        lam: escalar o arreglo transmisible a (...) con un λ por curva
+        orden: orden d de las diferencias
+
+    Returns:
+        Curvas graduadas (..., n); NaN en curvas con menos de d + 1 puntos observados.
+    """
+    y = np.asarray(y, dtype='float64')
+    forma = y.shape
+    n = forma[-1]
+    y = y.reshape(-1, n)
+    w = np.broadcast_to(np.asarray(w, dtype='float64'), forma).reshape(-1, n)
+    lam = np.broadcast_to(np.asarray(lam, dtype='float64'), forma[:-1]).reshape(-1)
+
+    observado = (w > 0) & np.isfinite(y)
+    w = np.where(observado, w, 0.0)
+    y = np.where(observado, y, 0.0)
+
+    # Pesos normalizados a media 1 por curva; curvas sin puntos suficientes se
+    # resuelven como identidad y se marcan NaN al final
+    valida = observado.sum(axis=1) > orden
+    media = np.where(valida, w.sum(axis=1) / np.maximum(observado.sum(axis=1), 1), 1.0)
+    w = np.where(valida[:, None], w / media[:, None], 1.0)
+    lam = np.where(valida, lam, 0.0)
+
+    # Matriz bandeada diagonal por bloques: cada bloque es W_b + λ_b DᵀD
+    banda = banda_penalizacion(n, orden)                                  # (d+1, n)
+    ab = (banda[None, :, :] * lam[:, None, None]).transpose(1, 0, 2).reshape(orden + 1, -1)
+    ab[orden] += w.ravel()
+
+    g = solveh_banded(ab, (w * y).ravel(), check_finite=False).reshape(-1, n)
+    g[~valida] = np.nan
+    return g.reshape(forma)
+
+
+def graduar_curvas(siniestros: np.ndarray, monto: np.ndarray, expuestos: np.ndarray,
+                   lam_frecuencia=LAMBDA_FRECUENCIA, lam_severidad=LAMBDA_SEVERIDAD,
+                   orden: int = ORDEN) -> dict:
+    """
+    Gradúa frecuencia y severidad de un lote de curvas por edad.
+
+    Args:
+        siniestros, monto: (..., E)
+        expuestos: transmisible a (..., E)
+
+    Returns:
+        dict (..., E): frecuencia, severidad, prima_riesgo (graduadas) y las crudas
+    """
+    expuestos = np.broadcast_to(expuestos, siniestros.shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frecuencia = np.where(expuestos > 0, siniestros / expuestos, np.nan)
+        severidad = np.where(siniestros > 0, monto / siniestros, np.nan)
+
+    frecuencia_g = np.maximum(graduar(frecuencia, expuestos, lam_frecuencia, orden), 0.0)
+    severidad_g = np.maximum(graduar(severidad, siniestros, lam_severidad, orden), 0.0)
+    return {
+        'frecuencia_cruda': frecuencia,
+        'severidad_cruda': severidad,
+        'frecuencia': frecuencia_g,
+        'severidad': severidad_g,
+        'prima_riesgo': frecuencia_g * severidad_g,
+    }
+
+
+def a_dataframe(datos: dict, graduadas: dict) -> pd.DataFrame:
+    """Tabla segmento × edad × nivel con valores crudos y graduados."""
+    segmentos = datos['segmentos']
+    g, n_edades, n_niveles = datos['siniestros'].shape
+    seg, e, n = np.meshgrid(np.arange(g), np.arange(n_edades), np.arange(n_niveles), indexing='ij')
+
+    tabla = segmentos.iloc[seg.ravel()].reset_index(drop=True)
+    tabla['edad'] = datos['edades'][e.ravel()]
+    tabla['nivel'] = n.ravel() + 1
+    tabla['descripcion'] = tabla['nivel'].map(NIVEL_DESCRIPCION)
+    tabla['num_siniestros'] = datos['siniestros'].ravel().astype(int)
+    tabla['expuestos'] = np.broadcast_to(datos['expuestos'][..., None], datos['siniestros'].shape).ravel()
+    tabla['frecuencia_cruda'] = graduadas['frecuencia_cruda'].ravel()
+    tabla['severidad_cruda'] = graduadas['severidad_cruda'].ravel()
+    tabla['frecuencia'] = graduadas['frecuencia'].ravel()
+    tabla['severidad'] = graduadas['severidad'].ravel()
+    tabla['prima_riesgo'] = graduadas['prima_riesgo'].ravel()
+    tabla['prima_mensual'] = tabla['prima_riesgo'] * FACTOR_MENSUAL_2025
+    return tabla
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Graduación Whittaker-Henderson por edad")
+    parser.add_argument('--segmentos', nargs='*', default=[],
+                        help="Dimensiones del cubo además de nivel (p. ej. SEXO ENTIDAD)")
+    parser.add_argument('--orden', type=int, default=ORDEN)
+    parser.add_argument('--lambda-frecuencia', type=float, default=LAMBDA_FRECUENCIA)
+    parser.add_argument('--lambda-severidad', type=float, default=LAMBDA_SEVERIDAD)
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("GRADUACIÓN WHITTAKER-HENDERSON")
+    print("=" * 70)
+
+    cubo_sin, cubo_exp, _ = cargar_cubo()
+    datos = arreglos_por_segmento(cubo_sin, cubo_exp, args.segmentos)
+    # Curvas (segmento, nivel, edad): la edad debe ser el último eje
+    siniestros = datos['siniestros'].transpose(0, 2, 1)
+    monto = datos['monto'].transpose(0, 2, 1)
+    expuestos = datos['expuestos'][:, None, :]
+    n_curvas = siniestros.shape[0] * siniestros.shape[1]
+    print(f"\n  Segmentos: {len(datos['segmentos']):,} × 3 niveles = {n_curvas:,} curvas")
+    print(f"  Orden: {args.orden} | λ frecuencia: {args.lambda_frecuencia:g} | "
+          f"λ severidad: {args.lambda_severidad:g}")
+
+    inicio = time.perf_counter()
+    graduadas = graduar_curvas(siniestros, monto, expuestos, args.lambda_frecuencia,
+                               args.lambda_severidad, args.orden)
+    segundos = time.perf_counter() - inicio
+    print(f"  ✓ Graduación en {segundos * 1000:.1f} ms")
+
+    graduadas = {k: v.transpose(0, 2, 1) for k, v in graduadas.items()}
+    tabla = a_dataframe(datos, graduadas)
+    rellenadas = (tabla['severidad_cruda'].isna() & tabla['prima_riesgo'].notna()).sum()
+    print(f"  Celdas sin siniestros rellenadas: {rellenadas:,}")
+
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    tabla.to_csv(GRADUADAS_FILE, index=False)
+    print(f"  ✓ {GRADUADAS_FILE}")
+
+
+if __name__ == "__main__":
+    main()
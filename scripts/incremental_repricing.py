@@ -0,0 +1,554 @@
+"""
+incremental_repricing.py
+Re-tarificación incremental cuando cambia el nivel de causas individuales.
+
+Cambiar el nivel de una causa en all_causes_classified.csv obligaba a recorrer de
+nuevo ~2M filas (calculate_tarificacion.py y prepare-data.py). Aquí se mantiene un
+almacén de agregados parciales al grano CAUSA × ANIO × EDAD × SEXO (edades 25-70) y
+el estado acumulado que alimenta las salidas:
+
+    tarifa (ANIO × EDAD × NIVEL): siniestros y centavos pagados, causas clasificadas
+                           y montos >= 0 (convención de la tarificación)
+    web (ANIO × EDAD × SEXO × NIVEL): filas, siniestros y centavos pagados, todas
+                           las filas y sin clasificar en nivel 1 (dashboard)
+
+Todas las medidas son enteras (montos en centavos), así que restar y volver a sumar
+una causa no acumula error de redondeo por más ediciones que se apliquen. El monto
+ajustado se calcula al escribir, con el factor de inflación del año de cada celda,
+igual que prepare-data.py (ver preparar_intermedio).
+
+Un cambio de etiqueta se aplica como delta: se leen solo las filas parciales de las
+causas modificadas, se resta su contribución del nivel anterior y se suma al nuevo,
+y se reescriben solo los renglones afectados de:
+
+    - outputs/tarificacion/primas_por_nivel_edad.csv (y tabla_primas.npz)
+    - outputs/tarificacion/primas_por_nivel.csv
+    - web/data/siniestros-agregados.json, primas-nivel-edad.json y
+      resumen-general.json (clasificacion.json se regenera del CSV de clasificación)
+
+El cubo (data/cube) no se toca: detecta el cambio de clasificación y se reconstruye
+la próxima vez que se use. Si cambian los siniestros o los factores de inflación
+el almacén deja de ser válido y hay que volver a construirlo.
+
+Uso:
+    python scripts/incremental_repricing.py construir
+    python scripts/incremental_repricing.py aplicar                          # Diferencias vs CSV
+    python scripts/incremental_repricing.py aplicar --causa "APENDICITIS AGUDA" --nivel 2
+    python scripts/incremental_repricing.py verificar    # Compara contra una corrida completa
+
+Salida:
+    - data/cube/parciales_causa.parquet
+    - data/cube/parciales_estado.npz
+"""
+
+import argparse
+import importlib.util
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from calculate_tarificacion import (
+    EDAD_MIN, EDAD_MAX, INFLACION_MEDICA, MIN_SINIESTROS_CREDIBILIDAD,
+    NIVEL_DESCRIPCION, FACTOR_MENSUAL_2025,
+)
+from build_cube import (
+    DATA_CUBE, SINIESTROS_FILE, CLASIFICACION_FILE, agregar_siniestros, cargar_cubo,
+    centavos, ajustar_centavos,
+)
+from rate_table import RateTable, TABLA_FILE
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "outputs" / "tarificacion"
+MATRIZ_FILE = OUTPUT_DIR / "primas_por_nivel_edad.csv"
+NIVEL_FILE = OUTPUT_DIR / "primas_por_nivel.csv"
+WEB_DIR = BASE_DIR / "web" / "data"
+PREPARE_DATA = BASE_DIR / "web" / "scripts" / "prepare-data.py"
+TARIFICACION = BASE_DIR / "scripts" / "calculate_tarificacion.py"
+
+# Salidas del dashboard que 'verificar' compara contra la corrida completa
+JSON_VERIFICADOS = ['siniestros-agregados.json', 'primas-nivel-edad.json',
+                    'resumen-general.json', 'clasificacion.json']
+
+PARCIALES_FILE = DATA_CUBE / "parciales_causa.parquet"
+ESTADO_FILE = DATA_CUBE / "parciales_estado.npz"
+
+GRANO = ['CAUSA', 'ANIO', 'EDAD', 'SEXO']
+NIVELES = 3
+N_EDADES = EDAD_MAX - EDAD_MIN + 1
+# Grupos de filas pequeños: el filtro por causa salta los que no la contienen
+FILAS_POR_GRUPO = 16_384
+# Formato del estado: otro valor obliga a reconstruir el almacén
+VERSION_ESTADO = 2
+
+# prepare-data.py cargado como módulo (una vez por proceso)
+_PREP = None
+
+
+def _huella() -> dict:
+    """Insumos que invalidan el almacén (la clasificación no: esa se aplica como delta)."""
+    stat = SINIESTROS_FILE.stat()
+    return {'version': VERSION_ESTADO, 'siniestros': [stat.st_size, stat.st_mtime_ns],
+            'inflacion': {str(k): v for k, v in INFLACION_MEDICA.items()}}
+
+
+def _modulo_web():
+    """
+    web/scripts/prepare-data.py como módulo, para reutilizar su formato de salida.
+    Se carga la primera vez que se necesita y se reutiliza.
+    """
+    global _PREP
+    if _PREP is None:
+        spec = importlib.util.spec_from_file_location('prepare_data', PREPARE_DATA)
+        _PREP = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_PREP)
+        _PREP.print = lambda *args, **kwargs: None    # Sin mensajes por archivo
+    return _PREP
+
+
+def niveles_vigentes(causas: pd.Index) -> np.ndarray:
+    """Nivel de cada causa según all_causes_classified.csv (0 = sin clasificar)."""
+    clasificacion = pd.read_csv(CLASIFICACION_FILE, usecols=['causa', 'nivel'])
+    clasificacion = clasificacion.drop_duplicates('causa', keep='last')
+    posicion = pd.Index(clasificacion['causa']).get_indexer(causas)
+    nivel = clasificacion['nivel'].to_numpy()
+    return np.where(posicion >= 0, nivel[posicion], 0).astype('int8')
+
+
+# =============================================================================
+# ALMACÉN Y ESTADO
+# =============================================================================
+
+def acumular(estado: dict, parciales: pd.DataFrame, codigo_nivel: np.ndarray, signo: int = 1):
+    """
+    Suma (o resta, signo=-1) las filas parciales al estado, con el nivel indicado
+    por fila (0 = sin clasificar). Los montos entran en centavos enteros.
+    Devuelve las celdas tocadas.
+
+    Returns:
+        (celdas tarifa (edad_idx, nivel_idx), celdas web (anio_idx, edad_idx, sexo_idx, nivel_idx))
+    """
+    y = np.searchsorted(estado['anios'], parciales['ANIO'].to_numpy())
+    e = parciales['EDAD'].to_numpy().astype(np.int64) - EDAD_MIN
+    # SEXO nulo va en una posición extra al final: cuenta en el resumen, no en los agregados
+    s = pd.Index(estado['sexos']).get_indexer(parciales['SEXO'].astype(object))
+    s[s < 0] = len(estado['sexos'])
+    n = codigo_nivel.astype(np.int64)
+
+    filas = parciales['FILAS'].to_numpy().astype(np.int64)
+    siniestros = np.rint(parciales['NUM_SINIESTROS'].to_numpy()).astype(np.int64)
+    pagado = centavos(parciales['MONTO_PAGADO'])
+
+    # Web: todas las filas, sin clasificar en nivel 1
+    n_web = np.maximum(n, 1) - 1
+    for k, valores in enumerate([
+            filas + parciales['FILAS_EXCL'].to_numpy().astype(np.int64),
+            siniestros + np.rint(parciales['NUM_SINIESTROS_EXCL'].to_numpy()).astype(np.int64),
+            pagado + centavos(parciales['MONTO_PAGADO_EXCL'])]):
+        np.add.at(estado['web'][..., k], (y, e, s, n_web), signo * valores)
+
+    # Tarifa: solo clasificadas y montos >= 0 (columnas sin _EXCL)
+    clasificada = n > 0
+    for k, valores in enumerate([siniestros, pagado]):
+        np.add.at(estado['tarifa'][..., k], (y[clasificada], e[clasificada], n[clasificada] - 1),
+                  signo * valores[clasificada])
+
+    celdas_tarifa = set(zip(e[clasificada].tolist(), (n[clasificada] - 1).tolist()))
+    celdas_web = set(zip(y.tolist(), e.tolist(), s.tolist(), n_web.tolist()))
+    return celdas_tarifa, celdas_web
+
+
+def construir():
+    """Construye el almacén parcial y el estado a partir de los siniestros."""
+    print("=" * 70)
+    print("ALMACÉN PARCIAL CAUSA × AÑO × EDAD × SEXO")
+    print("=" * 70)
+
+    print("\n[1/3] Agregando siniestros por causa...")
+    inicio = time.perf_counter()
+    df = pd.read_parquet(SINIESTROS_FILE, columns=GRANO + ['NUM_SINIESTROS', 'MONTO_PAGADO'])
+    df = df[(df['EDAD'] >= EDAD_MIN) & (df['EDAD'] <= EDAD_MAX)]
+    df = df.assign(CAUSA=df['CAUSA'].fillna(''),
+                   MONTO_AJUSTADO=df['MONTO_PAGADO'] * df['ANIO'].map(INFLACION_MEDICA))
+    parciales = agregar_siniestros(df, GRANO)
+    parciales['CAUSA'] = parciales['CAUSA'].astype('category')
+    parciales['SEXO'] = parciales['SEXO'].astype('category')
+    parciales = parciales.sort_values(GRANO).reset_index(drop=True)
+    DATA_CUBE.mkdir(parents=True, exist_ok=True)
+    parciales.to_parquet(PARCIALES_FILE, index=False, compression='zstd',
+                         row_group_size=FILAS_POR_GRUPO)
+    print(f"  ✓ {PARCIALES_FILE} ({len(parciales):,} filas, {time.perf_counter() - inicio:.1f} s)")
+
+    print("\n[2/3] Acumulando estado con la clasificación vigente...")
+    causas = pd.Index(parciales['CAUSA'].cat.categories)
+    nivel_causa = niveles_vigentes(causas)
+    anios = np.array(sorted(parciales['ANIO'].unique()))
+    sexos = np.array(parciales['SEXO'].cat.categories, dtype=object)
+    _, cubo_exp, _ = cargar_cubo()
+    expuestos = (cubo_exp.groupby('EDAD', observed=True)['NUM_ASEGURADOS'].sum()
+                 .reindex(range(EDAD_MIN, EDAD_MAX + 1), fill_value=0).to_numpy().astype('float64'))
+
+    estado = {
+        'anios': anios, 'sexos': sexos, 'causas': causas.to_numpy(dtype=object),
+        'nivel_causa': nivel_causa, 'expuestos': expuestos,
+        'web': np.zeros((len(anios), N_EDADES, len(sexos) + 1, NIVELES, 3), dtype=np.int64),
+        'tarifa': np.zeros((len(anios), N_EDADES, NIVELES, 2), dtype=np.int64),
+    }
+    acumular(estado, parciales, nivel_causa[parciales['CAUSA'].cat.codes.to_numpy()])
+    guardar_estado(estado)
+    print(f"  ✓ {ESTADO_FILE} ({len(causas):,} causas, {(nivel_causa > 0).sum():,} clasificadas)")
+
+    print("\n[3/3] Listo: los cambios de etiqueta se aplican con 'aplicar'")
+
+
+def guardar_estado(estado: dict):
+    datos = {k: v for k, v in estado.items() if k != 'huella'}
+    datos['causas'] = np.asarray(datos['causas'], dtype=str)
+    datos['sexos'] = np.asarray(datos['sexos'], dtype=str)
+    np.savez(ESTADO_FILE, huella=json.dumps(_huella()), **datos)
+
+
+def cargar_estado() -> dict:
+    if not ESTADO_FILE.exists():
+        print(f"ERROR: no existe {ESTADO_FILE}. Ejecute primero: incremental_repricing.py construir")
+        sys.exit(1)
+    with np.load(ESTADO_FILE) as archivo:
+        estado = {k: archivo[k] for k in archivo.files}
+    if json.loads(str(estado.pop('huella'))) != _huella():
+        print("ERROR: cambiaron los siniestros, los factores de inflación o el formato del "
+              "almacén; reconstruya con: incremental_repricing.py construir")
+        sys.exit(1)
+    estado['causas'] = estado['causas'].astype(object)
+    estado['sexos'] = estado['sexos'].astype(object)
+    return estado
+
+
+# =============================================================================
+# EDICIÓN Y DELTAS
+# =============================================================================
+
+def editar_etiqueta(causa: str, nivel: int):
+    """
+    Fija el nivel de una causa en all_causes_classified.csv como etiqueta manual.
+    Una causa nueva se agrega con su frecuencia en edades 25-70 (del almacén).
+    """
+    clasificacion = pd.read_csv(CLASIFICACION_FILE)
+    fila = {'nivel': nivel, 'nivel_probabilidad': 1.0, 'origen': 'manual'}
+    for n in range(1, NIVELES + 1):
+        if f'prob_nivel_{n}' in clasificacion.columns:
+            fila[f'prob_nivel_{n}'] = float(n == nivel)
+
+    existe = clasificacion['causa'] == causa
+    if existe.any():
+        for columna, valor in fila.items():
+            clasificacion.loc[existe, columna] = valor
+    else:
+        frecuencia = pd.read_parquet(PARCIALES_FILE, columns=['CAUSA', 'NUM_SINIESTROS'],
+                                     filters=[('CAUSA', '==', causa)])['NUM_SINIESTROS'].sum()
+        nueva = pd.DataFrame([{'causa': causa, 'frecuencia': float(frecuencia), **fila}])
+        clasificacion = pd.concat([clasificacion, nueva[clasificacion.columns]], ignore_index=True)
+    clasificacion.to_csv(CLASIFICACION_FILE, index=False)
+
+
+def aplicar_deltas(estado: dict, codigos: np.ndarray, nuevos: np.ndarray) -> tuple:
+    """
+    Mueve la contribución de las causas indicadas de su nivel anterior al nuevo.
+    Solo se leen las filas parciales de esas causas.
+
+    Returns:
+        (celdas tarifa tocadas, celdas web tocadas)
+    """
+    causas = estado['causas'][codigos].tolist()
+    parciales = pd.read_parquet(PARCIALES_FILE, filters=[('CAUSA', 'in', causas)])
+    codigo_fila = pd.Index(estado['causas']).get_indexer(parciales['CAUSA'].astype(object))
+    nuevo_por_codigo = dict(zip(codigos.tolist(), nuevos.tolist()))
+
+    anterior = estado['nivel_causa'][codigo_fila]
+    nuevo = np.array([nuevo_por_codigo[c] for c in codigo_fila], dtype='int8')
+    tarifa_a, web_a = acumular(estado, parciales, anterior, signo=-1)
+    tarifa_b, web_b = acumular(estado, parciales, nuevo)
+    estado['nivel_causa'][codigos] = nuevos
+    return tarifa_a | tarifa_b, web_a | web_b
+
+
+# =============================================================================
+# SALIDAS
+# =============================================================================
+
+def montos_tarifa(estado: dict) -> tuple:
+    """
+    Siniestros y monto ajustado (pesos) por EDAD × NIVEL, a partir de los
+    centavos pagados por año del estado.
+    """
+    factor = pd.Series(estado['anios']).map(INFLACION_MEDICA).to_numpy(dtype='float64')
+    siniestros = estado['tarifa'][..., 0].sum(axis=0)
+    monto = np.tensordot(factor, estado['tarifa'][..., 1], axes=1) / 100
+    return siniestros, monto
+
+
+def actualizar_matriz(estado: dict, celdas: set) -> pd.DataFrame:
+    """Reescribe solo los renglones (edad, nivel) afectados de primas_por_nivel_edad.csv."""
+    matriz = pd.read_csv(MATRIZ_FILE)
+    posicion = pd.MultiIndex.from_frame(matriz[['edad', 'nivel']])
+    e = np.array([c[0] for c in celdas], dtype=int)
+    n = np.array([c[1] for c in celdas], dtype=int)
+    filas = posicion.get_indexer(pd.MultiIndex.from_arrays([e + EDAD_MIN, n + 1]))
+
+    siniestros_tarifa, monto_tarifa = montos_tarifa(estado)
+    siniestros = siniestros_tarifa[e, n]
+    monto = np.where(siniestros > 0, monto_tarifa[e, n], 0.0)
+    con_datos = siniestros > 0
+    expuestos = np.where(con_datos, estado['expuestos'][e], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frecuencia = np.where(con_datos, siniestros / expuestos, 0.0)
+        severidad = np.where(con_datos, monto / siniestros, np.nan)
+
+    matriz.loc[filas, 'num_siniestros'] = siniestros.astype(int)
+    matriz.loc[filas, 'expuestos'] = expuestos
+    matriz.loc[filas, 'frecuencia'] = frecuencia
+    matriz.loc[filas, 'monto_total'] = monto
+    matriz.loc[filas, 'severidad'] = severidad
+    matriz.loc[filas, 'prima_riesgo'] = frecuencia * severidad
+    matriz.loc[filas, 'prima_mensual'] = frecuencia * severidad * FACTOR_MENSUAL_2025
+    matriz.loc[filas, 'credible'] = con_datos & (siniestros >= MIN_SINIESTROS_CREDIBILIDAD)
+    matriz.to_csv(MATRIZ_FILE, index=False)
+    RateTable.desde_matriz(matriz).guardar(TABLA_FILE)
+    # Renglones tal como los lee prepare-data.py (desde el CSV)
+    return pd.read_csv(MATRIZ_FILE).iloc[np.sort(filas)]
+
+
+def actualizar_por_nivel(estado: dict):
+    """primas_por_nivel.csv a partir de los totales por nivel del estado."""
+    por_nivel = pd.read_csv(NIVEL_FILE)
+    nivel = por_nivel['nivel'].to_numpy().astype(int) - 1
+    siniestros_tarifa, monto_tarifa = montos_tarifa(estado)
+    siniestros = siniestros_tarifa.sum(axis=0)[nivel]
+    monto = monto_tarifa.sum(axis=0)[nivel]
+
+    por_nivel['num_siniestros'] = siniestros.astype(int)
+    por_nivel['monto_total'] = monto
+    por_nivel['frecuencia'] = siniestros / por_nivel['expuestos']
+    por_nivel['severidad'] = monto / siniestros
+    por_nivel['prima_riesgo'] = por_nivel['frecuencia'] * por_nivel['severidad']
+    por_nivel['prima_mensual'] = por_nivel['prima_riesgo'] * FACTOR_MENSUAL_2025
+    por_nivel['pct_siniestros'] = siniestros / siniestros.sum() * 100
+    por_nivel['pct_monto'] = monto / monto.sum() * 100
+    por_nivel.to_csv(NIVEL_FILE, index=False)
+    return por_nivel
+
+
+def _leer_json(nombre: str):
+    with open(WEB_DIR / nombre, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def actualizar_web(estado: dict, web: set, filas_matriz: pd.DataFrame, cambiadas: list):
+    """
+    Actualiza los renglones afectados de los JSON del dashboard (y, si existen,
+    sus variantes compactas, los siniestros por año y los fragmentos del índice
+    de causas que contienen alguna de las causas cambiadas).
+    """
+    prep = _modulo_web()
+
+    def guardar(datos, archivo):
+        prep.guardar_json(datos, archivo)
+        tabla = pd.DataFrame(datos) if isinstance(datos, list) else datos
+        if (prep.COMPACTO_DIR / prep.nombre_compacto(archivo, tabla)).exists():
+            prep.guardar_compacto(tabla, archivo)
+
+    # siniestros-agregados.json: celdas (anio, edad, sexo, nivel) tocadas
+    registros = _leer_json('siniestros-agregados.json')
+    indice = {(r['anio'], r['edad'], r['sexo'], r['nivel']): i for i, r in enumerate(registros)}
+    tocadas = np.array(sorted(c for c in web if c[2] < len(estado['sexos'])), dtype=int).reshape(-1, 4)
+    y, e, s, n = tocadas.T
+    valores = estado['web'][y, e, s, n]
+    anios = estado['anios'][y].astype(int)
+    celdas = pd.DataFrame({
+        'ANIO': anios, 'EDAD': e + EDAD_MIN, 'SEXO': estado['sexos'][s],
+        'NIVEL': n + 1, 'NUM_SINIESTROS': valores[:, 1],
+        'CENTAVOS_PAGADO': valores[:, 2], 'CENTAVOS_AJUSTADO': ajustar_centavos(valores[:, 2], anios),
+    })
+    vacias = valores[:, 0] == 0
+    nuevos = prep.preparar_siniestros_agregados(celdas[~vacias]).to_dict(orient='records')
+    borrar = {indice[k] for k in map(tuple, celdas.loc[vacias, ['ANIO', 'EDAD', 'SEXO', 'NIVEL']].values)
+              if k in indice}
+    for registro in nuevos:
+        clave = (registro['anio'], registro['edad'], registro['sexo'], registro['nivel'])
+        if clave in indice:
+            registros[indice[clave]] = registro
+        else:
+            registros.append(registro)
+    registros = [r for i, r in enumerate(registros) if i not in borrar]
+    registros.sort(key=lambda r: (r['anio'], r['edad'], r['sexo'], r['nivel']))
+    guardar(registros, 'siniestros-agregados.json')
+    if (prep.SINIESTROS_DIR / 'resumen.json').exists():
+        prep.guardar_siniestros_por_anio(*prep.preparar_siniestros_por_anio(pd.DataFrame(registros)))
+
+    # primas-nivel-edad.json: renglones de la matriz reescritos
+    primas = _leer_json('primas-nivel-edad.json')
+    indice = {(r['nivel'], r['edad']): i for i, r in enumerate(primas)}
+    for registro in prep.preparar_primas_json(filas_matriz).to_dict(orient='records'):
+        primas[indice[(registro['nivel'], registro['edad'])]] = registro
+    guardar(primas, 'primas-nivel-edad.json')
+
+    # resumen-general.json: distribución por nivel desde el estado (3 renglones)
+    y, e, s, n = np.nonzero(estado['web'][..., 0] > 0)
+    anios = estado['anios'][y].astype(int)
+    vista = pd.DataFrame({
+        'ANIO': anios, 'EDAD': e + EDAD_MIN, 'NIVEL': n + 1,
+        'NUM_SINIESTROS': estado['web'][y, e, s, n, 1],
+        'CENTAVOS_AJUSTADO': ajustar_centavos(estado['web'][y, e, s, n, 2], anios),
+    })
+    guardar(prep.calcular_resumen_general(vista), 'resumen-general.json')
+
+    # clasificacion.json e índice de búsqueda: dependen solo del CSV de clasificación
+    clasificacion = pd.read_csv(CLASIFICACION_FILE)
+    dropdown = prep.preparar_clasificacion_dropdown(clasificacion)
+    guardar(dropdown, 'clasificacion.json')
+    if (prep.INDICE_DIR / 'indice.json').exists():
+        # Cambiar el nivel no cambia ids ni tamaños: el manifiesto sigue vigente
+        prefijos = {p[:prep.LONGITUD_PREFIJO] for c in cambiadas for p in prep.palabras_indexables(c)}
+        prep.guardar_indice_causas(*prep.construir_indice_causas(dropdown, prefijos), parcial=True)
+
+
+def aplicar(causa: str = None, nivel: int = None):
+    """Aplica los cambios de etiqueta (el indicado o las diferencias con el CSV)."""
+    print("=" * 70)
+    print("RE-TARIFICACIÓN INCREMENTAL")
+    print("=" * 70)
+
+    inicio = time.perf_counter()
+    estado = cargar_estado()
+    causas = pd.Index(estado['causas'])
+
+    if causa is not None:
+        codigo = causas.get_indexer([causa])[0]
+        if codigo < 0:
+            print(f"ERROR: la causa '{causa}' no tiene siniestros en edades {EDAD_MIN}-{EDAD_MAX}")
+            sys.exit(1)
+        editar_etiqueta(causa, nivel)
+
+    nuevos = niveles_vigentes(causas)
+    codigos = np.flatnonzero(nuevos != estado['nivel_causa'])
+    if len(codigos) == 0:
+        print("\n  Sin cambios de etiqueta respecto al estado")
+        return
+
+    print(f"\n  Causas con nivel modificado: {len(codigos):,}")
+    for c in codigos[:10]:
+        print(f"    {estado['nivel_causa'][c]} → {nuevos[c]}  {causas[c][:60]}")
+
+    carga = time.perf_counter() - inicio
+    tarifa, web = aplicar_deltas(estado, codigos, nuevos[codigos])
+    delta = time.perf_counter() - inicio - carga
+
+    # Salidas: tarifa (CSV y npz), luego el dashboard (carga prepare-data.py una vez)
+    marca = time.perf_counter()
+    filas_matriz = actualizar_matriz(estado, tarifa)
+    actualizar_por_nivel(estado)
+    guardar_estado(estado)
+    escritura_tarifa = time.perf_counter() - marca
+    marca = time.perf_counter()
+    escritura_web = None
+    if WEB_DIR.exists() and (WEB_DIR / 'siniestros-agregados.json').exists():
+        _modulo_web()
+        carga_modulo = time.perf_counter() - marca
+        actualizar_web(estado, web, filas_matriz, list(causas[codigos]))
+        escritura_web = time.perf_counter() - marca - carga_modulo
+
+    print(f"\n  ✓ Renglones nivel × edad actualizados: {len(tarifa)}")
+    print(f"  ✓ Celdas del dashboard actualizadas: {len(web)}")
+    for _, fila in filas_matriz.head(6).iterrows():
+        print(f"    Edad {int(fila['edad'])} nivel {int(fila['nivel'])} ({NIVEL_DESCRIPCION[int(fila['nivel'])]}): "
+              f"prima ${fila['prima_riesgo']:,.2f}")
+    print(f"\n  Tiempos:")
+    print(f"    Carga del estado:          {carga * 1000:>7.0f} ms")
+    print(f"    Delta (lectura + suma):    {delta * 1000:>7.0f} ms")
+    print(f"    Escritura tarifa:          {escritura_tarifa * 1000:>7.0f} ms")
+    if escritura_web is not None:
+        print(f"    Carga de prepare-data.py:  {carga_modulo * 1000:>7.0f} ms")
+        print(f"    Escritura dashboard:       {escritura_web * 1000:>7.0f} ms")
+
+
+def verificar():
+    """
+    Comprueba que las salidas incrementales coinciden con una corrida completa:
+    guarda los JSON del dashboard y los fragmentos del índice de causas, corre
+    calculate_tarificacion.py y prepare-data.py --forzar y compara byte a byte.
+    Termina con código 1 si difieren.
+    """
+    print("=" * 70)
+    print("VERIFICACIÓN CONTRA CORRIDA COMPLETA")
+    print("=" * 70)
+
+    antes = {nombre: (WEB_DIR / nombre).read_bytes() for nombre in JSON_VERIFICADOS
+             if (WEB_DIR / nombre).exists()}
+    if not antes:
+        print(f"ERROR: no hay salidas del dashboard en {WEB_DIR}")
+        sys.exit(1)
+    indice_dir = _modulo_web().INDICE_DIR
+    indice = {p.name: p.read_bytes() for p in indice_dir.glob('*.json')}
+
+    print("\n[1/2] Corrida completa...")
+    for comando in [[sys.executable, str(TARIFICACION)], [sys.executable, str(PREPARE_DATA), '--forzar']]:
+        resultado = subprocess.run(comando, cwd=BASE_DIR, capture_output=True, text=True)
+        if resultado.returncode != 0:
+            print(resultado.stdout[-2000:] + resultado.stderr[-2000:])
+            print(f"ERROR: falló {Path(comando[1]).name}")
+            sys.exit(1)
+        print(f"  ✓ {Path(comando[1]).name}")
+
+    print("\n[2/2] Comparando...")
+    distintos = []
+    for nombre, contenido in antes.items():
+        completo = (WEB_DIR / nombre).read_bytes()
+        if completo == contenido:
+            print(f"  ✓ {nombre}")
+            continue
+        incremental, total = json.loads(contenido), json.loads(completo)
+        if isinstance(total, list) and isinstance(incremental, list) and len(total) == len(incremental):
+            detalle = f"{sum(a != b for a, b in zip(incremental, total)):,} de {len(total):,} registros"
+        else:
+            detalle = "contenido distinto"
+        print(f"  ✗ {nombre}: {detalle}")
+        distintos.append(nombre)
+
+    if indice:
+        completo = {p.name: p.read_bytes() for p in indice_dir.glob('*.json')}
+        fragmentos = sorted(n for n in indice.keys() | completo.keys() if indice.get(n) != completo.get(n))
+        if fragmentos:
+            print(f"  ✗ índice de causas: {len(fragmentos):,} de {len(completo):,} archivos ({', '.join(fragmentos[:5])})")
+            distintos.append(indice_dir.name)
+        else:
+            print(f"  ✓ índice de causas ({len(completo):,} archivos)")
+
+    if distintos:
+        print(f"\nERROR: {len(distintos)} salidas difieren de la corrida completa")
+        sys.exit(1)
+    print("\n  ✓ Salidas incrementales idénticas a la corrida completa")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-tarificación incremental por cambio de etiquetas")
+    parser.add_argument('comando', choices=['construir', 'aplicar', 'verificar'])
+    parser.add_argument('--causa', help="Causa a re-etiquetar (texto exacto)")
+    parser.add_argument('--nivel', type=int, choices=[1, 2, 3], help="Nuevo nivel de la causa")
+    args = parser.parse_args()
+
+    if args.comando == 'construir':
+        construir()
+    elif args.comando == 'verificar':
+        verificar()
+    else:
+        if (args.causa is None) != (args.nivel is None):
+            parser.error("--causa y --nivel van juntos")
+        aplicar(args.causa, args.nivel)
+
+
+if __name__ == "__main__":
+    main()
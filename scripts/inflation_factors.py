@@ -0,0 +1,67 @@
+"""
+inflation_factors.py
+Fuente única de los factores de inflación médica (pesos nominales → pesos del año base).
+
+Los factores vigentes salen de data/parameters/inflacion_medica.json si existe
+(lo escribe fit_trend.py --aplicar con la tendencia de severidad estimada de los
+datos); si no, se usan los factores por defecto basados en Banxico.
+
+Todos los scripts (tarificación, cubo, escenarios, web) los leen de aquí, así que
+cambiar el archivo invalida el cubo y cambia los montos ajustados de una sola vez.
+
+Uso:
+    python scripts/inflation_factors.py     # Muestra los factores vigentes y su fuente
+"""
+
+import json
+from pathlib import Path
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+FACTORES_FILE = BASE_DIR / "data" / "parameters" / "inflacion_medica.json"
+
+# Factores por defecto para ajustar a pesos 2024
+# Basado en inflación de servicios médicos de Banxico (~8-10% anual)
+INFLACION_MEDICA_DEFECTO = {
+    2020: 1.41,  # ~8.5% compuesto en 4 años
+    2021: 1.30,  # ~9% compuesto en 3 años
+    2022: 1.20,  # ~9.5% compuesto en 2 años
+    2023: 1.10,  # ~10% en 1 año
+    2024: 1.00   # año base
+}
+
+
+def cargar_factores(ruta: Path = FACTORES_FILE) -> dict:
+    """
+    Factores vigentes {anio: factor}. Usa el archivo estimado si existe y los
+    factores por defecto si no.
+    """
+    if not Path(ruta).exists():
+        return dict(INFLACION_MEDICA_DEFECTO)
+    with open(ruta, 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+    return {int(anio): float(factor) for anio, factor in datos['factores'].items()}
+
+
+def guardar_factores(factores: dict, detalle: dict = None, ruta: Path = FACTORES_FILE):
+    """Escribe los factores vigentes (y el detalle de la estimación) como JSON."""
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    datos = {'factores': {str(anio): round(float(f), 6) for anio, f in sorted(factores.items())}}
+    datos.update(detalle or {})
+    with open(ruta, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False, indent=2)
+
+
+def fuente_factores(ruta: Path = FACTORES_FILE) -> str:
+    """Descripción corta de la fuente de los factores vigentes."""
+    return str(ruta) if Path(ruta).exists() else 'factores por defecto (Banxico)'
+
+
+INFLACION_MEDICA = cargar_factores()
+
+
+if __name__ == "__main__":
+    print(f"Fuente: {fuente_factores()}")
+    for anio, factor in sorted(INFLACION_MEDICA.items()):
+        print(f"  {anio}: {factor:.4f}")
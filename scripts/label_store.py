@@ -0,0 +1,272 @@
+"""
+label_store.py
+Almacén indexado (SQLite) de etiquetas manuales de causas.
+
+Reemplaza la consolidación completa de consolidate_training_set.py:
+- Cada lote clasificados_batch_*.csv se carga una sola vez (se detectan cambios por SHA-256)
+- Las etiquetas se insertan/actualizan por causa (upsert), guardando lote de procedencia,
+  confianza, CIE-10 y el historial de cambios de nivel
+- El origen (top_500 / sample_1000) se resuelve con un JOIN contra una tabla indexada
+- Las frecuencias por causa se guardan en una tabla y solo se recalculan a petición
+
+Uso:
+    python scripts/label_store.py ingest        # Carga lotes nuevos o modificados
+    python scripts/label_store.py frecuencias   # Recalcula frecuencias desde siniestros.parquet
+    python scripts/label_store.py export        # Exporta data/labeled/training_set.csv
+
+Salida:
+    - data/labeled/etiquetas.sqlite
+    - data/labeled/training_set.csv (con export)
+"""
+
+import hashlib
+import sqlite3
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from clean_causes import normalizar_texto, remover_acentos
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+PHASE1_DIR = BASE_DIR / "data" / "phase1"
+LABELED_DIR = BASE_DIR / "data" / "labeled"
+SINIESTROS_FILE = BASE_DIR / "data" / "consolidated" / "siniestros.parquet"
+DB_FILE = LABELED_DIR / "etiquetas.sqlite"
+
+LABELED_DIR.mkdir(parents=True, exist_ok=True)
+
+# Listas de origen en orden de prioridad (la primera que contenga la causa gana)
+FUENTES_ORIGEN = [
+    ("top_500", PHASE1_DIR / "top_500_causas.csv"),
+    ("sample_1000", PHASE1_DIR / "sample_1000_causas.csv"),
+]
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS lotes (
+    archivo   TEXT PRIMARY KEY,
+    sha256    TEXT NOT NULL,
+    filas     INTEGER NOT NULL,
+    cargado   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS etiquetas (
+    causa                 TEXT PRIMARY KEY,
+    causa_normalizada     TEXT NOT NULL,
+    nivel                 INTEGER NOT NULL CHECK (nivel IN (1, 2, 3)),
+    justificacion_medica  TEXT,
+    cie10                 TEXT,
+    confianza             TEXT,
+    lote                  TEXT REFERENCES lotes(archivo),
+    actualizado           TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_etiquetas_normalizada ON etiquetas(causa_normalizada);
+CREATE INDEX IF NOT EXISTS idx_etiquetas_cie10 ON etiquetas(cie10);
+CREATE TABLE IF NOT EXISTS cambios_nivel (
+    causa           TEXT NOT NULL,
+    nivel_anterior  INTEGER NOT NULL,
+    nivel_nuevo     INTEGER NOT NULL,
+    lote            TEXT NOT NULL,
+    fecha           TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cambios_causa ON cambios_nivel(causa);
+CREATE TABLE IF NOT EXISTS origenes (
+    causa   TEXT PRIMARY KEY,
+    origen  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS frecuencias (
+    causa       TEXT PRIMARY KEY,
+    frecuencia  REAL NOT NULL
+);
+"""
+
+UPSERT_ETIQUETA = """
+INSERT INTO etiquetas (causa, causa_normalizada, nivel, justificacion_medica,
+                       cie10, confianza, lote, actualizado)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(causa) DO UPDATE SET
+    causa_normalizada = excluded.causa_normalizada,
+    nivel = excluded.nivel,
+    justificacion_medica = excluded.justificacion_medica,
+    cie10 = excluded.cie10,
+    confianza = excluded.confianza,
+    lote = excluded.lote,
+    actualizado = excluded.actualizado
+"""
+
+EXPORT_TRAINING = """
+SELECT e.causa,
+       e.nivel,
+       e.justificacion_medica,
+       e.cie10,
+       e.confianza,
+       COALESCE(f.frecuencia, 0) AS frecuencia,
+       ROUND(COALESCE(f.frecuencia, 0) * 100.0 / (SELECT SUM(frecuencia) FROM frecuencias), 4) AS pct_cobertura,
+       COALESCE(o.origen, 'unknown') AS origen
+FROM etiquetas e
+LEFT JOIN frecuencias f ON f.causa = e.causa
+LEFT JOIN origenes o ON o.causa = e.causa
+ORDER BY frecuencia DESC
+"""
+
+
+def conectar() -> sqlite3.Connection:
+    """Abre el almacén y crea el esquema si no existe."""
+    conn = sqlite3.connect(DB_FILE)
+    conn.executescript(ESQUEMA)
+    return conn
+
+
+def causa_normalizada(causa: str) -> str:
+    """Clave normalizada de búsqueda: mayúsculas, espacios simples y sin acentos."""
+    return remover_acentos(normalizar_texto(causa))
+
+
+def sha256_archivo(ruta: Path) -> str:
+    return hashlib.sha256(ruta.read_bytes()).hexdigest()
+
+
+def cargar_origenes(conn: sqlite3.Connection):
+    """Carga las listas top_500 / sample_1000 (solo las causas aún no registradas)."""
+    for origen, ruta in FUENTES_ORIGEN:
+        if not ruta.exists():
+            continue
+        causas = pd.read_csv(ruta, usecols=['causa'])['causa']
+        conn.executemany(
+            "INSERT OR IGNORE INTO origenes (causa, origen) VALUES (?, ?)",
+            ((c, origen) for c in causas)
+        )
+
+
+def ingerir_lote(conn: sqlite3.Connection, ruta: Path, fecha: str) -> tuple:
+    """
+    Inserta/actualiza las etiquetas de un lote y registra los cambios de nivel.
+    Al recargar un lote se borran las etiquetas suyas que ya no contiene.
+
+    Returns:
+        tuple: (filas_cargadas, cambios_de_nivel, etiquetas_eliminadas)
+    """
+    df = pd.read_csv(ruta)
+    df = df.astype(object).where(df.notna(), None)
+
+    previos = dict(conn.execute("SELECT causa, nivel FROM etiquetas").fetchall())
+    cambios = [
+        (c, previos[c], int(n), ruta.name, fecha)
+        for c, n in zip(df['causa'], df['nivel'])
+        if c in previos and previos[c] != int(n)
+    ]
+
+    # Las causas que salieron del lote ya no tienen etiqueta de procedencia
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS causas_lote (causa TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM causas_lote")
+    conn.executemany("INSERT OR IGNORE INTO causas_lote (causa) VALUES (?)",
+                     ((c,) for c in df['causa']))
+    eliminadas = conn.execute(
+        "DELETE FROM etiquetas WHERE lote = ? AND causa NOT IN (SELECT causa FROM causas_lote)",
+        (ruta.name,)
+    ).rowcount
+
+    conn.execute(
+        "INSERT OR REPLACE INTO lotes (archivo, sha256, filas, cargado) VALUES (?, ?, ?, ?)",
+        (ruta.name, sha256_archivo(ruta), len(df), fecha)
+    )
+    conn.executemany(UPSERT_ETIQUETA, (
+        (r['causa'], causa_normalizada(r['causa']), int(r['nivel']), r['justificacion_medica'],
+         r['cie10'], r['confianza'], ruta.name, fecha)
+        for r in df.to_dict(orient='records')
+    ))
+    conn.executemany(
+        "INSERT INTO cambios_nivel (causa, nivel_anterior, nivel_nuevo, lote, fecha) "
+        "VALUES (?, ?, ?, ?, ?)",
+        cambios
+    )
+    return len(df), len(cambios), eliminadas
+
+
+def ingerir():
+    """
+    Carga solo los lotes nuevos o cuyo contenido cambió desde la última ingesta.
+    """
+    print("=" * 70)
+    print("INGESTA DE LOTES DE ETIQUETAS")
+    print("=" * 70)
+
+    fecha = datetime.now().isoformat(timespec='seconds')
+    with conectar() as conn:
+        cargar_origenes(conn)
+        registrados = dict(conn.execute("SELECT archivo, sha256 FROM lotes").fetchall())
+
+        batch_files = sorted(PHASE1_DIR.glob("clasificados_batch_*.csv"))
+        pendientes = [b for b in batch_files if registrados.get(b.name) != sha256_archivo(b)]
+        print(f"\n  Lotes encontrados: {len(batch_files)}")
+        print(f"  Lotes nuevos o modificados: {len(pendientes)}")
+
+        for ruta in pendientes:
+            filas, cambios, eliminadas = ingerir_lote(conn, ruta, fecha)
+            print(f"   - {ruta.name}: {filas} etiquetas ({cambios} cambios de nivel, "
+                  f"{eliminadas} eliminadas)")
+
+        total = conn.execute("SELECT COUNT(*) FROM etiquetas").fetchone()[0]
+    print(f"\n  ✓ Etiquetas en el almacén: {total:,}")
+
+
+def actualizar_frecuencias():
+    """
+    Recalcula la frecuencia por causa desde siniestros.parquet.
+    Solo se leen las columnas necesarias.
+    """
+    print("=" * 70)
+    print("ACTUALIZACIÓN DE FRECUENCIAS POR CAUSA")
+    print("=" * 70)
+
+    df = pd.read_parquet(SINIESTROS_FILE, columns=['CAUSA', 'NUM_SINIESTROS'])
+    frecuencias = df.groupby('CAUSA', sort=False)['NUM_SINIESTROS'].sum()
+    print(f"\n  Causas únicas: {len(frecuencias):,}")
+
+    with conectar() as conn:
+        conn.execute("DELETE FROM frecuencias")
+        conn.executemany(
+            "INSERT INTO frecuencias (causa, frecuencia) VALUES (?, ?)",
+            ((c, float(f)) for c, f in frecuencias.items())
+        )
+    print(f"  ✓ Frecuencias guardadas en: {DB_FILE}")
+
+
+def exportar_training_set(ruta_salida: Path = LABELED_DIR / "training_set.csv") -> pd.DataFrame:
+    """
+    Exporta el training set con el mismo esquema que consolidate_training_set.py.
+    Si aún no hay frecuencias, las calcula antes (la columna frecuencia no puede
+    salir vacía).
+    """
+    with conectar() as conn:
+        sin_frecuencias = conn.execute("SELECT COUNT(*) FROM frecuencias").fetchone()[0] == 0
+    if sin_frecuencias:
+        if not SINIESTROS_FILE.exists():
+            print(f"ERROR: no hay frecuencias en el almacén ni existe {SINIESTROS_FILE}. "
+                  "Ejecute primero consolidate_data.py")
+            sys.exit(1)
+        actualizar_frecuencias()
+
+    with conectar() as conn:
+        df = pd.read_sql_query(EXPORT_TRAINING, conn)
+    df.to_csv(ruta_salida, index=False)
+    print(f"  ✓ Training set exportado: {ruta_salida} ({len(df):,} causas)")
+    return df
+
+
+def main():
+    comandos = {
+        'ingest': ingerir,
+        'frecuencias': actualizar_frecuencias,
+        'export': exportar_training_set,
+    }
+    comando = sys.argv[1] if len(sys.argv) > 1 else 'ingest'
+    if comando not in comandos:
+        print(f"ERROR: comando desconocido '{comando}'. Opciones: {', '.join(comandos)}")
+        sys.exit(1)
+    comandos[comando]()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+price_census.py
+Tarificación de colectivos a partir del censo de asegurados.
+
+Lee el censo (CSV o Parquet) por bloques, busca la prima de cada asegurado en la
+RateTable de forma vectorizada y acumula por grupo × banda de edad × nivel con
+np.bincount, sin materializar el censo completo en memoria.
+
+Columnas del censo:
+    edad     (obligatoria) edad cumplida, 25-70
+    grupo    (opcional) identificador del colectivo; si falta, todo es un grupo 'TOTAL'
+    sexo     (opcional) solo se usa si la tabla de primas tiene dimensión sexo
+    nivel    (opcional) nivel (1-3) en el que se tarifica al asegurado; si falta o es
+             nulo, el asegurado se tarifica en los tres niveles ponderados por --mezcla
+
+La prima de riesgo de un asegurado con cobertura completa es la suma de las primas
+de los tres niveles (mezcla 1,1,1, la opción por defecto). Por eso el detalle por
+nivel reporta exposición (asegurados ponderados por la mezcla) y el resumen por
+banda reporta el número de asegurados.
+
+Las celdas sin prima en la tabla (NaN: edad × nivel sin experiencia) no se tarifican
+en cero en silencio: su exposición se reporta en exposicion_sin_prima y, con
+--estricto, se detiene la tarificación.
+
+Uso:
+    python scripts/price_census.py censo.parquet
+    python scripts/price_census.py censo.csv --mezcla 1,1,0 --procesos 4
+    python scripts/price_census.py censo.csv --bloque 500000 --salida primas_colectivo.csv
+    python scripts/price_census.py censo.parquet --estricto
+
+Salida:
+    - outputs/tarificacion/primas_colectivo.csv          (grupo × banda × nivel)
+    - outputs/tarificacion/primas_colectivo_resumen.csv  (grupo × banda, asegurados)
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from calculate_tarificacion import (
+    EDAD_MIN, FACTOR_MENSUAL_2025, NIVEL_DESCRIPCION, BANDAS_EDAD, BANDA_POR_EDAD, ETIQUETAS_BANDA,
+)
+from rate_table import RateTable, TABLA_FILE, NIVELES
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "outputs" / "tarificacion"
+SALIDA_FILE = OUTPUT_DIR / "primas_colectivo.csv"
+RESUMEN_FILE = OUTPUT_DIR / "primas_colectivo_resumen.csv"
+
+TAMANO_BLOQUE = 1_000_000
+COLUMNAS_CENSO = ['grupo', 'edad', 'sexo', 'nivel']
+
+# Tabla de primas del proceso (se asigna una vez por proceso trabajador)
+_TABLA = None
+
+
+def _inicializar_trabajador(ruta_tabla: str):
+    global _TABLA
+    _TABLA = RateTable.cargar(ruta_tabla)
+
+
+# =============================================================================
+# LECTURA POR BLOQUES
+# =============================================================================
+
+def leer_censo(ruta: Path, tamano_bloque: int = TAMANO_BLOQUE):
+    """
+    Itera el censo por bloques de hasta tamano_bloque filas, leyendo solo
+    las columnas reconocidas.
+    """
+    ruta = Path(ruta)
+    if ruta.suffix.lower() == '.parquet':
+        archivo = pq.ParquetFile(ruta)
+        columnas = [c for c in COLUMNAS_CENSO if c in archivo.schema_arrow.names]
+        for lote in archivo.iter_batches(batch_size=tamano_bloque, columns=columnas):
+            yield lote.to_pandas()
+    else:
+        encabezado = pd.read_csv(ruta, nrows=0).columns
+        columnas = [c for c in COLUMNAS_CENSO if c in encabezado]
+        tipos = {'grupo': str, 'sexo': str}
+        yield from pd.read_csv(ruta, usecols=columnas, chunksize=tamano_bloque,
+                               dtype={c: t for c, t in tipos.items() if c in columnas})
+
+
+# =============================================================================
+# TARIFICACIÓN DE UN BLOQUE
+# =============================================================================
+
+def tarificar_bloque(bloque: pd.DataFrame, mezcla: np.ndarray, tabla: RateTable = None) -> tuple:
+    """
+    Tarifica un bloque del censo y lo agrega por grupo × banda × nivel.
+
+    Returns:
+        tuple: (grupos, asegurados, exposicion, prima_anual, sin_prima)
+            grupos      etiquetas de grupo presentes en el bloque
+            asegurados  float64 (n_grupos, n_bandas), número de asegurados
+            exposicion  float64 (n_grupos, n_bandas, NIVELES), asegurados ponderados
+                        por la mezcla de niveles
+            prima_anual float64 (n_grupos, n_bandas, NIVELES)
+            sin_prima   float64 (n_grupos, n_bandas, NIVELES), exposición en celdas
+                        sin prima en la tabla (no suma a prima_anual)
+    """
+    tabla = tabla if tabla is not None else _TABLA
+    n = len(bloque)
+    n_bandas = len(BANDAS_EDAD)
+
+    edades = bloque['edad'].to_numpy()
+    if 'grupo' in bloque.columns:
+        codigos_grupo, grupos = pd.factorize(bloque['grupo'].astype(str))
+    else:
+        codigos_grupo, grupos = np.zeros(n, dtype=np.int64), pd.Index(['TOTAL'])
+
+    dims = {}
+    if 'sexo' in tabla.dimensiones:
+        if 'sexo' not in bloque.columns:
+            raise ValueError("La tabla de primas tiene dimensión sexo y el censo no trae 'sexo'")
+        dims['sexo'] = bloque['sexo'].to_numpy()[:, None]
+
+    # Primas de cada asegurado en los tres niveles: (n, NIVELES), una sola indexación
+    niveles = np.arange(1, NIVELES + 1)
+    primas = tabla.primas_vector(edades[:, None], niveles[None, :], **dims)
+    nulas = np.isnan(primas)
+
+    # Peso de cada asegurado en cada nivel
+    if 'nivel' in bloque.columns:
+        nivel = bloque['nivel'].to_numpy(dtype='float64')
+        con_nivel = ~np.isnan(nivel)
+        if ((nivel[con_nivel] < 1) | (nivel[con_nivel] > NIVELES)).any():
+            raise ValueError(f"Niveles fuera de rango (1-{NIVELES}) en el censo")
+        pesos = np.where(con_nivel[:, None], 0.0, mezcla[None, :])
+        pesos[np.flatnonzero(con_nivel), nivel[con_nivel].astype(np.int64) - 1] = 1.0
+    else:
+        pesos = np.broadcast_to(mezcla, (n, NIVELES))
+
+    # Celda plana grupo × banda × nivel
+    banda = BANDA_POR_EDAD[edades.astype(np.int64) - EDAD_MIN]
+    celda = (codigos_grupo * n_bandas + banda)[:, None] * NIVELES + niveles[None, :] - 1
+    n_celdas = len(grupos) * n_bandas * NIVELES
+    forma = (len(grupos), n_bandas, NIVELES)
+
+    asegurados = np.bincount(codigos_grupo * n_bandas + banda, minlength=len(grupos) * n_bandas)
+    exposicion = np.bincount(celda.ravel(), weights=pesos.ravel(), minlength=n_celdas)
+    prima_anual = np.bincount(celda.ravel(), weights=np.where(nulas, 0.0, pesos * primas).ravel(),
+                              minlength=n_celdas)
+    sin_prima = np.bincount(celda.ravel(), weights=np.where(nulas, pesos, 0.0).ravel(),
+                            minlength=n_celdas)
+    return (list(grupos), asegurados.reshape(forma[:2]).astype('float64'),
+            exposicion.reshape(forma), prima_anual.reshape(forma), sin_prima.reshape(forma))
+
+
+# =============================================================================
+# ACUMULACIÓN Y EJECUCIÓN
+# =============================================================================
+
+class _Acumulador:
+    """Suma parciales por grupo; los grupos nuevos se agregan al final."""
+
+    def __init__(self):
+        self.grupos = []
+        self.posicion = {}
+        self.asegurados = np.zeros((0, len(BANDAS_EDAD)))
+        forma = (0, len(BANDAS_EDAD), NIVELES)
+        self.exposicion = np.zeros(forma)
+        self.prima_anual = np.zeros(forma)
+        self.sin_prima = np.zeros(forma)
+
+    def agregar(self, grupos: list, asegurados: np.ndarray, exposicion: np.ndarray,
+                prima_anual: np.ndarray, sin_prima: np.ndarray):
+        nuevos = [g for g in grupos if g not in self.posicion]
+        if nuevos:
+            for g in nuevos:
+                self.posicion[g] = len(self.grupos)
+                self.grupos.append(g)
+            extra = np.zeros((len(nuevos), len(BANDAS_EDAD), NIVELES))
+            self.asegurados = np.concatenate([self.asegurados, extra[:, :, 0]])
+            self.exposicion = np.concatenate([self.exposicion, extra])
+            self.prima_anual = np.concatenate([self.prima_anual, extra])
+            self.sin_prima = np.concatenate([self.sin_prima, extra])
+        indices = np.array([self.posicion[g] for g in grupos], dtype=np.int64)
+        np.add.at(self.asegurados, indices, asegurados)
+        np.add.at(self.exposicion, indices, exposicion)
+        np.add.at(self.prima_anual, indices, prima_anual)
+        np.add.at(self.sin_prima, indices, sin_prima)
+
+    def a_dataframe(self) -> pd.DataFrame:
+        """Filas grupo × banda × nivel con exposición > 0."""
+        g, b, n = np.meshgrid(np.arange(len(self.grupos)), np.arange(len(BANDAS_EDAD)),
+                              np.arange(NIVELES), indexing='ij')
+        df = pd.DataFrame({
+            'grupo': np.array(self.grupos, dtype=object)[g.ravel()],
+            'banda_edad': np.array(ETIQUETAS_BANDA)[b.ravel()],
+            'nivel': n.ravel() + 1,
+            'exposicion': self.exposicion.ravel(),
+            'exposicion_sin_prima': self.sin_prima.ravel(),
+            'prima_anual': self.prima_anual.ravel(),
+        })
+        df = df[df['exposicion'] > 0].reset_index(drop=True)
+        df['descripcion'] = df['nivel'].map(NIVEL_DESCRIPCION)
+        # Prima promedio sobre la exposición con prima en la tabla
+        con_prima = df['exposicion'] - df['exposicion_sin_prima']
+        df['prima_promedio'] = df['prima_anual'] / con_prima.where(con_prima > 0)
+        df['prima_mensual'] = df['prima_anual'] * FACTOR_MENSUAL_2025
+        return df[['grupo', 'banda_edad', 'nivel', 'descripcion', 'exposicion',
+                   'exposicion_sin_prima', 'prima_anual', 'prima_mensual', 'prima_promedio']]
+
+    def a_resumen(self) -> pd.DataFrame:
+        """Filas grupo × banda con el número de asegurados y la prima por asegurado."""
+        g, b = np.meshgrid(np.arange(len(self.grupos)), np.arange(len(BANDAS_EDAD)),
+                           indexing='ij')
+        df = pd.DataFrame({
+            'grupo': np.array(self.grupos, dtype=object)[g.ravel()],
+            'banda_edad': np.array(ETIQUETAS_BANDA)[b.ravel()],
+            'asegurados': self.asegurados.ravel().astype(np.int64),
+            'exposicion_sin_prima': self.sin_prima.sum(axis=2).ravel(),
+            'prima_anual': self.prima_anual.sum(axis=2).ravel(),
+        })
+        df = df[df['asegurados'] > 0].reset_index(drop=True)
+        df['prima_por_asegurado'] = df['prima_anual'] / df['asegurados']
+        df['prima_mensual'] = df['prima_anual'] * FACTOR_MENSUAL_2025
+        return df
+
+
+def tarificar_censo(ruta: Path, mezcla=(1.0, 1.0, 1.0), tamano_bloque: int = TAMANO_BLOQUE,
+                    procesos: int = 1, ruta_tabla: Path = TABLA_FILE) -> tuple:
+    """
+    Tarifica el censo completo.
+
+    Con procesos > 1 los bloques se reparten entre procesos trabajadores; el proceso
+    principal solo lee y acumula, con a lo más 2 × procesos bloques en vuelo.
+
+    Returns:
+        tuple: (DataFrame grupo × banda × nivel, DataFrame grupo × banda, filas procesadas)
+    """
+    mezcla = np.asarray(mezcla, dtype='float64')
+    acumulador = _Acumulador()
+    filas = 0
+
+    if procesos <= 1:
+        tabla = RateTable.cargar(ruta_tabla)
+        for bloque in leer_censo(ruta, tamano_bloque):
+            acumulador.agregar(*tarificar_bloque(bloque, mezcla, tabla))
+            filas += len(bloque)
+        return acumulador.a_dataframe(), acumulador.a_resumen(), filas
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador,
+                             initargs=(str(ruta_tabla),)) as pool:
+        en_vuelo = []
+        for bloque in leer_censo(ruta, tamano_bloque):
+            filas += len(bloque)
+            en_vuelo.append(pool.submit(tarificar_bloque, bloque, mezcla))
+            if len(en_vuelo) >= 2 * procesos:
+                acumulador.agregar(*en_vuelo.pop(0).result())
+        for futuro in en_vuelo:
+            acumulador.agregar(*futuro.result())
+    return acumulador.a_dataframe(), acumulador.a_resumen(), filas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tarificación de colectivos por censo")
+    parser.add_argument('censo', type=Path, help="Censo de asegurados (.csv o .parquet)")
+    parser.add_argument('--mezcla', default='1,1,1',
+                        help="Peso por nivel para asegurados sin nivel (default: 1,1,1)")
+    parser.add_argument('--bloque', type=int, default=TAMANO_BLOQUE, help="Filas por bloque")
+    parser.add_argument('--procesos', type=int, default=1, help="Procesos trabajadores")
+    parser.add_argument('--tabla', type=Path, default=TABLA_FILE, help="RateTable (.npz)")
+    parser.add_argument('--salida', type=Path, default=SALIDA_FILE)
+    parser.add_argument('--resumen', type=Path, default=RESUMEN_FILE)
+    parser.add_argument('--estricto', action='store_true',
+                        help="Falla si algún asegurado cae en una celda sin prima en la tabla")
+    args = parser.parse_args()
+
+    mezcla = [float(x) for x in args.mezcla.split(',')]
+    if len(mezcla) != NIVELES:
+        parser.error(f"--mezcla debe tener {NIVELES} valores")
+
+    print("=" * 70)
+    print("TARIFICACIÓN DE COLECTIVO POR CENSO")
+    print("=" * 70)
+    print(f"  Censo: {args.censo}")
+    print(f"  Mezcla de niveles: {mezcla}")
+    print(f"  Bloque: {args.bloque:,} filas | Procesos: {args.procesos}")
+
+    inicio = time.perf_counter()
+    resultado, resumen, filas = tarificar_censo(args.censo, mezcla, args.bloque, args.procesos,
+                                                args.tabla)
+    segundos = time.perf_counter() - inicio
+
+    sin_prima = resultado['exposicion_sin_prima'] > 0
+    if sin_prima.any():
+        print(f"\n  ⚠ {sin_prima.sum():,} celdas grupo × banda × nivel con exposición sin prima "
+              f"en la tabla ({resultado.loc[sin_prima, 'exposicion_sin_prima'].sum():,.1f} "
+              f"de exposición no tarificada)")
+        if args.estricto:
+            print("ERROR: --estricto y hay asegurados en celdas sin prima; revisa la tabla")
+            sys.exit(1)
+
+    args.salida.parent.mkdir(parents=True, exist_ok=True)
+    resultado.to_csv(args.salida, index=False)
+    args.resumen.parent.mkdir(parents=True, exist_ok=True)
+    resumen.to_csv(args.resumen, index=False)
+
+    print(f"\n  Asegurados tarificados: {filas:,}")
+    print(f"  Exposición (ponderada por la mezcla): {resultado['exposicion'].sum():,.1f}")
+    print(f"  Grupos: {resultado['grupo'].nunique():,}")
+    print(f"  Prima anual total: ${resultado['prima_anual'].sum():,.2f}")
+    print(f"  Tiempo: {segundos:.2f} s ({filas / max(segundos, 1e-9):,.0f} asegurados/s)")
+    print(f"  ✓ {args.salida}")
+    print(f"  ✓ {args.resumen}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+"""
+query_api.py
+API HTTP local de consultas agregadas sobre los siniestros consolidados.
+
+Carga siniestros.parquet una sola vez, lo reduce al grano
+ANIO × EDAD × SEXO × ENTIDAD × TIPO_SEGURO × NIVEL × CAUSA (edades 25-70, monto
+ajustado a pesos del año base) y lo guarda en columnas: cada dimensión como
+códigos enteros más su diccionario y cada medida como un arreglo. Una consulta
+es una máscara sobre los códigos y un np.bincount por grupo; no se vuelve a leer
+el parquet ni se arma un DataFrame por consulta.
+
+Convenciones: se incluyen todas las filas (también montos negativos, como los
+totales del dashboard) y NIVEL = 0 marca las causas sin clasificar.
+
+Endpoints (GET):
+    /api/siniestros     Agregado con filtros:
+                          agrupar=anio,nivel       dimensiones del resultado
+                          anio=2023,2024  edad=30-45  nivel=2,3
+                          sexo=Femenino  entidad=...  tipo_seguro=...  causa=...
+                                                   (texto: repetir el parámetro para
+                                                   varios valores; las causas llevan comas)
+                          causa_contiene=diabetes  (sin acentos ni mayúsculas)
+                          ordenar=-monto_ajustado  limite=100
+    /api/dimensiones    Valores de cada dimensión
+    /api/salud          Filas cargadas y estado del cache
+
+Cada respuesta lleva ETag (If-None-Match → 304), Server-Timing con la duración
+de la consulta, X-Cache (HIT/MISS del cache LRU de respuestas) y encabezados
+CORS para que las páginas de Next.js la llamen desde el navegador.
+
+Uso:
+    python scripts/query_api.py                    # http://127.0.0.1:8000
+    python scripts/query_api.py --puerto 8080 --cache 512
+    curl "http://127.0.0.1:8000/api/siniestros?agrupar=anio,nivel&sexo=Femenino"
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from calculate_tarificacion import EDAD_MIN, EDAD_MAX, INFLACION_MEDICA
+from causa_catalog import mapear_nivel
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+SINIESTROS_FILE = BASE_DIR / "data" / "consolidated" / "siniestros.parquet"
+CLASIFICACION_FILE = BASE_DIR / "data" / "classified" / "all_causes_classified.csv"
+
+# Dimensiones consultables: nombre en la API → columna del parquet
+DIMENSIONES = {
+    'anio': 'ANIO',
+    'edad': 'EDAD',
+    'sexo': 'SEXO',
+    'entidad': 'ENTIDAD',
+    'tipo_seguro': 'TIPO DE SEGURO',
+    'nivel': 'NIVEL',
+    'causa': 'CAUSA',
+}
+NUMERICAS = {'anio', 'edad', 'nivel'}
+MEDIDAS = ['filas', 'num_siniestros', 'monto_pagado', 'monto_ajustado']
+
+LIMITE_DEFECTO = 1000
+LIMITE_MAXIMO = 10000
+
+
+# =============================================================================
+# ALMACÉN COLUMNAR
+# =============================================================================
+
+def _normalizar(texto: str) -> str:
+    """Minúsculas sin acentos, para causa_contiene."""
+    texto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in texto if not unicodedata.combining(c)).lower()
+
+
+class AlmacenConsultas:
+    """
+    Siniestros agregados al grano de todas las dimensiones, en columnas.
+
+    Atributos:
+        codigos: {dimension: arreglo de códigos (una entrada por celda)}
+        valores: {dimension: arreglo de valores distintos (diccionario)}
+        medidas: {medida: arreglo por celda}
+    """
+
+    def __init__(self, codigos: dict, valores: dict, medidas: dict):
+        self.codigos = codigos
+        self.valores = valores
+        self.medidas = medidas
+        self.celdas = len(next(iter(medidas.values())))
+        self._causas_normalizadas = np.array([_normalizar(str(c)) for c in valores['causa']])
+
+    @classmethod
+    def desde_parquet(cls, ruta: Path = SINIESTROS_FILE, ruta_clasificacion: Path = CLASIFICACION_FILE):
+        """Lee las columnas necesarias, asigna nivel e inflación y agrega al grano completo."""
+        columnas = [c for c in DIMENSIONES.values() if c != 'NIVEL'] + ['NUM_SINIESTROS', 'MONTO_PAGADO']
+        if 'CAUSA_ID' in pq.read_schema(ruta).names:
+            columnas.append('CAUSA_ID')
+        df = pd.read_parquet(ruta, columns=columnas)
+        df = df[(df['EDAD'] >= EDAD_MIN) & (df['EDAD'] <= EDAD_MAX)]
+
+        nivel = mapear_nivel(df, pd.read_csv(ruta_clasificacion))
+        df = df.assign(
+            NIVEL=nivel.fillna(0).astype('int8'),
+            MONTO_AJUSTADO=df['MONTO_PAGADO'] * df['ANIO'].map(INFLACION_MEDICA),
+            FILAS=1,
+        )
+
+        agrupado = df.groupby(list(DIMENSIONES.values()), dropna=False, observed=True, sort=False)[
+            ['FILAS', 'NUM_SINIESTROS', 'MONTO_PAGADO', 'MONTO_AJUSTADO']].sum().reset_index()
+
+        codigos, valores = {}, {}
+        for nombre, columna in DIMENSIONES.items():
+            codigo, distintos = pd.factorize(agrupado[columna], sort=True, use_na_sentinel=False)
+            codigos[nombre] = codigo.astype('int32')
+            valores[nombre] = np.asarray(distintos, dtype=object)
+        medidas = {m: agrupado[m.upper()].to_numpy() for m in MEDIDAS}
+        return cls(codigos, valores, medidas)
+
+    # -------------------------------------------------------------------------
+
+    def _permitidos(self, dimension: str, filtro: list) -> np.ndarray:
+        """Arreglo booleano sobre el diccionario de la dimensión con los valores aceptados."""
+        valores = self.valores[dimension]
+        permitido = np.zeros(len(valores), dtype=bool)
+        if dimension in NUMERICAS:
+            numeros = np.array([np.nan if v is None else v for v in valores], dtype=float)
+            for condicion in filtro:
+                for parte in condicion.split(','):
+                    inicio, _, fin = parte.partition('-')
+                    try:
+                        inicio = float(inicio)
+                        fin = float(fin) if fin else inicio
+                    except ValueError:
+                        raise ValueError(f"Valor no numérico para {dimension}: {parte!r}")
+                    permitido |= (numeros >= inicio) & (numeros <= fin)
+        else:
+            aceptados = set(filtro)
+            permitido[:] = [str(v) in aceptados for v in valores]
+        return permitido
+
+    def consultar(self, agrupar: list, filtros: dict, causa_contiene: str = None,
+                  ordenar: str = None, limite: int = LIMITE_DEFECTO) -> dict:
+        """
+        Agrega las medidas por las dimensiones de `agrupar` sobre las celdas que
+        cumplen todos los filtros ({dimension: [valores]}).
+        """
+        for dimension in list(agrupar) + list(filtros):
+            if dimension not in DIMENSIONES:
+                raise ValueError(f"Dimensión desconocida: {dimension!r} (válidas: {', '.join(DIMENSIONES)})")
+
+        mascara = np.ones(self.celdas, dtype=bool)
+        for dimension, filtro in filtros.items():
+            mascara &= self._permitidos(dimension, filtro)[self.codigos[dimension]]
+        if causa_contiene:
+            contiene = np.char.find(self._causas_normalizadas, _normalizar(causa_contiene)) >= 0
+            mascara &= contiene[self.codigos['causa']]
+        seleccion = np.flatnonzero(mascara)
+
+        # Un solo código por grupo y una suma ponderada por medida
+        forma = tuple(len(self.valores[d]) for d in agrupar)
+        if agrupar:
+            clave = np.ravel_multi_index(tuple(self.codigos[d][seleccion] for d in agrupar), forma)
+            grupos, inverso = np.unique(clave, return_inverse=True)
+        else:
+            grupos, inverso = np.zeros(1 if len(seleccion) else 0, dtype=np.int64), np.zeros(len(seleccion), dtype=np.int64)
+        sumas = {m: np.bincount(inverso, weights=self.medidas[m][seleccion], minlength=len(grupos))
+                 for m in MEDIDAS}
+
+        tabla = pd.DataFrame({
+            d: self.valores[d][indices]
+            for d, indices in zip(agrupar, np.unravel_index(grupos, forma) if agrupar else [])
+        })
+        for m in MEDIDAS:
+            tabla[m] = sumas[m]
+        tabla['filas'] = tabla['filas'].astype('int64')
+        tabla['num_siniestros'] = tabla['num_siniestros'].astype('int64')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tabla['severidad'] = np.where(tabla['num_siniestros'] > 0,
+                                          tabla['monto_ajustado'] / tabla['num_siniestros'], np.nan)
+
+        if ordenar:
+            columna = ordenar.lstrip('-')
+            if columna not in tabla.columns:
+                raise ValueError(f"No se puede ordenar por {columna!r}")
+            tabla = tabla.sort_values(columna, ascending=not ordenar.startswith('-'), kind='stable')
+
+        limite = max(0, min(int(limite), LIMITE_MAXIMO))
+        filas = json.loads(tabla.head(limite).to_json(orient='records', force_ascii=False))
+        return {
+            'agrupar': list(agrupar),
+            'filtros': filtros,
+            'causa_contiene': causa_contiene,
+            'grupos': len(tabla),
+            'devueltos': len(filas),
+            'filas': filas,
+        }
+
+    def dimensiones(self) -> dict:
+        """Valores distintos de cada dimensión."""
+        return {d: [None if pd.isna(v) else v.item() if hasattr(v, 'item') else v for v in self.valores[d]]
+                for d in DIMENSIONES}
+
+
+# =============================================================================
+# CACHE Y SERVIDOR
+# =============================================================================
+
+class CacheLRU:
+    """Cache LRU de respuestas (cuerpo y ETag) seguro entre hilos."""
+
+    def __init__(self, capacidad: int):
+        self.capacidad = capacidad
+        self._datos = OrderedDict()
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        with self._candado:
+            if clave not in self._datos:
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return self._datos[clave]
+
+    def guardar(self, clave, valor):
+        with self._candado:
+            self._datos[clave] = valor
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.capacidad:
+                self._datos.popitem(last=False)
+
+    def estado(self) -> dict:
+        with self._candado:
+            return {'entradas': len(self._datos), 'capacidad': self.capacidad,
+                    'aciertos': self.aciertos, 'fallos': self.fallos}
+
+
+def responder_consulta(almacen: AlmacenConsultas, ruta: str, parametros: dict) -> dict:
+    """Resuelve una ruta de la API (ValueError → 400, KeyError → 404)."""
+    if ruta == '/api/siniestros':
+        filtros = {k: v for k, v in parametros.items() if k in DIMENSIONES}
+        desconocidos = set(parametros) - set(DIMENSIONES) - {'agrupar', 'causa_contiene', 'ordenar', 'limite'}
+        if desconocidos:
+            raise ValueError(f"Parámetros desconocidos: {', '.join(sorted(desconocidos))}")
+        agrupar = [d for d in parametros.get('agrupar', [''])[-1].split(',') if d]
+        return almacen.consultar(
+            agrupar, filtros,
+            causa_contiene=parametros.get('causa_contiene', [None])[-1],
+            ordenar=parametros.get('ordenar', [None])[-1],
+            limite=parametros.get('limite', [LIMITE_DEFECTO])[-1],
+        )
+    if ruta == '/api/dimensiones':
+        return almacen.dimensiones()
+    raise KeyError(ruta)
+
+
+def crear_manejador(almacen: AlmacenConsultas, cache: CacheLRU, origen: str):
+    """Clase de manejador HTTP ligada al almacén y al cache."""
+
+    class Manejador(BaseHTTPRequestHandler):
+        server_version = 'gmm-consultas/1.0'
+
+        def _encabezados_cors(self):
+            self.send_header('Access-Control-Allow-Origin', origen)
+            self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+            self.send_header('Access-Control-Allow-Headers', 'If-None-Match')
+            self.send_header('Access-Control-Expose-Headers', 'ETag, Server-Timing, X-Cache')
+
+        def _enviar(self, estado: int, cuerpo: bytes = b'', etag: str = None,
+                    duracion_ms: float = None, cache_estado: str = None):
+            self.send_response(estado)
+            self._encabezados_cors()
+            if etag:
+                self.send_header('ETag', etag)
+                self.send_header('Cache-Control', 'no-cache')
+            if duracion_ms is not None:
+                self.send_header('Server-Timing', f'consulta;dur={duracion_ms:.2f}')
+            if cache_estado:
+                self.send_header('X-Cache', cache_estado)
+            if cuerpo:
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(cuerpo)))
+            self.end_headers()
+            if cuerpo and self.command != 'HEAD':
+                self.wfile.write(cuerpo)
+
+        def _error(self, estado: int, mensaje: str):
+            cuerpo = json.dumps({'error': mensaje}, ensure_ascii=False).encode('utf-8')
+            self._enviar(estado, cuerpo)
+
+        def do_OPTIONS(self):
+            self._enviar(204)
+
+        def do_GET(self):
+            inicio = time.perf_counter()
+            partes = urlsplit(self.path)
+            ruta = partes.path.rstrip('/')
+
+            if ruta == '/api/salud':
+                cuerpo = json.dumps({'celdas': almacen.celdas, 'cache': cache.estado()}).encode('utf-8')
+                return self._enviar(200, cuerpo)
+
+            parametros = parse_qs(partes.query)
+            clave = (ruta, tuple(sorted((k, tuple(v)) for k, v in parametros.items())))
+            guardado = cache.obtener(clave)
+            cache_estado = 'HIT' if guardado else 'MISS'
+            if guardado is None:
+                try:
+                    resultado = responder_consulta(almacen, ruta, parametros)
+                except KeyError:
+                    return self._error(404, f"Ruta desconocida: {ruta}")
+                except ValueError as error:
+                    return self._error(400, str(error))
+                cuerpo = json.dumps(resultado, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                guardado = (cuerpo, f'"{hashlib.sha1(cuerpo).hexdigest()[:20]}"')
+                cache.guardar(clave, guardado)
+
+            cuerpo, etag = guardado
+            duracion = (time.perf_counter() - inicio) * 1000
+            if etag in self.headers.get('If-None-Match', ''):
+                return self._enviar(304, etag=etag, duracion_ms=duracion, cache_estado=cache_estado)
+            self._enviar(200, cuerpo, etag=etag, duracion_ms=duracion, cache_estado=cache_estado)
+
+        do_HEAD = do_GET
+
+        def log_message(self, formato, *args):
+            print(f"  {self.address_string()} {formato % args}")
+
+    return Manejador
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API local de consultas agregadas de siniestros")
+    parser.add_argument('--host', default='127.0.0.1', help="Interfaz (por defecto solo localhost)")
+    parser.add_argument('--puerto', type=int, default=8000)
+    parser.add_argument('--cache', type=int, default=256, help="Respuestas en el cache LRU")
+    parser.add_argument('--origen', default='*', help="Access-Control-Allow-Origin")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("API DE CONSULTAS DE SINIESTROS")
+    print("=" * 70)
+
+    print("\n[1/2] Cargando siniestros consolidados...")
+    inicio = time.perf_counter()
+    almacen = AlmacenConsultas.desde_parquet()
+    memoria = sum(a.nbytes for a in list(almacen.codigos.values()) + list(almacen.medidas.values()))
+    print(f"  ✓ {almacen.celdas:,} celdas ({memoria / 1e6:.1f} MB en columnas) "
+          f"en {time.perf_counter() - inicio:.1f} s")
+
+    print("\n[2/2] Iniciando servidor...")
+    servidor = ThreadingHTTPServer((args.host, args.puerto),
+                                   crear_manejador(almacen, CacheLRU(args.cache), args.origen))
+    print(f"  ✓ Escuchando en http://{args.host}:{args.puerto}/api/siniestros (Ctrl+C para salir)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n  ✓ Servidor detenido")
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
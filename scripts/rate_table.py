@@ -0,0 +1,246 @@
+"""
+rate_table.py
+Tabla de primas en memoria con búsquedas de costo constante.
+
+La matriz nivel × edad (primas_por_nivel_edad.csv) se convierte en arreglos densos
+de NumPy indexados por [dimensiones..., edad - EDAD_MIN, nivel - 1]. Cotizar deja de
+ser releer el CSV y filtrar con pandas: una búsqueda es una indexación directa y
+un arreglo de edades se cotiza con una sola indexación vectorizada.
+
+Dimensiones opcionales (p. ej. sexo) se agregan como ejes adicionales al frente:
+
+    tabla = RateTable.desde_matriz(matriz, dimensiones=['sexo'])
+    tabla.prima(35, 2, sexo='F')
+
+Uso:
+    python scripts/rate_table.py                 # Construye la tabla desde el CSV
+    python scripts/rate_table.py 35 2            # Cotiza edad 35, nivel 2
+
+Salida:
+    - outputs/tarificacion/tabla_primas.npz
+"""
+
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from calculate_tarificacion import EDAD_MIN, EDAD_MAX, FACTOR_MENSUAL_2025
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "outputs" / "tarificacion"
+MATRIZ_FILE = OUTPUT_DIR / "primas_por_nivel_edad.csv"
+TABLA_FILE = OUTPUT_DIR / "tabla_primas.npz"
+
+NIVELES = 3
+
+
+class RateTable:
+    """
+    Primas de riesgo anuales en un arreglo denso.
+
+    Atributos:
+        primas       float64, forma (*dims, n_edades, NIVELES); NaN si la celda no tiene datos
+        credible     bool, misma forma que primas
+        edad_min     edad del primer renglón del eje de edades
+        dimensiones  dict nombre → tupla de valores, en el orden de los ejes iniciales
+    """
+
+    def __init__(self, primas: np.ndarray, credible: np.ndarray = None,
+                 edad_min: int = EDAD_MIN, dimensiones: dict = None):
+        self.primas = np.asarray(primas, dtype='float64')
+        self.credible = (np.zeros(self.primas.shape, dtype=bool) if credible is None
+                         else np.asarray(credible, dtype=bool))
+        self.edad_min = int(edad_min)
+        self.dimensiones = {k: tuple(v) for k, v in (dimensiones or {}).items()}
+
+        if self.primas.ndim != len(self.dimensiones) + 2 or self.primas.shape[-1] != NIVELES:
+            raise ValueError(
+                f"Forma {self.primas.shape} incompatible con dimensiones "
+                f"{list(self.dimensiones)} + (edad, nivel)"
+            )
+        if self.credible.shape != self.primas.shape:
+            raise ValueError("credible debe tener la misma forma que primas")
+
+        # Índices de cada dimensión para búsquedas escalares (dict) y vectorizadas (Index)
+        self._posiciones = {k: {v: i for i, v in enumerate(vals)}
+                            for k, vals in self.dimensiones.items()}
+        self._indices = {k: pd.Index(vals) for k, vals in self.dimensiones.items()}
+
+    @property
+    def edad_max(self) -> int:
+        return self.edad_min + self.primas.shape[-2] - 1
+
+    def __repr__(self):
+        dims = ''.join(f", {k}={len(v)}" for k, v in self.dimensiones.items())
+        return f"RateTable(edades={self.edad_min}-{self.edad_max}, niveles={NIVELES}{dims})"
+
+    # -------------------------------------------------------------------------
+    # Construcción y persistencia
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def desde_matriz(cls, matriz: pd.DataFrame, columna: str = 'prima_riesgo',
+                     dimensiones: list = None) -> 'RateTable':
+        """
+        Construye la tabla a partir de la matriz de generar_primas_por_nivel_edad()
+        (columnas edad, nivel, columna y, opcionalmente, credible y las dimensiones).
+        """
+        dimensiones = dimensiones or []
+        edades = matriz['edad'].to_numpy().astype(int)
+        edad_min = min(int(edades.min()), EDAD_MIN)
+        edad_max = max(int(edades.max()), EDAD_MAX)
+
+        valores_dim = {}
+        ejes = []
+        for dim in dimensiones:
+            codigos, valores = pd.factorize(matriz[dim], sort=True)
+            valores_dim[dim] = valores.tolist()
+            ejes.append(codigos)
+        forma = tuple(len(v) for v in valores_dim.values()) + (edad_max - edad_min + 1, NIVELES)
+
+        posicion = tuple(ejes) + (edades - edad_min, matriz['nivel'].to_numpy().astype(int) - 1)
+        primas = np.full(forma, np.nan)
+        primas[posicion] = matriz[columna].to_numpy(dtype='float64')
+        credible = np.zeros(forma, dtype=bool)
+        if 'credible' in matriz.columns:
+            credible[posicion] = matriz['credible'].fillna(False).to_numpy(dtype=bool)
+
+        return cls(primas, credible, edad_min, valores_dim)
+
+    @classmethod
+    def desde_csv(cls, ruta: Path = MATRIZ_FILE, **kwargs) -> 'RateTable':
+        return cls.desde_matriz(pd.read_csv(ruta), **kwargs)
+
+    def guardar(self, ruta: Path = TABLA_FILE):
+        """
+        Guarda la tabla en un .npz comprimido (sin pickle). Cada dimensión conserva
+        su tipo (p. ej. anio entero), y al terminar se verifica que la tabla
+        cargada sea idéntica a la guardada.
+        """
+        ruta = Path(ruta)
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        arreglos = {
+            'primas': self.primas,
+            'credible': self.credible,
+            'edad_min': np.array(self.edad_min),
+            'dimensiones': np.array(list(self.dimensiones), dtype=str),
+        }
+        for k, vals in self.dimensiones.items():
+            valores = np.asarray(vals)
+            if valores.dtype.kind == 'O' or (valores.dtype.kind == 'U'
+                                             and not all(isinstance(v, str) for v in vals)):
+                raise ValueError(f"La dimensión '{k}' mezcla tipos; no se puede guardar sin pickle")
+            arreglos[f'dim_{k}'] = valores
+        np.savez_compressed(ruta, **arreglos)
+
+        cargada = RateTable.cargar(ruta)
+        if (cargada.dimensiones != self.dimensiones
+                or not np.array_equal(cargada.primas, self.primas, equal_nan=True)
+                or not np.array_equal(cargada.credible, self.credible)
+                or cargada.edad_min != self.edad_min):
+            raise ValueError(f"La tabla guardada en {ruta} no coincide al cargarla")
+
+    @classmethod
+    def cargar(cls, ruta: Path = TABLA_FILE) -> 'RateTable':
+        with np.load(ruta, allow_pickle=False) as z:
+            # tolist() devuelve int/float/str de Python según el tipo guardado
+            dimensiones = {k: z[f'dim_{k}'].tolist() for k in z['dimensiones'].tolist()}
+            return cls(z['primas'], z['credible'], int(z['edad_min']), dimensiones)
+
+    # -------------------------------------------------------------------------
+    # Búsquedas
+    # -------------------------------------------------------------------------
+
+    def _posicion(self, edad: int, nivel: int, dims: dict) -> tuple:
+        """Índice escalar (con validación de rango) de una celda."""
+        i_edad = int(edad) - self.edad_min
+        if not 0 <= i_edad < self.primas.shape[-2]:
+            raise ValueError(f"Edad {edad} fuera de rango ({self.edad_min}-{self.edad_max})")
+        if not 1 <= int(nivel) <= NIVELES:
+            raise ValueError(f"Nivel {nivel} fuera de rango (1-{NIVELES})")
+
+        posicion = []
+        for k in self.dimensiones:
+            if k not in dims:
+                raise ValueError(f"Falta la dimensión '{k}'")
+            if dims[k] not in self._posiciones[k]:
+                raise ValueError(f"Valor '{dims[k]}' no existe en la dimensión '{k}'")
+            posicion.append(self._posiciones[k][dims[k]])
+        return tuple(posicion) + (i_edad, int(nivel) - 1)
+
+    def _posiciones_vector(self, edades, niveles, dims: dict) -> tuple:
+        """Índices vectorizados; los rangos se validan en un solo paso por eje."""
+        i_edad = np.asarray(edades).astype(np.int64) - self.edad_min
+        fuera = (i_edad < 0) | (i_edad >= self.primas.shape[-2])
+        if fuera.any():
+            invalidas = np.unique(np.asarray(edades)[fuera])
+            raise ValueError(
+                f"{int(fuera.sum()):,} edades fuera de rango ({self.edad_min}-{self.edad_max}): "
+                f"{invalidas[:10].tolist()}"
+            )
+        i_nivel = np.asarray(niveles).astype(np.int64) - 1
+        if ((i_nivel < 0) | (i_nivel >= NIVELES)).any():
+            raise ValueError(f"Niveles fuera de rango (1-{NIVELES})")
+
+        posicion = []
+        for k in self.dimensiones:
+            if k not in dims:
+                raise ValueError(f"Falta la dimensión '{k}'")
+            valores = np.asarray(dims[k])
+            codigos = self._indices[k].get_indexer(valores.ravel()).reshape(valores.shape)
+            if (codigos < 0).any():
+                desconocidos = pd.unique(valores[codigos < 0])[:10].tolist()
+                raise ValueError(f"Valores no existentes en la dimensión '{k}': {desconocidos}")
+            posicion.append(codigos)
+        return tuple(posicion) + (i_edad, i_nivel)
+
+    def prima(self, edad: int, nivel: int, **dims) -> float:
+        """Prima de riesgo anual de una celda (NaN si no hay datos)."""
+        return float(self.primas[self._posicion(edad, nivel, dims)])
+
+    def prima_mensual(self, edad: int, nivel: int, **dims) -> float:
+        """Prima mensual con el factor de descuento 2025."""
+        return self.prima(edad, nivel, **dims) * FACTOR_MENSUAL_2025
+
+    def es_credible(self, edad: int, nivel: int, **dims) -> bool:
+        return bool(self.credible[self._posicion(edad, nivel, dims)])
+
+    def primas_vector(self, edades, niveles, **dims) -> np.ndarray:
+        """
+        Primas anuales para arreglos de edades y niveles (y de valores de cada
+        dimensión), con broadcasting de NumPy entre ellos.
+        """
+        return self.primas[self._posiciones_vector(edades, niveles, dims)]
+
+    def primas_mensuales_vector(self, edades, niveles, **dims) -> np.ndarray:
+        return self.primas_vector(edades, niveles, **dims) * FACTOR_MENSUAL_2025
+
+
+def main():
+    if len(sys.argv) >= 3:
+        tabla = RateTable.cargar() if TABLA_FILE.exists() else RateTable.desde_csv()
+        edad, nivel = int(sys.argv[1]), int(sys.argv[2])
+        try:
+            anual = tabla.prima(edad, nivel)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+        print(f"Edad {edad}, nivel {nivel}:")
+        print(f"  Prima anual:   ${anual:,.2f}")
+        print(f"  Prima mensual: ${anual * FACTOR_MENSUAL_2025:,.2f}")
+        print(f"  Credible:      {'Sí' if tabla.es_credible(edad, nivel) else 'No'}")
+        return
+
+    print("=" * 70)
+    print("CONSTRUCCIÓN DE TABLA DE PRIMAS")
+    print("=" * 70)
+    tabla = RateTable.desde_csv()
+    tabla.guardar()
+    print(f"  {tabla}")
+    print(f"  ✓ Guardada: {TABLA_FILE} ({TABLA_FILE.stat().st_size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
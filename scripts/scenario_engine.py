@@ -0,0 +1,295 @@
+"""
+scenario_engine.py
+Motor de escenarios de sensibilidad para la tarificación.
+
+Evalúa miles de juegos de parámetros (inflación médica, tasa de descuento, mínimo
+de credibilidad, gastos y utilidad) sobre todas las celdas edad × nivel en un solo
+cálculo vectorizado de NumPy. Parte de los arreglos por año del cubo pre-agregado
+(build_cube.arreglos_por_anio), de modo que ningún escenario vuelve a tocar los
+siniestros fila por fila:
+
+    monto_ajustado[k, e, n] = Σ_y factor[k, y] × monto_pagado[y, e, n]   (un producto matricial)
+    prima_riesgo[k, e, n]   = frecuencia[e, n] × severidad[k, e, n]
+    prima_tarifa[k, e, n]   = prima_riesgo[k, e, n] / (1 - gastos[k] - utilidad[k])
+
+Parámetros por escenario (columnas del CSV de escenarios; las faltantes toman el valor base):
+    inflacion_anual     tasa anual de inflación médica; factor(y) = (1 + i)^(ANIO_BASE - y)
+    factor_<anio>       factores explícitos por año (tienen prioridad sobre inflacion_anual)
+    tasa_descuento      tasa anual para el factor de prima mensual
+    min_credibilidad    siniestros mínimos para marcar la celda como creíble
+    gastos, utilidad    recargos de la prima de tarifa (README: PR / (1 - G - U))
+
+Con --credibilidad cada escenario incluye además la prima con credibilidad de
+Bühlmann-Straub (credibility.py), calculada para todos los escenarios en la misma pasada.
+
+Uso:
+    python scripts/scenario_engine.py                        # Rejilla de sensibilidad por defecto
+    python scripts/scenario_engine.py --escenarios esc.csv   # Escenarios de un CSV
+    python scripts/scenario_engine.py --celdas --float32     # Guarda también las celdas
+    python scripts/scenario_engine.py --credibilidad edad_vecina
+
+Salida:
+    - outputs/tarificacion/escenarios_resumen.csv (parámetros + prima por nivel por escenario)
+    - outputs/tarificacion/escenarios_celdas.npz (con --celdas)
+"""
+
+import argparse
+import time
+from itertools import product
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from calculate_tarificacion import (
+    INFLACION_MEDICA, TASA_DESCUENTO_ANUAL_2025, MIN_SINIESTROS_CREDIBILIDAD,
+    NIVEL_DESCRIPCION, calcular_factor_mensual,
+)
+from build_cube import cargar_cubo, arreglos_por_anio
+from credibility import buhlmann_straub, COMPLEMENTOS
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "outputs" / "tarificacion"
+RESUMEN_FILE = OUTPUT_DIR / "escenarios_resumen.csv"
+CELDAS_FILE = OUTPUT_DIR / "escenarios_celdas.npz"
+
+# Año al que se llevan los montos (factor 1.00)
+ANIO_BASE = max(INFLACION_MEDICA)
+
+# Recargos base (docs/tarificacion_colectivo_mexico.md, sección 9.3)
+GASTOS_BASE = 0.32      # administración 12% + adquisición 20%
+UTILIDAD_BASE = 0.08
+
+PARAMETROS_BASE = {
+    'tasa_descuento': TASA_DESCUENTO_ANUAL_2025,
+    'min_credibilidad': MIN_SINIESTROS_CREDIBILIDAD,
+    'gastos': GASTOS_BASE,
+    'utilidad': UTILIDAD_BASE,
+}
+
+# Rejilla por defecto: 7 × 5 × 4 × 3 × 3 = 1,260 escenarios
+REJILLA_BASE = {
+    'inflacion_anual': [0.06, 0.07, 0.08, 0.09, 0.10, 0.11, 0.12],
+    'tasa_descuento': [0.08, 0.09, 0.10, 0.11, 0.12],
+    'gastos': [0.28, 0.32, 0.36, 0.40],
+    'utilidad': [0.05, 0.08, 0.10],
+    'min_credibilidad': [20, 30, 50],
+}
+
+
+# =============================================================================
+# CONSTRUCCIÓN DE ESCENARIOS
+# =============================================================================
+
+def rejilla_escenarios(**valores) -> pd.DataFrame:
+    """Producto cartesiano de listas de parámetros (una fila por escenario)."""
+    nombres = list(valores)
+    return pd.DataFrame(list(product(*valores.values())), columns=nombres)
+
+
+def factores_inflacion(escenarios: pd.DataFrame, anios: np.ndarray) -> np.ndarray:
+    """
+    Matriz (K, Y) de factores de inflación por escenario y año.
+
+    Prioridad por año: factor_<anio> → inflacion_anual → INFLACION_MEDICA.
+    """
+    k = len(escenarios)
+    base = np.array([INFLACION_MEDICA.get(int(a), 1.0) for a in anios])
+    factores = np.broadcast_to(base, (k, len(anios))).copy()
+
+    if 'inflacion_anual' in escenarios.columns:
+        tasa = escenarios['inflacion_anual'].to_numpy(dtype='float64')
+        compuesto = (1 + tasa[:, None]) ** (ANIO_BASE - anios[None, :])
+        definido = ~np.isnan(tasa)
+        factores[definido] = compuesto[definido]
+
+    for j, anio in enumerate(anios):
+        columna = f'factor_{int(anio)}'
+        if columna in escenarios.columns:
+            explicito = escenarios[columna].to_numpy(dtype='float64')
+            factores[:, j] = np.where(np.isnan(explicito), factores[:, j], explicito)
+    return factores
+
+
+def parametro(escenarios: pd.DataFrame, nombre: str) -> np.ndarray:
+    """Columna de parámetro (K,), con el valor base donde falte."""
+    if nombre not in escenarios.columns:
+        return np.full(len(escenarios), float(PARAMETROS_BASE[nombre]))
+    return escenarios[nombre].fillna(PARAMETROS_BASE[nombre]).to_numpy(dtype='float64')
+
+
+# =============================================================================
+# EVALUACIÓN VECTORIZADA
+# =============================================================================
+
+def evaluar_escenarios(escenarios: pd.DataFrame, datos: dict, dtype='float64',
+                       credibilidad: str = None) -> dict:
+    """
+    Evalúa todos los escenarios sobre todas las celdas edad × nivel.
+
+    Args:
+        escenarios: una fila por escenario (ver parámetros en el encabezado)
+        datos: salida de build_cube.arreglos_por_anio()
+        dtype: 'float32' reduce a la mitad la memoria de los resultados
+        credibilidad: None, 'nivel' o 'edad_vecina' (complemento de Bühlmann-Straub)
+
+    Returns:
+        dict de arreglos (K, E, 3): severidad, prima_riesgo, prima_mensual,
+        prima_tarifa, prima_tarifa_mensual, credible (y z, prima_credibilidad,
+        prima_credibilidad_tarifa con credibilidad); frecuencia y num_siniestros
+        son (E, 3) porque no dependen del escenario.
+    """
+    anios = datos['anios']
+    siniestros = datos['siniestros'].sum(axis=0)                  # (E, 3)
+    expuestos = datos['expuestos'].sum(axis=0)                    # (E,)
+    monto_pagado = datos['monto_pagado']                          # (Y, E, 3)
+    _, n_edades, n_niveles = monto_pagado.shape
+
+    factores = factores_inflacion(escenarios, anios)              # (K, Y)
+    tasa = parametro(escenarios, 'tasa_descuento')
+    min_cred = parametro(escenarios, 'min_credibilidad')
+    recargo = 1 - parametro(escenarios, 'gastos') - parametro(escenarios, 'utilidad')
+    if (recargo <= 0).any():
+        raise ValueError("gastos + utilidad debe ser menor a 1 en todos los escenarios")
+
+    # Monto ajustado de todos los escenarios en un solo producto matricial
+    monto = (factores @ monto_pagado.reshape(len(anios), -1)).reshape(-1, n_edades, n_niveles)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frecuencia = siniestros / expuestos[:, None]
+        severidad = monto / np.where(siniestros > 0, siniestros, np.nan)
+    prima_riesgo = frecuencia * severidad
+
+    factor_mensual = calcular_factor_mensual(tasa)[:, None, None]
+    prima_tarifa = prima_riesgo / recargo[:, None, None]
+
+    resultado = {
+        'num_siniestros': siniestros,
+        'frecuencia': frecuencia,
+        'severidad': severidad.astype(dtype, copy=False),
+        'prima_riesgo': prima_riesgo.astype(dtype, copy=False),
+        'prima_mensual': (prima_riesgo * factor_mensual).astype(dtype, copy=False),
+        'prima_tarifa': prima_tarifa.astype(dtype, copy=False),
+        'prima_tarifa_mensual': (prima_tarifa * factor_mensual).astype(dtype, copy=False),
+        'credible': siniestros[None, :, :] >= min_cred[:, None, None],
+        'monto_nivel': monto.sum(axis=1),                         # (K, 3)
+        'expuestos': expuestos,                                   # (E,)
+        'expuestos_total': expuestos.sum(),
+    }
+
+    if credibilidad:
+        # Experiencia anual de todos los escenarios: (K, Y, E, 3)
+        monto_anual = factores[:, :, None, None] * monto_pagado[None]
+        bs = buhlmann_straub(monto_anual, datos['expuestos'][None, :, :, None], credibilidad)
+        resultado['z'] = bs['z'].astype(dtype, copy=False)
+        resultado['prima_credibilidad'] = bs['prima_credibilidad'].astype(dtype, copy=False)
+        resultado['prima_credibilidad_tarifa'] = (
+            bs['prima_credibilidad'] / recargo[:, None, None]
+        ).astype(dtype, copy=False)
+
+    return resultado
+
+
+def resumen_por_nivel(escenarios: pd.DataFrame, resultado: dict) -> pd.DataFrame:
+    """
+    Prima de riesgo y de tarifa por nivel para cada escenario (mismo cálculo que
+    generar_primas_por_nivel: monto del nivel / exposición total).
+    """
+    resumen = escenarios.reset_index(drop=True).copy()
+    prima_nivel = resultado['monto_nivel'] / resultado['expuestos_total']   # (K, 3)
+    recargo = 1 - parametro(escenarios, 'gastos') - parametro(escenarios, 'utilidad')
+    factor_mensual = calcular_factor_mensual(parametro(escenarios, 'tasa_descuento'))
+
+    for n in range(prima_nivel.shape[1]):
+        resumen[f'prima_riesgo_n{n + 1}'] = prima_nivel[:, n]
+    resumen['prima_riesgo_total'] = prima_nivel.sum(axis=1)
+    resumen['prima_tarifa_total'] = resumen['prima_riesgo_total'] / recargo
+    resumen['prima_tarifa_mensual'] = resumen['prima_tarifa_total'] * factor_mensual
+    resumen['celdas_credibles'] = resultado['credible'].sum(axis=(1, 2))
+    if 'prima_credibilidad' in resultado:
+        # Prima por nivel ponderada por la exposición de cada edad
+        expuestos = resultado['expuestos']
+        prima_cred = np.einsum('ken,e->kn', np.nan_to_num(resultado['prima_credibilidad']),
+                               expuestos) / expuestos.sum()
+        resumen['prima_credibilidad_total'] = prima_cred.sum(axis=1)
+        resumen['z_media'] = resultado['z'].mean(axis=(1, 2))
+    return resumen
+
+
+def a_tabla(resultado: dict, edades: np.ndarray, escenarios_id=None) -> pd.DataFrame:
+    """Resultado en formato largo: una fila por escenario × edad × nivel."""
+    k, n_edades, n_niveles = resultado['prima_riesgo'].shape
+    ids = np.arange(k) if escenarios_id is None else np.asarray(escenarios_id)
+    esc, e, n = np.meshgrid(np.arange(k), np.arange(n_edades), np.arange(n_niveles), indexing='ij')
+
+    tabla = pd.DataFrame({
+        'escenario': ids[esc.ravel()],
+        'edad': edades[e.ravel()],
+        'nivel': n.ravel() + 1,
+        'num_siniestros': np.broadcast_to(resultado['num_siniestros'], (k, n_edades, n_niveles)).ravel(),
+        'frecuencia': np.broadcast_to(resultado['frecuencia'], (k, n_edades, n_niveles)).ravel(),
+    })
+    for col in ['severidad', 'prima_riesgo', 'prima_mensual', 'prima_tarifa',
+                'prima_tarifa_mensual', 'credible', 'z', 'prima_credibilidad',
+                'prima_credibilidad_tarifa']:
+        if col in resultado:
+            tabla[col] = resultado[col].ravel()
+    tabla['descripcion'] = tabla['nivel'].map(NIVEL_DESCRIPCION)
+    return tabla
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Motor de escenarios de tarificación")
+    parser.add_argument('--escenarios', type=Path, help="CSV con un escenario por fila")
+    parser.add_argument('--float32', action='store_true', help="Resultados por celda en float32")
+    parser.add_argument('--celdas', action='store_true', help="Guardar resultados por celda (.npz)")
+    parser.add_argument('--credibilidad', choices=COMPLEMENTOS,
+                        help="Agregar prima con credibilidad de Bühlmann-Straub")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("MOTOR DE ESCENARIOS DE TARIFICACIÓN")
+    print("=" * 70)
+
+    print("\n[1/3] Cargando cubo...")
+    cubo_sin, cubo_exp, _ = cargar_cubo()
+    datos = arreglos_por_anio(cubo_sin, cubo_exp)
+    print(f"  ✓ Años: {datos['anios'].tolist()} | Edades: {len(datos['edades'])} | Niveles: 3")
+
+    if args.escenarios:
+        escenarios = pd.read_csv(args.escenarios)
+        print(f"  ✓ Escenarios leídos de {args.escenarios}: {len(escenarios):,}")
+    else:
+        escenarios = rejilla_escenarios(**REJILLA_BASE)
+        print(f"  ✓ Rejilla por defecto: {len(escenarios):,} escenarios")
+
+    print("\n[2/3] Evaluando escenarios...")
+    dtype = 'float32' if args.float32 else 'float64'
+    inicio = time.perf_counter()
+    resultado = evaluar_escenarios(escenarios, datos, dtype=dtype, credibilidad=args.credibilidad)
+    segundos = time.perf_counter() - inicio
+    celdas = resultado['prima_riesgo'].size
+    print(f"  ✓ {len(escenarios):,} escenarios × {celdas // len(escenarios):,} celdas en {segundos * 1000:.1f} ms")
+    print(f"  Tiempo por 1,000 escenarios: {segundos / len(escenarios) * 1000 * 1000:.2f} ms")
+
+    print("\n[3/3] Guardando resultados...")
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    resumen = resumen_por_nivel(escenarios, resultado)
+    resumen.to_csv(RESUMEN_FILE, index=False)
+    print(f"  ✓ {RESUMEN_FILE}")
+
+    if args.celdas:
+        np.savez_compressed(
+            CELDAS_FILE, edades=datos['edades'],
+            **{k: v for k, v in resultado.items() if isinstance(v, np.ndarray)}
+        )
+        print(f"  ✓ {CELDAS_FILE} ({CELDAS_FILE.stat().st_size / 1024 / 1024:.1f} MB)")
+
+    total = resumen['prima_tarifa_total']
+    print(f"\n  Prima de tarifa total: mín ${total.min():,.2f} | "
+          f"mediana ${total.median():,.2f} | máx ${total.max():,.2f}")
+
+
+if __name__ == "__main__":
+    main()
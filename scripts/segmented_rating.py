@@ -0,0 +1,203 @@
+"""
+segmented_rating.py
+Tablas de tarificación segmentadas por cualquier lista de dimensiones.
+
+Generaliza calcular_metricas_por_nivel_edad() (fija en EDAD × NIVEL, exposición solo
+por edad) a EDAD × NIVEL × dimensiones arbitrarias presentes en siniestros y pólizas:
+SEXO, ENTIDAD, ANIO, TIPO DE SEGURO, SUBTIPO. Siniestros y exposición se agregan en
+una sola pasada agrupada cada uno y se unen por (dimensiones, EDAD).
+
+La salida es dispersa: solo aparecen las celdas con siniestros observados (como en
+la matriz nivel × edad), así que el costo crece con las celdas observadas y no con
+el producto cartesiano de las dimensiones.
+
+Con --marginales se agregan los totales por cada subconjunto de dimensiones
+(las dimensiones agregadas se marcan como 'TODOS'), calculados desde las tablas ya
+agrupadas, sin volver a leer los datos.
+
+Fuente de datos:
+    Si todas las dimensiones están en el cubo (ANIO, SEXO, ENTIDAD) se usa el cubo
+    pre-agregado; si no, se leen solo las columnas necesarias de los parquet.
+
+Uso:
+    python scripts/segmented_rating.py SEXO ENTIDAD
+    python scripts/segmented_rating.py "TIPO DE SEGURO" SUBTIPO --marginales
+
+Salida:
+    - outputs/tarificacion/primas_segmentadas.csv
+"""
+
+import argparse
+import time
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from calculate_tarificacion import (
+    EDAD_MIN, EDAD_MAX, INFLACION_MEDICA, MIN_SINIESTROS_CREDIBILIDAD,
+    NIVEL_DESCRIPCION, FACTOR_MENSUAL_2025,
+)
+from causa_catalog import mapear_nivel
+from build_cube import cargar_cubo, DIMENSIONES_EXPOSICION, SINIESTROS_FILE, POLIZAS_FILE, CLASIFICACION_FILE
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "outputs" / "tarificacion"
+SEGMENTADAS_FILE = OUTPUT_DIR / "primas_segmentadas.csv"
+
+TODOS = 'TODOS'
+
+
+# =============================================================================
+# CARGA (CUBO O PARQUET)
+# =============================================================================
+
+def dimensiones_validas() -> list:
+    """Columnas presentes en siniestros y pólizas por las que se puede segmentar."""
+    comunes = set(pq.read_schema(SINIESTROS_FILE).names) & set(pq.read_schema(POLIZAS_FILE).names)
+    return sorted(comunes - {'EDAD'})
+
+
+def cargar_segmentos(dimensiones: list) -> tuple:
+    """
+    Siniestros (dimensiones + EDAD + NIVEL, NUM_SINIESTROS, MONTO_AJUSTADO) y
+    exposición (dimensiones + EDAD, NUM_ASEGURADOS) con la convención de la
+    tarificación: edades 25-70, solo causas clasificadas y montos >= 0.
+    """
+    if set(dimensiones) <= set(DIMENSIONES_EXPOSICION):
+        cubo_sin, cubo_exp, _ = cargar_cubo()
+        siniestros = cubo_sin.loc[cubo_sin['NIVEL'] > 0,
+                                  dimensiones + ['EDAD', 'NIVEL', 'NUM_SINIESTROS', 'MONTO_AJUSTADO']]
+        exposicion = cubo_exp[dimensiones + ['EDAD', 'NUM_ASEGURADOS']]
+        return siniestros, exposicion, 'cubo'
+
+    columnas = list(dict.fromkeys(dimensiones + ['ANIO', 'EDAD', 'CAUSA', 'NUM_SINIESTROS', 'MONTO_PAGADO']))
+    if 'CAUSA_ID' in pq.read_schema(SINIESTROS_FILE).names:
+        columnas.append('CAUSA_ID')
+    df = pd.read_parquet(SINIESTROS_FILE, columns=columnas)
+    df = df[(df['EDAD'] >= EDAD_MIN) & (df['EDAD'] <= EDAD_MAX) & (df['MONTO_PAGADO'] >= 0)]
+    nivel = mapear_nivel(df, pd.read_csv(CLASIFICACION_FILE))
+    df = df[nivel.notna()].assign(
+        NIVEL=nivel[nivel.notna()].astype('int8'),
+        MONTO_AJUSTADO=lambda d: d['MONTO_PAGADO'] * d['ANIO'].map(INFLACION_MEDICA),
+    )
+    siniestros = df[dimensiones + ['EDAD', 'NIVEL', 'NUM_SINIESTROS', 'MONTO_AJUSTADO']]
+
+    pol = pd.read_parquet(POLIZAS_FILE, columns=list(dict.fromkeys(dimensiones + ['EDAD', 'NUM_ASEGURADOS'])))
+    edad = pd.to_numeric(pol['EDAD'], errors='coerce')
+    en_rango = (edad >= EDAD_MIN) & (edad <= EDAD_MAX)
+    exposicion = pol.loc[en_rango].assign(EDAD=edad[en_rango].astype('int8'))
+    return siniestros, exposicion, 'parquet'
+
+
+# =============================================================================
+# TARIFICACIÓN SEGMENTADA
+# =============================================================================
+
+def agrupar(siniestros: pd.DataFrame, exposicion: pd.DataFrame, dimensiones: list) -> tuple:
+    """Una pasada agrupada por tabla, solo celdas observadas."""
+    grano = dimensiones + ['EDAD']
+    sin = siniestros.groupby(grano + ['NIVEL'], dropna=False, observed=True, sort=False)[
+        ['NUM_SINIESTROS', 'MONTO_AJUSTADO']].sum()
+    exp = exposicion.groupby(grano, dropna=False, observed=True, sort=False)['NUM_ASEGURADOS'].sum()
+    return sin.reset_index(), exp.reset_index()
+
+
+def metricas(sin: pd.DataFrame, exp: pd.DataFrame, dimensiones: list) -> pd.DataFrame:
+    """
+    Frecuencia, severidad y prima por celda (mismas fórmulas que
+    calcular_metricas_por_nivel_edad).
+    """
+    grano = dimensiones + ['EDAD']
+    tabla = sin.merge(exp, on=grano, how='left')
+    tabla.columns = [c.lower() if c in grano or c == 'NIVEL' else c for c in tabla.columns]
+    tabla = tabla.rename(columns={
+        'NUM_SINIESTROS': 'num_siniestros', 'MONTO_AJUSTADO': 'monto_total',
+        'NUM_ASEGURADOS': 'expuestos',
+    })
+
+    tabla['frecuencia'] = tabla['num_siniestros'] / tabla['expuestos']
+    tabla['severidad'] = tabla['monto_total'] / tabla['num_siniestros']
+    tabla['prima_riesgo'] = tabla['frecuencia'] * tabla['severidad']
+    tabla['prima_mensual'] = tabla['prima_riesgo'] * FACTOR_MENSUAL_2025
+    tabla['credible'] = tabla['num_siniestros'] >= MIN_SINIESTROS_CREDIBILIDAD
+    tabla.insert(len(grano) + 1, 'descripcion', tabla['nivel'].map(NIVEL_DESCRIPCION))
+    return tabla
+
+
+def tarificar_segmentos(siniestros: pd.DataFrame, exposicion: pd.DataFrame, dimensiones: list,
+                        marginales: bool = False) -> pd.DataFrame:
+    """
+    Tabla dispersa por dimensiones × edad × nivel y, opcionalmente, sus marginales.
+    """
+    sin, exp = agrupar(siniestros, exposicion, dimensiones)
+    columnas_dim = [d.lower() for d in dimensiones]
+    tablas = [metricas(sin, exp, dimensiones)]
+
+    if marginales:
+        # Cada subconjunto propio de dimensiones se agrega desde las tablas ya agrupadas
+        for r in range(len(dimensiones) - 1, -1, -1):
+            for subconjunto in combinations(dimensiones, r):
+                subconjunto = list(subconjunto)
+                sin_m, exp_m = agrupar(sin, exp, subconjunto)
+                tabla = metricas(sin_m, exp_m, subconjunto)
+                for d in dimensiones:
+                    if d not in subconjunto:
+                        tabla[d.lower()] = TODOS
+                tablas.append(tabla)
+
+    resultado = pd.concat(tablas, ignore_index=True)
+    orden = columnas_dim + [c for c in resultado.columns if c not in columnas_dim]
+    return resultado[orden]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tarificación segmentada por dimensiones")
+    parser.add_argument('dimensiones', nargs='*', help="p. ej. SEXO ENTIDAD 'TIPO DE SEGURO' SUBTIPO")
+    parser.add_argument('--marginales', action='store_true', help="Agregar totales por subconjunto")
+    parser.add_argument('--salida', type=Path, default=SEGMENTADAS_FILE)
+    args = parser.parse_args()
+
+    validas = dimensiones_validas()
+    invalidas = [d for d in args.dimensiones if d not in validas]
+    if invalidas:
+        parser.error(f"dimensiones no válidas: {', '.join(invalidas)}. "
+                     f"Válidas: {', '.join(validas)}")
+    if len(set(args.dimensiones)) < len(args.dimensiones):
+        parser.error("dimensiones repetidas")
+
+    print("=" * 70)
+    print("TARIFICACIÓN SEGMENTADA")
+    print("=" * 70)
+    print(f"  Dimensiones: {args.dimensiones or '(ninguna: edad × nivel)'}")
+
+    inicio = time.perf_counter()
+    siniestros, exposicion, fuente = cargar_segmentos(args.dimensiones)
+    carga = time.perf_counter() - inicio
+    print(f"  Fuente: {fuente} ({len(siniestros):,} filas de siniestros, {carga:.2f} s)")
+
+    inicio = time.perf_counter()
+    resultado = tarificar_segmentos(siniestros, exposicion, args.dimensiones, args.marginales)
+    segundos = time.perf_counter() - inicio
+
+    completo = resultado
+    for d in args.dimensiones:
+        completo = completo[completo[d.lower()] != TODOS]
+    cartesiano = np.prod([siniestros[d].nunique(dropna=False) for d in args.dimensiones] +
+                         [EDAD_MAX - EDAD_MIN + 1, 3])
+    print(f"\n  Celdas observadas: {len(completo):,} de {int(cartesiano):,} posibles "
+          f"({len(completo) / cartesiano * 100:.1f}%)")
+    if args.marginales:
+        print(f"  Filas marginales: {len(resultado) - len(completo):,}")
+    print(f"  Tiempo de agregación y métricas: {segundos * 1000:.1f} ms")
+
+    args.salida.parent.mkdir(parents=True, exist_ok=True)
+    resultado.to_csv(args.salida, index=False)
+    print(f"  ✓ {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+soft_assignment.py
+Asignación suave (ponderada por probabilidad) del nivel de complejidad.
+
+La tarificación asigna a cada siniestro el nivel más probable de su causa y descarta
+el resto del vector de probabilidades del clasificador. Con una exactitud cercana
+al 60%, muchos siniestros quedan en el nivel equivocado. La asignación suave reparte
+los siniestros y montos de cada causa entre los tres niveles según P(nivel | causa):
+
+    C  (causas × edad·año)   siniestros o montos nominales agregados por causa
+    P  (causas × 3)          probabilidades por causa (one-hot para las manuales)
+    Pᵀ C (3 × edad·año)      siniestros o montos por nivel
+
+El producto se hace con C disperso (la mayoría de las causas aparece en pocas
+celdas edad × año); la inflación se aplica después, por columna de año. La
+asignación dura es el mismo producto con P one-hot, así que ambas salen de los
+mismos agregados y la comparación es directa.
+
+Probabilidades:
+    Se usan las columnas prob_nivel_1..3 de all_causes_classified.csv. Si no
+    existen (clasificación anterior), se aproximan con nivel_probabilidad en el
+    nivel asignado y el resto repartido en partes iguales entre los otros dos.
+
+Uso:
+    python scripts/soft_assignment.py                           # Reporte de cambios
+    python scripts/calculate_tarificacion.py --asignacion-suave # Tarificación suave
+
+Salida:
+    - outputs/tarificacion/cambio_asignacion_suave.csv
+"""
+
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+from scipy import sparse
+
+from calculate_tarificacion import (
+    DATA_CONSOLIDATED, DATA_CLASSIFIED, EDAD_MIN, EDAD_MAX, INFLACION_MEDICA,
+    NIVEL_DESCRIPCION, FACTOR_MENSUAL_2025,
+)
+from causa_catalog import CATALOGO_FILE, SIN_CAUSA_ID, cargar_catalogo, asignar_causa_id, buscar_por_id
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+OUTPUT_DIR = BASE_DIR / "outputs" / "tarificacion"
+CAMBIO_FILE = OUTPUT_DIR / "cambio_asignacion_suave.csv"
+
+NIVELES = 3
+COLUMNAS_PROBABILIDAD = [f'prob_nivel_{n}' for n in range(1, NIVELES + 1)]
+
+
+# =============================================================================
+# PROBABILIDADES POR CAUSA
+# =============================================================================
+
+def probabilidades_clasificacion(df_clasificacion: pd.DataFrame) -> np.ndarray:
+    """
+    Matriz (causas clasificadas × 3) con P(nivel | causa); cada fila suma 1.
+
+    Usa prob_nivel_1..3 cuando existen y, para las filas sin ellas, la
+    aproximación con nivel_probabilidad.
+    """
+    nivel = df_clasificacion['nivel'].to_numpy().astype(int)
+    p = df_clasificacion['nivel_probabilidad'].fillna(1.0).to_numpy().clip(0.0, 1.0)
+    aproximada = np.repeat(((1.0 - p) / (NIVELES - 1))[:, None], NIVELES, axis=1)
+    aproximada[np.arange(len(nivel)), nivel - 1] = p
+
+    if set(COLUMNAS_PROBABILIDAD) <= set(df_clasificacion.columns):
+        probabilidades = df_clasificacion[COLUMNAS_PROBABILIDAD].to_numpy(dtype='float64')
+        incompletas = np.isnan(probabilidades).any(axis=1)
+        probabilidades[incompletas] = aproximada[incompletas]
+    else:
+        probabilidades = aproximada
+    return probabilidades / probabilidades.sum(axis=1, keepdims=True)
+
+
+def fila_clasificacion(df_siniestros: pd.DataFrame, df_clasificacion: pd.DataFrame) -> np.ndarray:
+    """
+    Para cada siniestro, la fila de su causa en df_clasificacion (-1 si no está
+    clasificada). Por CAUSA_ID si hay catálogo; si no, por texto de la causa.
+    """
+    if 'CAUSA_ID' in df_siniestros.columns and CATALOGO_FILE.exists():
+        catalogo = cargar_catalogo()
+        ids = asignar_causa_id(df_clasificacion['causa'], catalogo)
+        validos = ids != SIN_CAUSA_ID
+        tabla = np.full(len(catalogo), -1, dtype=np.int64)
+        tabla[ids[validos]] = np.flatnonzero(validos)
+        return buscar_por_id(tabla, df_siniestros['CAUSA_ID'].to_numpy(), relleno=-1)
+
+    # Como el mapeo por texto de mapear_nivel: con causas repetidas gana la última
+    causas = pd.Index(df_clasificacion['causa'])
+    unicas = np.flatnonzero(~causas.duplicated(keep='last'))
+    codigos, valores = pd.factorize(df_siniestros['CAUSA'])
+    posicion = causas[unicas].get_indexer(valores)
+    filas = np.where(posicion >= 0, unicas[posicion], -1)
+    return np.append(filas, -1)[codigos]
+
+
+# =============================================================================
+# AGREGADOS Y PRODUCTO DISPERSO
+# =============================================================================
+
+def matrices_causa(fila: np.ndarray, edad: np.ndarray, anio_idx: np.ndarray, n_anios: int,
+                   n_causas: int, num_siniestros: np.ndarray, monto: np.ndarray) -> tuple:
+    """
+    Matrices dispersas causa × (edad, año) de siniestros y montos nominales.
+    Las entradas repetidas (varios siniestros en la misma celda) se suman.
+    """
+    columna = (edad.astype(np.int64) - EDAD_MIN) * n_anios + anio_idx
+    forma = (n_causas, (EDAD_MAX - EDAD_MIN + 1) * n_anios)
+    C_siniestros = sparse.csr_matrix((num_siniestros.astype('float64'), (fila, columna)), shape=forma)
+    C_monto = sparse.csr_matrix((monto.astype('float64'), (fila, columna)), shape=forma)
+    return C_siniestros, C_monto
+
+
+def repartir_por_nivel(C_siniestros, C_monto, probabilidades: np.ndarray,
+                       factores_anio: np.ndarray) -> tuple:
+    """
+    Pᵀ C reducido a nivel × edad.
+
+    Returns:
+        (siniestros (3, E), monto ajustado (3, E))
+    """
+    n_anios = len(factores_anio)
+    siniestros = np.asarray(C_siniestros.T @ probabilidades).T           # (3, E·Y)
+    monto = np.asarray(C_monto.T @ probabilidades).T
+    siniestros = siniestros.reshape(NIVELES, -1, n_anios).sum(axis=2)
+    monto = (monto.reshape(NIVELES, -1, n_anios) * factores_anio).sum(axis=2)
+    return siniestros, monto
+
+
+def a_filas(siniestros: np.ndarray, monto: np.ndarray) -> pd.DataFrame:
+    """Arreglos nivel × edad como filas (EDAD, NIVEL, NUM_SINIESTROS, MONTO_AJUSTADO)."""
+    n, e = np.nonzero(siniestros > 0)
+    return pd.DataFrame({
+        'EDAD': e + EDAD_MIN,
+        'NIVEL': n + 1,
+        'NUM_SINIESTROS': siniestros[n, e],
+        'MONTO_AJUSTADO': monto[n, e],
+    }).sort_values(['EDAD', 'NIVEL'], ignore_index=True)
+
+
+def asignaciones() -> dict:
+    """
+    Lee siniestros, pólizas y clasificación y calcula la asignación dura y la suave
+    a partir de los mismos agregados causa × (edad, año).
+
+    Returns:
+        dict: dura/suave (siniestros, monto) nivel × edad, polizas por EDAD_INT y
+              estadísticas compatibles con generar_reporte()
+    """
+    stats = {}
+    ruta_siniestros = DATA_CONSOLIDATED / "siniestros.parquet"
+    columnas = ['ANIO', 'EDAD', 'CAUSA', 'NUM_SINIESTROS', 'MONTO_PAGADO']
+    if 'CAUSA_ID' in pq.read_schema(ruta_siniestros).names:
+        columnas.append('CAUSA_ID')
+    df_siniestros = pd.read_parquet(ruta_siniestros, columns=columnas)
+    df_polizas = pd.read_parquet(DATA_CONSOLIDATED / "polizas.parquet", columns=['EDAD', 'NUM_ASEGURADOS'])
+    df_clasificacion = pd.read_csv(DATA_CLASSIFIED / "all_causes_classified.csv")
+
+    # Pólizas por edad
+    edad_pol = pd.to_numeric(df_polizas['EDAD'], errors='coerce').to_numpy()
+    stats['edades_polizas_invalidas'] = int(np.isnan(edad_pol).sum())
+    en_rango_pol = (edad_pol >= EDAD_MIN) & (edad_pol <= EDAD_MAX)
+    stats['polizas_filtradas'] = int(len(edad_pol) - en_rango_pol.sum())
+    polizas = (df_polizas['NUM_ASEGURADOS'][en_rango_pol]
+               .groupby(edad_pol[en_rango_pol]).sum()
+               .rename_axis('EDAD_INT').reset_index())
+
+    # Misma máscara que la tarificación: edad, causa clasificada y monto >= 0
+    edad = df_siniestros['EDAD'].to_numpy()
+    en_rango = (edad >= EDAD_MIN) & (edad <= EDAD_MAX)
+    stats['siniestros_filtrados'] = int(len(edad) - en_rango.sum())
+    fila = fila_clasificacion(df_siniestros, df_clasificacion)
+    sin_clasificar = en_rango & (fila < 0)
+    stats['causas_sin_clasificar'] = df_siniestros['CAUSA'][sin_clasificar].nunique()
+    stats['siniestros_sin_clasificar'] = int(sin_clasificar.sum())
+    stats['cobertura_clasificacion'] = (1 - sin_clasificar.sum() / en_rango.sum()) * 100
+    monto = df_siniestros['MONTO_PAGADO'].to_numpy()
+    mascara = en_rango & (fila >= 0)
+    stats['montos_negativos'] = int((mascara & ~(monto >= 0)).sum())
+    mascara &= monto >= 0
+
+    anios = np.array(sorted(INFLACION_MEDICA))
+    anio = df_siniestros['ANIO'].to_numpy()[mascara]
+    anio_idx = np.searchsorted(anios, anio)
+    if not np.isin(anio, anios).all():
+        raise ValueError(f"Años sin factor de inflación: {sorted(set(anio) - set(anios))}")
+    factores = np.array([INFLACION_MEDICA[a] for a in anios])
+
+    C_siniestros, C_monto = matrices_causa(
+        fila[mascara], edad[mascara], anio_idx, len(anios), len(df_clasificacion),
+        df_siniestros['NUM_SINIESTROS'].to_numpy()[mascara], monto[mascara])
+    stats['monto_original_total'] = C_monto.sum()
+
+    P = probabilidades_clasificacion(df_clasificacion)
+    P_dura = np.eye(NIVELES)[df_clasificacion['nivel'].to_numpy().astype(int) - 1]
+    suave = repartir_por_nivel(C_siniestros, C_monto, P, factores)
+    dura = repartir_por_nivel(C_siniestros, C_monto, P_dura, factores)
+    stats['monto_ajustado_total'] = suave[1].sum()
+    stats['causas_agregadas'] = int(np.diff(C_siniestros.indptr).astype(bool).sum())
+
+    return {'dura': dura, 'suave': suave, 'polizas': polizas, 'stats': stats,
+            'probabilidades': P, 'nnz': C_siniestros.nnz}
+
+
+def preparar_asignacion_suave() -> tuple:
+    """
+    Equivalente a preparar_datos_baja_memoria() con asignación suave del nivel.
+
+    Returns:
+        tuple: (siniestros agregados por EDAD × NIVEL, pólizas agregadas por EDAD_INT, estadisticas)
+    """
+    print("\n" + "=" * 70)
+    print("PASOS 1-2: CARGA Y PREPARACIÓN (ASIGNACIÓN SUAVE DE NIVEL)")
+    print("=" * 70)
+
+    resultado = asignaciones()
+    stats = resultado['stats']
+    print(f"  ✓ {stats['causas_agregadas']:,} causas en {resultado['nnz']:,} celdas causa × (edad, año)")
+    print(f"\n  Causas sin clasificar: {stats['causas_sin_clasificar']:,}")
+    print(f"  Cobertura de clasificación: {stats['cobertura_clasificacion']:.1f}%")
+    if stats['montos_negativos'] > 0:
+        print(f"  Montos negativos o nulos excluidos: {stats['montos_negativos']:,}")
+    print(f"  Monto total ajustado (2024): ${stats['monto_ajustado_total']:,.0f}")
+
+    (sin_d, monto_d), (sin_s, monto_s) = resultado['dura'], resultado['suave']
+    print(f"\n  {'Nivel':<22} {'Siniestros dura':>16} {'Siniestros suave':>17} {'Monto':>8}")
+    for n in range(NIVELES):
+        cambio = monto_s[n].sum() / monto_d[n].sum() - 1 if monto_d[n].sum() > 0 else np.nan
+        print(f"  {n + 1} ({NIVEL_DESCRIPCION[n + 1]:<18}) {sin_d[n].sum():>16,.0f} "
+              f"{sin_s[n].sum():>17,.0f} {cambio:>+8.1%}")
+
+    return a_filas(sin_s, monto_s), resultado['polizas'], stats
+
+
+# =============================================================================
+# REPORTE DE CAMBIOS
+# =============================================================================
+
+def comparar_asignaciones(dura: tuple, suave: tuple, polizas: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tabla nivel × edad con siniestros, severidad y prima bajo ambas asignaciones.
+    Las filas de edad = 'TODAS' resumen cada nivel (prima por asegurado expuesto).
+    """
+    edades = np.arange(EDAD_MIN, EDAD_MAX + 1)
+    expuestos = (polizas.set_index('EDAD_INT')['NUM_ASEGURADOS']
+                 .reindex(edades, fill_value=0).to_numpy().astype('float64'))
+
+    filas = []
+    for etiqueta, (siniestros, monto) in (('dura', dura), ('suave', suave)):
+        # Resumen por nivel como columna extra: sumas sobre todas las edades
+        siniestros = np.column_stack([siniestros, siniestros.sum(axis=1)])
+        monto = np.column_stack([monto, monto.sum(axis=1)])
+        exp = np.append(expuestos, expuestos.sum())
+        with np.errstate(divide='ignore', invalid='ignore'):
+            filas.append({
+                f'num_siniestros_{etiqueta}': siniestros,
+                f'severidad_{etiqueta}': monto / siniestros,
+                f'prima_riesgo_{etiqueta}': np.where(exp > 0, monto / exp, np.nan),
+            })
+
+    n, e = np.meshgrid(np.arange(NIVELES), np.arange(len(edades) + 1), indexing='ij')
+    tabla = pd.DataFrame({
+        'nivel': n.ravel() + 1,
+        'edad': np.append(edades, -1)[e.ravel()],
+    })
+    tabla['descripcion'] = tabla['nivel'].map(NIVEL_DESCRIPCION)
+    for columnas in filas:
+        for nombre, valores in columnas.items():
+            tabla[nombre] = valores.ravel()
+    tabla['cambio_prima'] = tabla['prima_riesgo_suave'] / tabla['prima_riesgo_dura'] - 1
+    tabla['prima_mensual_suave'] = tabla['prima_riesgo_suave'] * FACTOR_MENSUAL_2025
+    tabla['edad'] = tabla['edad'].astype(object).where(tabla['edad'] >= 0, 'TODAS')
+    return tabla
+
+
+def main():
+    print("=" * 70)
+    print("ASIGNACIÓN SUAVE DE NIVEL: CAMBIO DE PRIMAS")
+    print("=" * 70)
+
+    print("\n[1/3] Agregando causa × (edad, año) y repartiendo por nivel...")
+    inicio = time.perf_counter()
+    resultado = asignaciones()
+    segundos = time.perf_counter() - inicio
+    P = resultado['probabilidades']
+    print(f"  ✓ {resultado['nnz']:,} celdas causa × (edad, año) no nulas ({segundos:.2f} s)")
+    print(f"  Causas con probabilidad máxima < 60%: {(P.max(axis=1) < 0.6).sum():,} de {len(P):,}")
+
+    print("\n[2/3] Comparando con la asignación dura...")
+    tabla = comparar_asignaciones(resultado['dura'], resultado['suave'], resultado['polizas'])
+    resumen = tabla[tabla['edad'] == 'TODAS']
+    print(f"\n  {'Nivel':<22} {'Prima dura':>12} {'Prima suave':>12} {'Cambio':>8}")
+    for _, fila in resumen.iterrows():
+        print(f"  {fila['nivel']} ({fila['descripcion']:<18}) ${fila['prima_riesgo_dura']:>11,.2f} "
+              f"${fila['prima_riesgo_suave']:>11,.2f} {fila['cambio_prima']:>+8.1%}")
+    por_edad = tabla[tabla['edad'] != 'TODAS']['cambio_prima'].abs()
+    print(f"\n  Cambio absoluto por celda: mediana {por_edad.median():.1%}, máximo {por_edad.max():.1%}")
+
+    print("\n[3/3] Guardando reporte...")
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    tabla.to_csv(CAMBIO_FILE, index=False)
+    print(f"  ✓ {CAMBIO_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+train_incremental.py
+Fase 2 (modo incremental): actualiza el clasificador de causas conforme llegan
+nuevos lotes de etiquetas manuales, sin reentrenar desde cero.
+
+Estrategia:
+1. Espacio de features fijo con HashingVectorizer (no requiere re-ajustar vocabulario)
+2. Modelo lineal en línea (SGDClassifier, pérdida logística) actualizado con partial_fit
+3. Cada actualización genera una nueva versión del modelo (v001, v002, ...)
+4. Cada REENTRENAMIENTO_PERIODICO versiones (o con --completo) se hace un
+   reentrenamiento completo que sirve de referencia para comparar métricas
+
+El conjunto de prueba se define por hash de la causa, de modo que una causa
+siempre cae en el mismo lado del split aunque crezca el número de etiquetas.
+
+Uso:
+    python scripts/train_incremental.py              # Agrega solo etiquetas nuevas/modificadas
+    python scripts/train_incremental.py --completo   # Fuerza reentrenamiento completo
+
+Salidas:
+    - outputs/model/incremental/vNNN.joblib (modelo por versión)
+    - outputs/model/incremental/estado.json (etiquetas vistas e historial de versiones)
+    - outputs/phase2/reporte_incremental.txt (comparación incremental vs completo)
+"""
+
+import json
+import sys
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score
+
+import label_store
+
+# Rutas
+BASE_DIR = Path(__file__).parent.parent
+PHASE1_DIR = BASE_DIR / "data" / "phase1"
+MODEL_DIR = BASE_DIR / "outputs" / "model" / "incremental"
+REPORT_DIR = BASE_DIR / "outputs" / "phase2"
+ESTADO_FILE = MODEL_DIR / "estado.json"
+
+# Crear directorios
+MODEL_DIR.mkdir(parents=True, exist_ok=True)
+REPORT_DIR.mkdir(parents=True, exist_ok=True)
+
+# Configuración del modelo en línea
+NIVELES = np.array([1, 2, 3])
+N_FEATURES = 2 ** 18              # espacio de hashing fijo
+EPOCAS_INCREMENTALES = 5          # pasadas sobre las etiquetas nuevas
+EPOCAS_COMPLETAS = 20             # pasadas en reentrenamiento completo
+REENTRENAMIENTO_PERIODICO = 10    # versiones entre reentrenamientos completos
+PCT_TEST = 20                     # % de causas (por hash) reservadas para prueba
+
+
+def crear_vectorizador() -> HashingVectorizer:
+    """
+    Vectorizador sin estado: el mismo texto siempre produce el mismo vector,
+    por lo que no hay que re-ajustarlo cuando llegan etiquetas nuevas.
+    """
+    return HashingVectorizer(
+        ngram_range=(1, 3),
+        n_features=N_FEATURES,
+        alternate_sign=False,
+        strip_accents='unicode',
+        lowercase=True,
+        norm='l2'
+    )
+
+
+def crear_modelo() -> SGDClassifier:
+    """
+    Regresión logística entrenada por descenso de gradiente estocástico.
+    """
+    return SGDClassifier(
+        loss='log_loss',
+        alpha=1e-4,
+        random_state=42
+    )
+
+
+def es_test(causa: str) -> bool:
+    """
+    Asigna la causa al conjunto de prueba de forma determinista (por hash).
+    """
+    return zlib.crc32(causa.encode('utf-8')) % 100 < PCT_TEST
+
+
+def cargar_etiquetas() -> pd.DataFrame:
+    """
+    Carga las etiquetas manuales de alta confianza. Usa el almacén indexado
+    (label_store.py) si existe; si no, lee los lotes clasificados_batch_*.csv,
+    donde prevalece el lote más reciente si una causa aparece en varios.
+    """
+    if label_store.DB_FILE.exists():
+        with label_store.conectar() as conn:
+            df = pd.read_sql_query("SELECT causa, nivel, confianza, lote FROM etiquetas", conn)
+    else:
+        batch_files = sorted(PHASE1_DIR.glob("clasificados_batch_*.csv"))
+        dfs = []
+        for batch_file in batch_files:
+            df_batch = pd.read_csv(batch_file)
+            df_batch['lote'] = batch_file.name
+            dfs.append(df_batch)
+        df = pd.concat(dfs, ignore_index=True)
+        df = df.drop_duplicates('causa', keep='last')
+
+    df = df[df['confianza'] == 'alta']
+    df['test'] = df['causa'].map(es_test)
+    return df.reset_index(drop=True)
+
+
+def cargar_estado() -> dict:
+    """Carga el estado del entrenamiento incremental (o uno vacío)."""
+    if ESTADO_FILE.exists():
+        with open(ESTADO_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {'version': 0, 'etiquetas_vistas': {}, 'historial': []}
+
+
+def guardar_estado(estado: dict):
+    with open(ESTADO_FILE, 'w', encoding='utf-8') as f:
+        json.dump(estado, f, indent=2, ensure_ascii=False)
+
+
+def pesos_balanceados(y: np.ndarray, y_acumulado: np.ndarray) -> np.ndarray:
+    """
+    Equivalente a class_weight='balanced' (no soportado por partial_fit),
+    calculado sobre todas las etiquetas acumuladas.
+    """
+    conteos = np.array([(y_acumulado == n).sum() for n in NIVELES], dtype=float)
+    conteos[conteos == 0] = 1
+    pesos_clase = len(y_acumulado) / (len(NIVELES) * conteos)
+    return pesos_clase[np.searchsorted(NIVELES, y)]
+
+
+def ajustar(modelo: SGDClassifier, X, y: np.ndarray, y_acumulado: np.ndarray,
+            epocas: int, semilla: int):
+    """Aplica varias pasadas de partial_fit en orden aleatorio."""
+    rng = np.random.default_rng(semilla)
+    pesos = pesos_balanceados(y, y_acumulado)
+    for _ in range(epocas):
+        orden = rng.permutation(len(y))
+        modelo.partial_fit(X[orden], y[orden], classes=NIVELES, sample_weight=pesos[orden])
+
+
+def evaluar(modelo: SGDClassifier, X_test, y_test: np.ndarray) -> dict:
+    y_pred = modelo.predict(X_test)
+    return {
+        'accuracy': float(accuracy_score(y_test, y_pred)),
+        'f1_macro': float(f1_score(y_test, y_pred, average='macro'))
+    }
+
+
+def generar_reporte(estado: dict, metricas_referencia: dict) -> str:
+    """
+    Genera el reporte comparando cada versión con el último reentrenamiento completo.
+    """
+    lineas = []
+    lineas.append("REPORTE DE ENTRENAMIENTO INCREMENTAL - FASE 2")
+    lineas.append("=" * 80)
+    lineas.append(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    lineas.append(f"Espacio de features (hashing): {N_FEATURES:,}")
+    lineas.append(f"Reentrenamiento completo cada {REENTRENAMIENTO_PERIODICO} versiones")
+
+    lineas.append("\n=== HISTORIAL DE VERSIONES ===")
+    lineas.append(f"{'Versión':<8} {'Tipo':<12} {'Nuevas':>7} {'Train':>6} {'Test':>5} "
+                  f"{'Accuracy':>9} {'F1-macro':>9} {'ΔF1 vs completo':>16}")
+    lineas.append("-" * 80)
+    for h in estado['historial']:
+        delta = h.get('delta_f1_vs_completo')
+        delta_txt = f"{delta:+.4f}" if delta is not None else "-"
+        lineas.append(
+            f"v{h['version']:03d}    {h['tipo']:<12} {h['etiquetas_nuevas']:>7,} {h['train_size']:>6,} "
+            f"{h['test_size']:>5,} {h['accuracy']:>9.4f} {h['f1_macro']:>9.4f} {delta_txt:>16}"
+        )
+
+    lineas.append("\n=== ÚLTIMO REENTRENAMIENTO COMPLETO (MISMO TEST SET) ===")
+    if metricas_referencia:
+        lineas.append(f"Versión: v{metricas_referencia['version']:03d}")
+        lineas.append(f"Accuracy: {metricas_referencia['accuracy']:.4f}")
+        lineas.append(f"F1-macro: {metricas_referencia['f1_macro']:.4f}")
+    else:
+        lineas.append("Sin reentrenamiento completo previo")
+
+    return "\n".join(lineas)
+
+
+def main():
+    forzar_completo = len(sys.argv) > 1 and sys.argv[1] == '--completo'
+
+    print("=" * 80)
+    print("FASE 2: ENTRENAMIENTO INCREMENTAL DEL CLASIFICADOR")
+    print("=" * 80)
+
+    # 1. Cargar etiquetas y estado
+    print("\n[1/5] Cargando etiquetas y estado previo...")
+    df = cargar_etiquetas()
+    estado = cargar_estado()
+    vistas = estado['etiquetas_vistas']
+    print(f"   Etiquetas alta confianza: {len(df):,}")
+    print(f"   Versión actual: v{estado['version']:03d}")
+
+    # Nuevas = causa no vista o cuyo nivel cambió
+    nuevas = df[[vistas.get(c) != int(n) for c, n in zip(df['causa'], df['nivel'])]]
+    print(f"   Etiquetas nuevas o modificadas: {len(nuevas):,}")
+
+    historial = estado['historial']
+    ultimo_completo = next((h for h in reversed(historial) if h['tipo'] == 'completo'), None)
+    versiones_desde_completo = (
+        estado['version'] - ultimo_completo['version'] if ultimo_completo else None
+    )
+    completo = (
+        forzar_completo
+        or ultimo_completo is None
+        or versiones_desde_completo >= REENTRENAMIENTO_PERIODICO
+    )
+
+    if len(nuevas) == 0 and not forzar_completo:
+        print("\n   No hay etiquetas nuevas; el modelo está al día.")
+        return
+
+    # 2. Vectorizar (sin ajuste: espacio de hashing fijo)
+    print("\n[2/5] Vectorizando con hashing...")
+    vectorizer = crear_vectorizador()
+    df_train = df[~df['test']]
+    df_test = df[df['test']]
+    X_test = vectorizer.transform(df_test['causa'].values)
+    y_test = df_test['nivel'].values
+    y_acumulado = df_train['nivel'].values
+    print(f"   Train: {len(df_train):,} | Test: {len(df_test):,}")
+
+    # 3. Actualizar modelo
+    version = estado['version'] + 1
+    if completo:
+        print(f"\n[3/5] Reentrenamiento completo ({EPOCAS_COMPLETAS} épocas)...")
+        modelo = crear_modelo()
+        X_train = vectorizer.transform(df_train['causa'].values)
+        ajustar(modelo, X_train, df_train['nivel'].values, y_acumulado,
+                EPOCAS_COMPLETAS, semilla=version)
+    else:
+        print(f"\n[3/5] Actualización incremental ({EPOCAS_INCREMENTALES} épocas)...")
+        modelo = joblib.load(MODEL_DIR / f"v{estado['version']:03d}.joblib")
+        nuevas_train = nuevas[~nuevas['test']]
+        if len(nuevas_train) > 0:
+            X_nuevas = vectorizer.transform(nuevas_train['causa'].values)
+            ajustar(modelo, X_nuevas, nuevas_train['nivel'].values, y_acumulado,
+                    EPOCAS_INCREMENTALES, semilla=version)
+        print(f"   Etiquetas aplicadas al modelo: {len(nuevas_train):,}")
+
+    # 4. Evaluar contra el mismo test set que el último reentrenamiento completo
+    print("\n[4/5] Evaluando...")
+    metricas = evaluar(modelo, X_test, y_test)
+    print(f"   Accuracy: {metricas['accuracy']:.4f}")
+    print(f"   F1-macro: {metricas['f1_macro']:.4f}")
+
+    metricas_referencia = {}
+    if completo:
+        metricas_referencia = {'version': version, **metricas}
+    elif ultimo_completo is not None:
+        modelo_ref = joblib.load(MODEL_DIR / f"v{ultimo_completo['version']:03d}.joblib")
+        metricas_referencia = {'version': ultimo_completo['version'],
+                               **evaluar(modelo_ref, X_test, y_test)}
+        print(f"   F1-macro último completo (v{ultimo_completo['version']:03d}): "
+              f"{metricas_referencia['f1_macro']:.4f}")
+
+    # 5. Guardar versión, estado y reporte
+    print("\n[5/5] Guardando versión...")
+    ruta_modelo = MODEL_DIR / f"v{version:03d}.joblib"
+    joblib.dump(modelo, ruta_modelo)
+
+    for causa, nivel in zip(nuevas['causa'], nuevas['nivel']):
+        vistas[causa] = int(nivel)
+    historial.append({
+        'version': version,
+        'tipo': 'completo' if completo else 'incremental',
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'etiquetas_nuevas': int(len(nuevas)),
+        'train_size': int(len(df_train)),
+        'test_size': int(len(df_test)),
+        'accuracy': metricas['accuracy'],
+        'f1_macro': metricas['f1_macro'],
+        'delta_f1_vs_completo': (
+            None if completo else metricas['f1_macro'] - metricas_referencia.get('f1_macro', np.nan)
+        )
+    })
+    estado['version'] = version
+    guardar_estado(estado)
+    print(f"   ✓ Modelo: {ruta_modelo}")
+    print(f"   ✓ Estado: {ESTADO_FILE}")
+
+    reporte = generar_reporte(estado, metricas_referencia)
+    reporte_file = REPORT_DIR / "reporte_incremental.txt"
+    with open(reporte_file, 'w', encoding='utf-8') as f:
+        f.write(reporte)
+    print(f"   ✓ Reporte: {reporte_file}")
+
+    print("\n" + "=" * 80)
+    print(f"✓ VERSIÓN v{version:03d} LISTA ({'completo' if completo else 'incremental'})")
+    print("=" * 80)
+
+
+if __name__ == "__main__":
+    main()
@@ -53,7 +53,9 @@ df_otras = df[df['confianza'] != 'alta'].copy()
 print(f"   Registros alta confianza: {len(df_alta)}")
 print(f"   Registros media/baja confianza: {len(df_otras)}")
 
-X = df_alta['causa'].values
+# Con pandas 3, .values de una columna de texto es un arreglo de Arrow que
+# train_test_split no puede indexar; se pide un ndarray de objetos
+X = df_alta['causa'].to_numpy(dtype=object)
 y = df_alta['nivel'].values
 
 # Split estratificado
@@ -132,7 +134,7 @@ for i, row in enumerate(cm):
 # Evaluar también en registros de media/baja confianza
 if len(df_otras) > 0:
     print(f"\n   === EVALUACIÓN EN REGISTROS MEDIA/BAJA CONFIANZA ===")
-    X_otras_tfidf = vectorizer.transform(df_otras['causa'].values)
+    X_otras_tfidf = vectorizer.transform(df_otras['causa'].to_numpy(dtype=object))
     y_otras_pred = modelo.predict(X_otras_tfidf)
     y_otras_real = df_otras['nivel'].values
     acc_otras = accuracy_score(y_otras_real, y_otras_pred)
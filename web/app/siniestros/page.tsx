@@ -8,6 +8,7 @@ import {
   Activity,
   Filter,
   RefreshCw,
+  AlertCircle,
 } from 'lucide-react'
 import {
   LineChart,
@@ -32,6 +33,13 @@ import {
   formatearFrecuencia,
   abreviarNumero,
 } from '@/lib/constants'
+import {
+  cargarResumenSiniestros,
+  cargarFilasFiltradas,
+  calcularMetricas,
+  type ResumenSiniestrosPorAnio,
+} from '@/lib/siniestros-por-anio'
+import BuscadorCausas from '@/components/siniestros/buscador-causas'
 import type {
   SiniestroAgregado,
   ResumenGeneral,
@@ -39,8 +47,7 @@ import type {
   FiltrosSiniestros,
 } from '@/types'
 
-// Importar datos JSON estáticamente
-import siniestrosData from '@/data/siniestros-agregados.json'
+// Importar datos JSON estáticamente (los siniestros se cargan por año)
 import resumenData from '@/data/resumen-general.json'
 import primasData from '@/data/primas-nivel-edad.json'
 
@@ -52,7 +59,19 @@ import primasData from '@/data/primas-nivel-edad.json'
  * - Filtros interactivos (edad, año, sexo, nivel)
  * - Tabla de datos agregados
  * - Gráficos de frecuencia, severidad y distribución
+ * - Buscador de causas con su nivel
+ *
+ * Las métricas salen del resumen acumulado de public/siniestros/ y la
+ * tabla descarga solo los años que necesita (lib/siniestros-por-anio).
  */
+
+// Renglones que muestra la tabla
+const FILAS_TABLA = 50
+
+function mensajeDeError(error: unknown): string {
+  return error instanceof Error ? error.message : String(error)
+}
+
 export default function SiniestrosPage() {
   // Estado de filtros
   const [filtros, setFiltros] = useState<FiltrosSiniestros>({
@@ -66,32 +85,52 @@ export default function SiniestrosPage() {
   })
 
   // Datos tipados
-  const siniestros = siniestrosData as SiniestroAgregado[]
   const resumen = resumenData as ResumenGeneral
   const primas = primasData as PrimaNivelEdad[]
 
-  // Filtrar datos según selección
-  const datosFiltrados = useMemo(() => {
-    return siniestros.filter((s) => {
-      if (!filtros.anios.includes(s.anio)) return false
-      if (s.edad < filtros.edadMin || s.edad > filtros.edadMax) return false
-      if (filtros.sexo !== 'Todos' && s.sexo !== filtros.sexo) return false
-      if (!filtros.niveles.includes(s.nivel)) return false
-      return true
-    })
-  }, [siniestros, filtros])
+  // Resumen acumulado por año (una descarga) y renglones de la tabla
+  const [resumenAnual, setResumenAnual] = useState<ResumenSiniestrosPorAnio | null>(null)
+  const [datosTabla, setDatosTabla] = useState<SiniestroAgregado[]>([])
+  const [errorCarga, setErrorCarga] = useState<string | null>(null)
+
+  // Sin datos las métricas quedarían en cero: el error se muestra en pantalla
+  useEffect(() => {
+    cargarResumenSiniestros()
+      .then(setResumenAnual)
+      .catch((error) => {
+        console.error(error)
+        setErrorCarga(mensajeDeError(error))
+      })
+  }, [])
+
+  // Solo se descargan los años necesarios para llenar la tabla
+  useEffect(() => {
+    let vigente = true
+    cargarFilasFiltradas(filtros, FILAS_TABLA)
+      .then((filas) => {
+        if (vigente) setDatosTabla(filas)
+      })
+      .catch((error) => {
+        console.error(error)
+        if (vigente) setErrorCarga(mensajeDeError(error))
+      })
+    return () => {
+      vigente = false
+    }
+  }, [filtros])
 
   // Calcular métricas filtradas
   const metricas = useMemo(() => {
-    const totalSiniestros = datosFiltrados.reduce((sum, s) => sum + s.num_siniestros, 0)
-    const montoTotal = datosFiltrados.reduce((sum, s) => sum + s.monto_ajustado, 0)
-    const montoPromedio = totalSiniestros > 0 ? montoTotal / totalSiniestros : 0
+    const calculadas = resumenAnual ? calcularMetricas(resumenAnual, filtros) : null
+    const totalSiniestros = calculadas?.totalSiniestros ?? 0
+    const montoTotal = calculadas?.montoTotal ?? 0
+    const montoPromedio = calculadas?.montoPromedio ?? 0
+    const registros = calculadas?.registros ?? 0
 
     // Distribución por nivel
     const porNivel = [1, 2, 3].map((nivel) => {
-      const datos = datosFiltrados.filter((s) => s.nivel === nivel)
-      const siniestros = datos.reduce((sum, s) => sum + s.num_siniestros, 0)
-      const monto = datos.reduce((sum, s) => sum + s.monto_ajustado, 0)
+      const siniestros = calculadas?.porNivel[nivel]?.siniestros ?? 0
+      const monto = calculadas?.porNivel[nivel]?.monto ?? 0
       return {
         nivel,
         descripcion: NIVEL_LABELS[nivel],
@@ -101,8 +140,8 @@ export default function SiniestrosPage() {
       }
     })
 
-    return { totalSiniestros, montoTotal, montoPromedio, porNivel }
-  }, [datosFiltrados])
+    return { totalSiniestros, montoTotal, montoPromedio, registros, porNivel }
+  }, [resumenAnual, filtros])
 
   // Datos para gráfico de líneas (frecuencia por edad)
   const datosGraficoEdad = useMemo(() => {
@@ -158,6 +197,17 @@ export default function SiniestrosPage() {
         </p>
       </div>
 
+      {/* Error de carga */}
+      {errorCarga && (
+        <div className="card card-body mb-8 border-red-200 bg-red-50">
+          <div className="flex items-center gap-2 text-red-700">
+            <AlertCircle className="w-5 h-5" />
+            <span className="font-semibold">{UI_LABELS.tabla.error}</span>
+          </div>
+          <p className="text-sm text-red-600 mt-1">{errorCarga}</p>
+        </div>
+      )}
+
       {/* Filtros */}
       <div className="card mb-8">
         <div className="card-header flex items-center justify-between">
@@ -523,12 +573,15 @@ export default function SiniestrosPage() {
         </div>
       </div>
 
+      {/* Búsqueda de causas */}
+      <BuscadorCausas />
+
       {/* Tabla de datos */}
       <div className="card">
         <div className="card-header">
           <h3 className="font-semibold text-gray-900">Datos Agregados</h3>
           <p className="text-sm text-gray-500">
-            Mostrando {Math.min(datosFiltrados.length, 50)} de {datosFiltrados.length} registros
+            Mostrando {datosTabla.length} de {metricas.registros} registros
           </p>
         </div>
         <div className="overflow-x-auto">
@@ -545,7 +598,7 @@ export default function SiniestrosPage() {
               </tr>
             </thead>
             <tbody>
-              {datosFiltrados.slice(0, 50).map((row, i) => (
+              {datosTabla.map((row, i) => (
                 <tr key={i} className="hover:bg-gray-50">
                   <td>{row.anio}</td>
                   <td>{row.edad}</td>
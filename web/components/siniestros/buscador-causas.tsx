@@ -0,0 +1,105 @@
+'use client'
+
+import { useState, useEffect } from 'react'
+import { Search, AlertCircle } from 'lucide-react'
+import { UI_LABELS, NIVEL_LABELS, formatearNumero } from '@/lib/constants'
+import { buscarCausas, type CausaEncontrada } from '@/lib/busqueda-causas'
+
+// Espera tras la última tecla antes de buscar (ms)
+const ESPERA_BUSQUEDA = 200
+const MAX_RESULTADOS = 10
+
+/**
+ * Buscador de causas por prefijo
+ *
+ * Consulta el índice fragmentado de public/indice-causas/ (lib/busqueda-causas):
+ * cada término descarga solo el fragmento de su prefijo.
+ */
+export default function BuscadorCausas() {
+  const [consulta, setConsulta] = useState('')
+  const [resultados, setResultados] = useState<CausaEncontrada[]>([])
+  const [buscando, setBuscando] = useState(false)
+  const [error, setError] = useState(false)
+
+  useEffect(() => {
+    if (!consulta.trim()) {
+      setResultados([])
+      setError(false)
+      return
+    }
+    let vigente = true
+    const temporizador = setTimeout(() => {
+      setBuscando(true)
+      buscarCausas(consulta, MAX_RESULTADOS)
+        .then((encontradas) => {
+          if (!vigente) return
+          setResultados(encontradas)
+          setError(false)
+        })
+        .catch((e) => {
+          console.error(e)
+          if (vigente) setError(true)
+        })
+        .finally(() => {
+          if (vigente) setBuscando(false)
+        })
+    }, ESPERA_BUSQUEDA)
+    return () => {
+      vigente = false
+      clearTimeout(temporizador)
+    }
+  }, [consulta])
+
+  return (
+    <div className="card mb-8">
+      <div className="card-header">
+        <h3 className="font-semibold text-gray-900">{UI_LABELS.busquedaCausas.titulo}</h3>
+        <p className="text-sm text-gray-500">{UI_LABELS.busquedaCausas.subtitulo}</p>
+      </div>
+      <div className="card-body">
+        <div className="relative max-w-xl">
+          <Search className="w-4 h-4 text-gray-400 absolute left-3 top-1/2 -translate-y-1/2" />
+          <input
+            type="search"
+            value={consulta}
+            onChange={(e) => setConsulta(e.target.value)}
+            placeholder={UI_LABELS.busquedaCausas.placeholder}
+            className="w-full pl-9"
+          />
+        </div>
+
+        {error ? (
+          <div className="flex items-center gap-2 mt-4 text-sm text-red-600">
+            <AlertCircle className="w-4 h-4" />
+            {UI_LABELS.busquedaCausas.error}
+          </div>
+        ) : consulta.trim() && !buscando && resultados.length === 0 ? (
+          <p className="mt-4 text-sm text-gray-500">{UI_LABELS.busquedaCausas.sinResultados}</p>
+        ) : resultados.length > 0 ? (
+          <div className="overflow-x-auto mt-4">
+            <table>
+              <thead>
+                <tr>
+                  <th>{UI_LABELS.filtros.causa}</th>
+                  <th>{UI_LABELS.tabla.columnas.nivel}</th>
+                  <th className="text-right">{UI_LABELS.tabla.columnas.numSiniestros}</th>
+                </tr>
+              </thead>
+              <tbody>
+                {resultados.map((r) => (
+                  <tr key={r.id} className="hover:bg-gray-50">
+                    <td>{r.causa}</td>
+                    <td>
+                      <span className={`badge-nivel-${r.nivel}`}>{NIVEL_LABELS[r.nivel]}</span>
+                    </td>
+                    <td className="text-right">{formatearNumero(r.frecuencia)}</td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+          </div>
+        ) : null}
+      </div>
+    </div>
+  )
+}
@@ -0,0 +1,72 @@
+/**
+ * Cliente de la API local de consultas (scripts/query_api.py)
+ *
+ * Para cortes ad hoc (por causa, entidad o tipo de seguro) que
+ * prepare-data.py no pre-calcula. La URL base se toma de
+ * NEXT_PUBLIC_API_CONSULTAS (por defecto http://127.0.0.1:8000).
+ */
+
+const API_CONSULTAS = process.env.NEXT_PUBLIC_API_CONSULTAS ?? 'http://127.0.0.1:8000'
+
+export type DimensionConsulta =
+  | 'anio'
+  | 'edad'
+  | 'sexo'
+  | 'entidad'
+  | 'tipo_seguro'
+  | 'nivel'
+  | 'causa'
+
+export interface ConsultaSiniestros {
+  agrupar?: DimensionConsulta[]
+  /** Valores aceptados; en anio/edad/nivel también rangos '30-45' */
+  filtros?: Partial<Record<DimensionConsulta, (string | number)[]>>
+  causaContiene?: string
+  /** Medida o dimensión; prefijo '-' para orden descendente */
+  ordenar?: string
+  limite?: number
+}
+
+export interface FilaConsulta {
+  [dimension: string]: string | number | null
+  filas: number
+  num_siniestros: number
+  monto_pagado: number
+  monto_ajustado: number
+  severidad: number | null
+}
+
+export interface ResultadoConsulta {
+  agrupar: DimensionConsulta[]
+  grupos: number
+  devueltos: number
+  filas: FilaConsulta[]
+}
+
+/**
+ * Agrega siniestros por las dimensiones indicadas
+ *
+ * @example
+ * await consultarSiniestros({ agrupar: ['entidad'], filtros: { nivel: [3] }, ordenar: '-monto_ajustado' })
+ */
+export async function consultarSiniestros(
+  consulta: ConsultaSiniestros,
+  opciones: RequestInit = {}
+): Promise<ResultadoConsulta> {
+  const parametros = new URLSearchParams()
+  if (consulta.agrupar?.length) parametros.set('agrupar', consulta.agrupar.join(','))
+  for (const [dimension, valores] of Object.entries(consulta.filtros ?? {})) {
+    // Un parámetro por valor: las causas pueden llevar comas
+    for (const valor of valores ?? []) parametros.append(dimension, String(valor))
+  }
+  if (consulta.causaContiene) parametros.set('causa_contiene', consulta.causaContiene)
+  if (consulta.ordenar) parametros.set('ordenar', consulta.ordenar)
+  if (consulta.limite !== undefined) parametros.set('limite', String(consulta.limite))
+
+  const respuesta = await fetch(`${API_CONSULTAS}/api/siniestros?${parametros}`, opciones)
+  if (!respuesta.ok) {
+    const detalle = await respuesta.json().catch(() => ({}))
+    throw new Error(detalle.error ?? `Error de la API de consultas: ${respuesta.status}`)
+  }
+  return respuesta.json()
+}
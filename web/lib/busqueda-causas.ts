@@ -0,0 +1,145 @@
+/**
+ * Búsqueda de causas por prefijo sobre el índice fragmentado
+ *
+ * prepare-data.py escribe en public/indice-causas/ un manifiesto
+ * (indice.json) y un fragmento por prefijo de palabra (p. ej. hi.json).
+ * Cada búsqueda descarga solo el fragmento del término que se escribe
+ * (una vez; después queda en memoria) y devuelve las k causas más
+ * frecuentes sin recorrer el listado completo.
+ */
+
+import type { CausaClasificada } from '@/types'
+
+// ============================================
+// TIPOS DEL ÍNDICE
+// ============================================
+
+export interface CausaEncontrada extends CausaClasificada {
+  id: number
+}
+
+interface ManifiestoIndice {
+  version: number
+  causas: number
+  longitud_prefijo: number
+  palabras_vacias: string[]
+  fragmentos: Record<string, number>
+}
+
+/** [id, causa, nivel, frecuencia], en orden de frecuencia descendente */
+type FilaCausa = [number, string, number, number]
+
+interface FragmentoIndice {
+  prefijo: string
+  causas: FilaCausa[]
+  /** [palabra, índices en causas], ordenadas por palabra */
+  palabras: [string, number[]][]
+}
+
+const RUTA_INDICE = '/indice-causas'
+
+let manifiesto: Promise<ManifiestoIndice> | null = null
+const fragmentos = new Map<string, Promise<FragmentoIndice>>()
+
+// ============================================
+// CARGA
+// ============================================
+
+async function cargarJson<T>(archivo: string): Promise<T> {
+  const respuesta = await fetch(`${RUTA_INDICE}/${archivo}`)
+  if (!respuesta.ok) {
+    throw new Error(`No se pudo cargar ${archivo}: ${respuesta.status}`)
+  }
+  return respuesta.json()
+}
+
+function cargarManifiesto(): Promise<ManifiestoIndice> {
+  if (!manifiesto) {
+    manifiesto = cargarJson<ManifiestoIndice>('indice.json').catch((error) => {
+      manifiesto = null // Reintentar en la siguiente búsqueda
+      throw error
+    })
+  }
+  return manifiesto
+}
+
+function cargarFragmento(prefijo: string): Promise<FragmentoIndice> {
+  let fragmento = fragmentos.get(prefijo)
+  if (!fragmento) {
+    fragmento = cargarJson<FragmentoIndice>(`${prefijo}.json`).catch((error) => {
+      fragmentos.delete(prefijo)
+      throw error
+    })
+    fragmentos.set(prefijo, fragmento)
+  }
+  return fragmento
+}
+
+// ============================================
+// BÚSQUEDA
+// ============================================
+
+/**
+ * Minúsculas sin acentos y con solo [a-z0-9] separados por espacios
+ * (misma regla que normalizar_texto en prepare-data.py)
+ */
+export function normalizarTexto(texto: string): string {
+  return texto
+    .normalize('NFKD')
+    .replace(/[\u0300-\u036f]/g, '')
+    .toLowerCase()
+    .replace(/[^a-z0-9]+/g, ' ')
+    .trim()
+}
+
+/** Primera posición con palabra >= prefijo (búsqueda binaria) */
+function primeraPosicion(palabras: [string, number[]][], prefijo: string): number {
+  let inicio = 0
+  let fin = palabras.length
+  while (inicio < fin) {
+    const medio = (inicio + fin) >> 1
+    if (palabras[medio][0] < prefijo) inicio = medio + 1
+    else fin = medio
+  }
+  return inicio
+}
+
+/**
+ * Las k causas más frecuentes cuyas palabras empiezan con cada término
+ * de la consulta.
+ *
+ * @example
+ * await buscarCausas('diab tipo 2') // DIABETES MELLITUS TIPO 2, ...
+ */
+export async function buscarCausas(consulta: string, k = 10): Promise<CausaEncontrada[]> {
+  const indice = await cargarManifiesto()
+  const terminos = normalizarTexto(consulta).split(' ').filter(Boolean)
+
+  // El término más largo elige el fragmento; los demás solo filtran
+  const guia = terminos
+    .filter((t) => t.length >= indice.longitud_prefijo && t.slice(0, indice.longitud_prefijo) in indice.fragmentos)
+    .sort((a, b) => b.length - a.length)[0]
+  if (!guia) return []
+
+  const fragmento = await cargarFragmento(guia.slice(0, indice.longitud_prefijo))
+  const candidatas = new Uint8Array(fragmento.causas.length)
+  for (let i = primeraPosicion(fragmento.palabras, guia); i < fragmento.palabras.length; i++) {
+    const [palabra, posiciones] = fragmento.palabras[i]
+    if (!palabra.startsWith(guia)) break
+    for (const posicion of posiciones) candidatas[posicion] = 1
+  }
+
+  const resto = terminos.filter((t, i) => i !== terminos.indexOf(guia))
+  const resultados: CausaEncontrada[] = []
+  // Las causas del fragmento ya vienen por frecuencia descendente
+  for (let i = 0; i < candidatas.length && resultados.length < k; i++) {
+    if (!candidatas[i]) continue
+    const [id, causa, nivel, frecuencia] = fragmento.causas[i]
+    if (resto.length) {
+      const palabras = normalizarTexto(causa).split(' ')
+      if (!resto.every((t) => palabras.some((p) => p.startsWith(t)))) continue
+    }
+    resultados.push({ id, causa, nivel, frecuencia })
+  }
+  return resultados
+}
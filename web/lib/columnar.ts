@@ -0,0 +1,79 @@
+/**
+ * Decodificador del formato columnar compacto
+ *
+ * prepare-data.py --columnar escribe en public/data/ una variante
+ * <archivo>.col.json de cada tabla (con .gz/.br precomprimidos).
+ * Aquí se reconstruyen los mismos registros que el JSON por filas,
+ * p. ej. decodificarColumnar<SiniestroAgregado>(datos).
+ */
+
+// ============================================
+// TIPOS DEL FORMATO
+// ============================================
+
+/** Texto repetido: valor = diccionario[codigo] */
+export interface ColumnaDiccionario {
+  diccionario: string[]
+  codigos: number[]
+}
+
+/** Montos como enteros: valor = entero / escala */
+export interface ColumnaEscalada {
+  escala: number
+  valores: number[]
+}
+
+export type Columna = (string | number | null)[] | ColumnaDiccionario | ColumnaEscalada
+
+export interface DatosColumnares {
+  formato: 'columnar'
+  version: number
+  filas: number
+  columnas: Record<string, Columna>
+}
+
+// ============================================
+// DECODIFICACIÓN
+// ============================================
+
+function valoresColumna(columna: Columna): (string | number | null)[] {
+  if (Array.isArray(columna)) return columna
+  if ('diccionario' in columna) {
+    const { diccionario, codigos } = columna
+    return codigos.map((codigo) => diccionario[codigo])
+  }
+  const { escala, valores } = columna
+  return valores.map((valor) => valor / escala)
+}
+
+/**
+ * Reconstruye los registros (objetos por fila) de una tabla columnar
+ */
+export function decodificarColumnar<T>(datos: DatosColumnares): T[] {
+  const nombres = Object.keys(datos.columnas)
+  const columnas = nombres.map((nombre) => valoresColumna(datos.columnas[nombre]))
+
+  const registros = new Array<T>(datos.filas)
+  for (let i = 0; i < datos.filas; i++) {
+    const registro: Record<string, string | number | null> = {}
+    for (let j = 0; j < nombres.length; j++) {
+      registro[nombres[j]] = columnas[j][i]
+    }
+    registros[i] = registro as T
+  }
+  return registros
+}
+
+/**
+ * Descarga y decodifica una tabla columnar de public/data/
+ *
+ * @example
+ * const siniestros = await cargarColumnar<SiniestroAgregado>('siniestros-agregados')
+ */
+export async function cargarColumnar<T>(nombre: string): Promise<T[]> {
+  const respuesta = await fetch(`/data/${nombre}.col.json`)
+  if (!respuesta.ok) {
+    throw new Error(`No se pudo cargar ${nombre}: ${respuesta.status}`)
+  }
+  return decodificarColumnar<T>(await respuesta.json())
+}
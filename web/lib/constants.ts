@@ -111,6 +111,16 @@ export const UI_LABELS = {
     },
     sinDatos: 'No hay datos para los filtros seleccionados',
     cargando: 'Cargando datos...',
+    error: 'No se pudieron cargar los datos de siniestros',
+  },
+
+  // Búsqueda de causas
+  busquedaCausas: {
+    titulo: 'Buscar Causa',
+    subtitulo: 'Nivel asignado a cada causa, por frecuencia en la base',
+    placeholder: 'Ej. diab tipo 2, fractura, apendicitis...',
+    sinResultados: 'Ninguna causa coincide con la búsqueda',
+    error: 'No se pudo cargar el índice de causas',
   },
 
   // Gráficos
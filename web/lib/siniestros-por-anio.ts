@@ -0,0 +1,158 @@
+/**
+ * Siniestros agregados por año, cargados bajo demanda
+ *
+ * prepare-data.py escribe en public/siniestros/:
+ * - resumen.json: totales acumulados por edad a lo largo de
+ *   (año, sexo, nivel); las métricas de cualquier filtro salen de aquí
+ *   sin descargar renglones
+ * - <anio>.col.json: renglones del año en formato columnar, que se
+ *   descargan solo cuando la tabla los necesita (una vez por año)
+ */
+
+import { decodificarColumnar, type DatosColumnares } from '@/lib/columnar'
+import type { SiniestroAgregado, FiltrosSiniestros } from '@/types'
+
+// ============================================
+// TIPOS
+// ============================================
+
+/** Acumulados de forma [anio][sexo][nivel][edad - edad_min + 1] */
+type Acumulado = number[][][][]
+
+export interface ResumenSiniestrosPorAnio {
+  version: number
+  anios: number[]
+  sexos: string[]
+  niveles: number[]
+  edad_min: number
+  edad_max: number
+  archivos: Record<string, string>
+  acumulados: {
+    filas: Acumulado
+    num_siniestros: Acumulado
+    monto_ajustado: Acumulado
+  }
+}
+
+export interface MetricasSiniestros {
+  totalSiniestros: number
+  montoTotal: number
+  montoPromedio: number
+  /** Renglones de la tabla que cumplen el filtro */
+  registros: number
+  porNivel: Record<number, { siniestros: number; monto: number }>
+}
+
+const RUTA_SINIESTROS = '/siniestros'
+
+let resumen: Promise<ResumenSiniestrosPorAnio> | null = null
+const anios = new Map<number, Promise<SiniestroAgregado[]>>()
+
+// ============================================
+// CARGA
+// ============================================
+
+async function cargarJson<T>(archivo: string): Promise<T> {
+  const respuesta = await fetch(`${RUTA_SINIESTROS}/${archivo}`)
+  if (!respuesta.ok) {
+    throw new Error(`No se pudo cargar ${archivo}: ${respuesta.status}`)
+  }
+  return respuesta.json()
+}
+
+export function cargarResumenSiniestros(): Promise<ResumenSiniestrosPorAnio> {
+  if (!resumen) {
+    resumen = cargarJson<ResumenSiniestrosPorAnio>('resumen.json').catch((error) => {
+      resumen = null // Reintentar en la siguiente carga
+      throw error
+    })
+  }
+  return resumen
+}
+
+export async function cargarSiniestrosAnio(anio: number): Promise<SiniestroAgregado[]> {
+  let filas = anios.get(anio)
+  if (!filas) {
+    filas = cargarResumenSiniestros()
+      .then((r) => cargarJson<DatosColumnares>(r.archivos[anio]))
+      .then((datos) => decodificarColumnar<SiniestroAgregado>(datos))
+      .catch((error) => {
+        anios.delete(anio)
+        throw error
+      })
+    anios.set(anio, filas)
+  }
+  return filas
+}
+
+// ============================================
+// CONSULTAS
+// ============================================
+
+/**
+ * Métricas del filtro (sin renglones): cada rango de edad es la resta
+ * de dos acumulados
+ */
+export function calcularMetricas(
+  resumen: ResumenSiniestrosPorAnio,
+  filtros: FiltrosSiniestros
+): MetricasSiniestros {
+  const desde = Math.max(filtros.edadMin, resumen.edad_min) - resumen.edad_min
+  const hasta = Math.min(filtros.edadMax, resumen.edad_max) - resumen.edad_min + 1
+  const { filas, num_siniestros, monto_ajustado } = resumen.acumulados
+
+  const porNivel: MetricasSiniestros['porNivel'] = {}
+  let registros = 0
+  resumen.niveles.forEach((nivel) => (porNivel[nivel] = { siniestros: 0, monto: 0 }))
+
+  if (hasta > desde) {
+    resumen.anios.forEach((anio, a) => {
+      if (!filtros.anios.includes(anio)) return
+      resumen.sexos.forEach((sexo, s) => {
+        if (filtros.sexo !== 'Todos' && sexo !== filtros.sexo) return
+        resumen.niveles.forEach((nivel, n) => {
+          if (!filtros.niveles.includes(nivel)) return
+          registros += filas[a][s][n][hasta] - filas[a][s][n][desde]
+          porNivel[nivel].siniestros += num_siniestros[a][s][n][hasta] - num_siniestros[a][s][n][desde]
+          porNivel[nivel].monto += monto_ajustado[a][s][n][hasta] - monto_ajustado[a][s][n][desde]
+        })
+      })
+    })
+  }
+
+  const totales = Object.values(porNivel)
+  const totalSiniestros = totales.reduce((sum, n) => sum + n.siniestros, 0)
+  const montoTotal = totales.reduce((sum, n) => sum + n.monto, 0)
+  return {
+    totalSiniestros,
+    montoTotal,
+    montoPromedio: totalSiniestros > 0 ? montoTotal / totalSiniestros : 0,
+    registros,
+    porNivel,
+  }
+}
+
+/**
+ * Primeros `limite` renglones del filtro, en orden de año; descarga solo
+ * los años necesarios para llenarlos
+ */
+export async function cargarFilasFiltradas(
+  filtros: FiltrosSiniestros,
+  limite: number
+): Promise<SiniestroAgregado[]> {
+  const disponibles = (await cargarResumenSiniestros()).anios
+  const resultado: SiniestroAgregado[] = []
+
+  for (const anio of [...filtros.anios].sort((a, b) => a - b)) {
+    if (resultado.length >= limite) break
+    if (!disponibles.includes(anio)) continue
+    for (const s of await cargarSiniestrosAnio(anio)) {
+      if (s.edad < filtros.edadMin || s.edad > filtros.edadMax) continue
+      if (filtros.sexo !== 'Todos' && s.sexo !== filtros.sexo) continue
+      if (!filtros.niveles.includes(s.nivel)) continue
+      resultado.push(s)
+      if (resultado.length >= limite) break
+    }
+  }
+  return resultado
+}
@@ -3,20 +3,71 @@
 Script de preparación de datos para el frontend del explorador de siniestros.
 
 Este script transforma los datos de siniestros (1.97M filas) en archivos JSON
-agregados y optimizados para el dashboard web.
+agregados y optimizados para el dashboard web. Las agregaciones parten del cubo
+pre-agregado de scripts/build_cube.py (se reconstruye si cambiaron los insumos).
+
+Los cubos se recorren una sola vez: se reducen a un intermedio al grano del
+dashboard (siniestros ANIO × EDAD × SEXO × NIVEL, pólizas ANIO × EDAD × SEXO) y
+todas las salidas se derivan de ese intermedio. Al final se reporta el tiempo y
+la memoria pico (tracemalloc) de cada salida.
 
 Archivos generados:
 - siniestros-agregados.json: Agregación por (ANIO, EDAD, SEXO, NIVEL)
 - clasificacion.json: Mapeo de causas a niveles para dropdown
 - primas-nivel-edad.json: Matriz de primas por nivel y edad
 - resumen-general.json: Estadísticas globales para tarjetas
+- polizas-agregadas.json: Asegurados y primas por (ANIO, EDAD, SEXO)
+- polizas-resumen-anual.json: Totales de pólizas por año
+- polizas-por-banda.json: Asegurados y primas por banda de edad
+
+Con --columnar se escribe además, en web/public/data/, una variante compacta de
+cada archivo con sus versiones precomprimidas (.gz y, si está instalado el
+paquete brotli, .br) para servirlas con gzip_static/brotli_static o un CDN:
+- <archivo>.col.json: tablas en columnas (ver codificar_columnar; el
+  decodificador para el navegador está en web/lib/columnar.ts)
+- <archivo>.min.json: objetos (resumen-general) sin sangría
+Al final se comparan tamaños y tiempo de lectura de cada formato.
+
+Además se construye un índice de búsqueda de causas en web/public/indice-causas/
+(ver construir_indice_causas; el cliente está en web/lib/busqueda-causas.ts):
+el navegador descarga solo el fragmento del prefijo que se escribe en lugar de
+recorrer clasificacion.json completo.
+
+Los siniestros agregados se publican también por año en web/public/siniestros/
+(ver preparar_siniestros_por_anio): un resumen acumulado por edad para las
+métricas con cualquier filtro y un archivo columnar por año que el explorador
+descarga solo cuando lo necesita (web/lib/siniestros-por-anio.ts).
+
+Regeneración incremental: web/data/manifiesto.json guarda el SHA-256 de cada
+insumo (parquets consolidados, CSV de clasificación y de primas, factores de
+inflación y este script) y de cada salida. Una salida se regenera solo si
+cambió alguno de sus insumos o si el archivo ya no coincide con su hash, y un
+archivo se reescribe solo si su contenido cambió; así una corrida sin cambios
+no toca web/data (ni el manifiesto) ni invalida la caché del build de Next.js o
+del CDN. El manifiesto guarda solo hashes de contenido, sin fechas ni tamaños, para
+que dependa únicamente de los datos y pueda versionarse. El campo `generado` del
+resumen es la fecha de los insumos, no la de la corrida.
+
+Uso:
+    python web/scripts/prepare-data.py              # JSON por filas (web/data)
+    python web/scripts/prepare-data.py --columnar   # Además variantes compactas
+    python web/scripts/prepare-data.py --forzar     # Regenera aunque no haya cambios
 
 Autor: Sistema GMM CNSF
 Fecha: 2025-12-06
 """
 
 import pandas as pd
+import numpy as np
+import argparse
+import gzip
+import hashlib
 import json
+import re
+import sys
+import unicodedata
+import time
+import tracemalloc
 from pathlib import Path
 from datetime import datetime
 
@@ -24,6 +75,25 @@ from datetime import datetime
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / 'data'
 OUTPUT_DIR = Path(__file__).resolve().parent.parent / 'data'
+COMPACTO_DIR = Path(__file__).resolve().parent.parent / 'public' / 'data'
+INDICE_DIR = Path(__file__).resolve().parent.parent / 'public' / 'indice-causas'
+SINIESTROS_DIR = Path(__file__).resolve().parent.parent / 'public' / 'siniestros'
+MANIFIESTO_FILE = OUTPUT_DIR / 'manifiesto.json'
+PRIMAS_FILE = BASE_DIR / 'outputs' / 'tarificacion' / 'primas_por_nivel_edad.csv'
+
+try:
+    import brotli
+except ImportError:  # Opcional: sin brotli solo se emite .gz
+    brotli = None
+
+# Módulos compartidos del pipeline (scripts/)
+sys.path.insert(0, str(BASE_DIR / 'scripts'))
+from build_cube import (  # noqa: E402
+    cargar_cubo, cubo_web, centavos, ajustar_centavos, SINIESTROS_FILE, POLIZAS_FILE, CLASIFICACION_FILE,
+)
+from causa_catalog import CATALOGO_FILE  # noqa: E402
+from inflation_factors import FACTORES_FILE  # noqa: E402
+from calculate_tarificacion import EDAD_MIN, BANDA_POR_EDAD, ETIQUETAS_BANDA  # noqa: E402
 
 # Constantes de niveles (español)
 NIVEL_LABELS = {
@@ -32,28 +102,28 @@ NIVEL_LABELS = {
     3: 'Alta Especialidad'
 }
 
-# Factores de inflación médica (ajuste a pesos 2024)
-INFLACION_MEDICA = {
-    2020: 1.41,
-    2021: 1.30,
-    2022: 1.20,
-    2023: 1.10,
-    2024: 1.00
-}
 
+# Medidas del intermedio de pólizas (las de siniestros, en preparar_intermedio)
+MEDIDAS_POLIZAS = ['NUM_ASEGURADOS', 'PRIMA_EMITIDA', 'SUMA_ASEGURADA']
 
-def cargar_siniestros():
-    """Carga los siniestros consolidados."""
-    print("📂 Cargando siniestros.parquet...")
-    df = pd.read_parquet(DATA_DIR / 'consolidated' / 'siniestros.parquet')
-    print(f"   ✓ {len(df):,} filas cargadas")
-    return df
+
+def cargar_cubos():
+    """
+    Carga los cubos de siniestros (edades 25-70, monto ajustado a pesos 2024) y
+    de exposición. Los siniestros quedan en la convención del dashboard: causas
+    sin clasificar en nivel 1.
+    """
+    print("📂 Cargando cubos de siniestros y pólizas...")
+    cubo, exposicion, _ = cargar_cubo()
+    df = cubo_web(cubo)
+    print(f"   ✓ {len(df):,} celdas de siniestros, {len(exposicion):,} de pólizas")
+    return df, exposicion
 
 
 def cargar_clasificacion():
     """Carga el mapeo de causas a niveles."""
     print("📂 Cargando clasificación de causas...")
-    df = pd.read_csv(DATA_DIR / 'classified' / 'all_causes_classified.csv')
+    df = pd.read_csv(CLASIFICACION_FILE)
     print(f"   ✓ {len(df):,} causas clasificadas")
     return df
 
@@ -61,40 +131,29 @@ def cargar_clasificacion():
 def cargar_primas():
     """Carga las primas por nivel y edad (generadas en Fase 3)."""
     print("📂 Cargando primas por nivel y edad...")
-    primas_path = BASE_DIR / 'outputs' / 'tarificacion' / 'primas_por_nivel_edad.csv'
-    df = pd.read_csv(primas_path)
+    df = pd.read_csv(PRIMAS_FILE)
     print(f"   ✓ {len(df):,} registros de primas")
     return df
 
 
-def preparar_siniestros_agregados(siniestros, clasificacion):
+def preparar_siniestros_agregados(siniestros):
     """
     Agrega siniestros por (ANIO, EDAD, SEXO, NIVEL) para el dashboard.
 
-    Reduce 1.97M filas a ~5K filas agregadas, optimizado para filtros
-    interactivos sin necesidad de API backend.
+    Reduce el cubo (ANIO × EDAD × SEXO × ENTIDAD × NIVEL) a ~5K filas agregadas,
+    optimizado para filtros interactivos sin necesidad de API backend. Los montos
+    llegan en centavos enteros (ver preparar_intermedio).
     """
     print("\n🔧 Preparando siniestros agregados...")
 
-    # Filtrar edades válidas para tarificación (25-70)
-    df = siniestros[(siniestros['EDAD'] >= 25) & (siniestros['EDAD'] <= 70)].copy()
-    print(f"   - Filas con edad 25-70: {len(df):,}")
-
-    # Crear mapeo de causa a nivel
-    causa_nivel = dict(zip(clasificacion['causa'], clasificacion['nivel']))
-
-    # Asignar nivel (default 1 si no se encuentra)
-    df['NIVEL'] = df['CAUSA'].map(causa_nivel).fillna(1).astype(int)
-
-    # Ajustar monto por inflación
-    df['MONTO_AJUSTADO'] = df['MONTO_PAGADO'] * df['ANIO'].map(INFLACION_MEDICA)
-
     # Agregar por (ANIO, EDAD, SEXO, NIVEL)
-    agregado = df.groupby(['ANIO', 'EDAD', 'SEXO', 'NIVEL']).agg({
+    agregado = siniestros.groupby(['ANIO', 'EDAD', 'SEXO', 'NIVEL'], observed=True).agg({
         'NUM_SINIESTROS': 'sum',
-        'MONTO_PAGADO': 'sum',
-        'MONTO_AJUSTADO': 'sum'
+        'CENTAVOS_PAGADO': 'sum',
+        'CENTAVOS_AJUSTADO': 'sum'
     }).reset_index()
+    agregado['MONTO_PAGADO'] = agregado.pop('CENTAVOS_PAGADO') / 100
+    agregado['MONTO_AJUSTADO'] = agregado.pop('CENTAVOS_AJUSTADO') / 100
 
     # Calcular severidad promedio
     agregado['SEVERIDAD'] = agregado['MONTO_AJUSTADO'] / agregado['NUM_SINIESTROS']
@@ -121,12 +180,118 @@ def preparar_clasificacion_dropdown(clasificacion):
 
     df = clasificacion[['causa', 'nivel', 'frecuencia']].copy()
     df.columns = ['causa', 'nivel', 'frecuencia']
+    # Causas etiquetadas sin siniestros en la base: frecuencia 0 (NaN no es JSON válido)
+    df['frecuencia'] = df['frecuencia'].fillna(0)
     df = df.sort_values('frecuencia', ascending=False)
 
     print(f"   ✓ {len(df):,} causas preparadas")
     return df
 
 
+# =============================================================================
+# ÍNDICE DE BÚSQUEDA DE CAUSAS
+# =============================================================================
+
+# Los fragmentos se agrupan por los primeros caracteres de cada palabra
+LONGITUD_PREFIJO = 2
+
+# Palabras que no se indexan: artículos y preposiciones, y el relleno de la CIE
+# ("otros ... no especificados", "no clasificadas en otra parte")
+PALABRAS_VACIAS = {
+    'a', 'al', 'con', 'de', 'del', 'e', 'el', 'en', 'la', 'las', 'lo', 'los',
+    'o', 'por', 'que', 'sin', 'su', 'sus', 'u', 'un', 'una', 'y',
+    'clasificadas', 'clasificados', 'especificada', 'especificadas', 'especificado',
+    'especificados', 'no', 'otra', 'otras', 'otro', 'otros', 'parte',
+}
+
+
+def normalizar_texto(texto):
+    """
+    Minúsculas sin acentos y con solo [a-z0-9] separados por espacios
+    (misma regla que normalizarTexto en web/lib/busqueda-causas.ts).
+    """
+    texto = re.sub('[\u0300-\u036f]', '', unicodedata.normalize('NFKD', texto)).lower()
+    return re.sub('[^a-z0-9]+', ' ', texto).strip()
+
+
+def palabras_indexables(texto):
+    """Palabras distintas de una causa que entran al índice."""
+    return {p for p in normalizar_texto(texto).split()
+            if len(p) >= LONGITUD_PREFIJO and p not in PALABRAS_VACIAS}
+
+
+def construir_indice_causas(clasificacion, prefijos=None):
+    """
+    Índice invertido palabra → causas, fragmentado por los primeros
+    LONGITUD_PREFIJO caracteres de la palabra. Con prefijos, solo se construyen
+    esos fragmentos (re-tarificación incremental) y el manifiesto es parcial.
+
+    El id de cada causa es su posición en clasificacion (ya ordenada por
+    frecuencia descendente), así que el orden por id es el orden de relevancia.
+    Cada fragmento lleva las causas que referencia, en ese orden:
+
+        {"prefijo": "hi",
+         "causas": [[id, causa, nivel, frecuencia], ...],
+         "palabras": [["hipertension", [0, 4, ...]], ...]}   # ordenadas; índices locales
+
+    Returns:
+        (manifiesto, {prefijo: fragmento})
+    """
+    print("\n🔧 Construyendo índice de búsqueda de causas...")
+
+    registros = clasificacion[['causa', 'nivel', 'frecuencia']].itertuples(index=False)
+    por_prefijo = {}
+    for id_causa, (causa, nivel, frecuencia) in enumerate(registros):
+        fila = [id_causa, causa, int(nivel), float(frecuencia)]
+        for palabra in palabras_indexables(causa):
+            if prefijos is not None and palabra[:LONGITUD_PREFIJO] not in prefijos:
+                continue
+            por_prefijo.setdefault(palabra[:LONGITUD_PREFIJO], {}).setdefault(palabra, []).append(fila)
+
+    fragmentos = {}
+    for prefijo, palabras in sorted(por_prefijo.items()):
+        causas = sorted({fila[0]: fila for filas in palabras.values() for fila in filas}.values())
+        local = {fila[0]: i for i, fila in enumerate(causas)}
+        fragmentos[prefijo] = {
+            'prefijo': prefijo,
+            'causas': causas,
+            'palabras': [[palabra, [local[fila[0]] for fila in filas]]
+                         for palabra, filas in sorted(palabras.items())],
+        }
+
+    manifiesto = {
+        'version': 1,
+        'causas': len(clasificacion),
+        'longitud_prefijo': LONGITUD_PREFIJO,
+        'palabras_vacias': sorted(PALABRAS_VACIAS),
+        'fragmentos': {prefijo: len(f['causas']) for prefijo, f in fragmentos.items()},
+    }
+    mayor = max(manifiesto['fragmentos'].values(), default=0)
+    print(f"   ✓ {len(fragmentos):,} fragmentos (el mayor con {mayor:,} causas)")
+    return manifiesto, fragmentos
+
+
+def guardar_indice_causas(manifiesto, fragmentos, parcial=False):
+    """
+    Escribe indice.json y un <prefijo>.json por fragmento; borra fragmentos obsoletos.
+    Con parcial, solo reescribe los fragmentos dados (el manifiesto no cambia).
+    """
+    INDICE_DIR.mkdir(parents=True, exist_ok=True)
+    archivos = [(f"{p}.json", f) for p, f in fragmentos.items()]
+    if not parcial:
+        vigentes = {nombre for nombre, _ in archivos} | {'indice.json'}
+        for viejo in INDICE_DIR.glob('*.json'):
+            if viejo.name not in vigentes:
+                viejo.unlink()
+        archivos.insert(0, ('indice.json', manifiesto))
+
+    for nombre, datos in archivos:
+        contenido = json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        escribir_si_cambia(INDICE_DIR / nombre, contenido)
+    total = sum(p.stat().st_size for p in INDICE_DIR.glob('*.json')) / 1024
+    print(f"   📁 Guardado: {INDICE_DIR} ({len(fragmentos) + 1} archivos, {total:.1f} KB)")
+
+
 def preparar_primas_json(primas):
     """
     Prepara la matriz de primas para visualización.
@@ -154,32 +319,26 @@ def preparar_primas_json(primas):
     return df
 
 
-def calcular_resumen_general(siniestros, clasificacion):
+def calcular_resumen_general(siniestros, generado=None):
     """
     Calcula estadísticas globales para las tarjetas del dashboard.
+    `generado` es por omisión la fecha del insumo de siniestros más reciente, para
+    que el archivo no cambie entre corridas con los mismos datos.
     """
     print("\n🔧 Calculando resumen general...")
+    df = siniestros
 
-    # Filtrar edades válidas
-    df = siniestros[(siniestros['EDAD'] >= 25) & (siniestros['EDAD'] <= 70)].copy()
-
-    # Mapear niveles
-    causa_nivel = dict(zip(clasificacion['causa'], clasificacion['nivel']))
-    df['NIVEL'] = df['CAUSA'].map(causa_nivel).fillna(1).astype(int)
-
-    # Ajustar por inflación
-    df['MONTO_AJUSTADO'] = df['MONTO_PAGADO'] * df['ANIO'].map(INFLACION_MEDICA)
-
-    # Totales
+    # Totales (montos sumados en centavos enteros)
     total_siniestros = int(df['NUM_SINIESTROS'].sum())
-    monto_total = float(df['MONTO_AJUSTADO'].sum())
+    monto_total = int(df['CENTAVOS_AJUSTADO'].sum()) / 100
     monto_promedio = monto_total / total_siniestros if total_siniestros > 0 else 0
 
     # Por nivel
     por_nivel = df.groupby('NIVEL').agg({
         'NUM_SINIESTROS': 'sum',
-        'MONTO_AJUSTADO': 'sum'
+        'CENTAVOS_AJUSTADO': 'sum'
     }).reset_index()
+    por_nivel['MONTO_AJUSTADO'] = por_nivel['CENTAVOS_AJUSTADO'] / 100
 
     distribucion_nivel = []
     for _, row in por_nivel.iterrows():
@@ -207,26 +366,516 @@ def calcular_resumen_general(siniestros, clasificacion):
         'distribucion_nivel': distribucion_nivel,
         'anios_disponibles': anios,
         'rango_edad': {'min': edad_min, 'max': edad_max},
-        'generado': datetime.now().isoformat()
+        'generado': generado or fecha_insumos(FUENTES['siniestros'])
     }
 
     print(f"   ✓ Resumen calculado: {total_siniestros:,} siniestros, ${monto_total:,.0f} MXN")
     return resumen
 
 
+def preparar_polizas_agregadas(polizas):
+    """
+    Agrega pólizas por (ANIO, EDAD, SEXO) para la página de pólizas.
+    Estructura: [{anio, edad, sexo, num_asegurados, prima_emitida, suma_asegurada, prima_promedio}]
+    """
+    print("\n🔧 Preparando pólizas agregadas...")
+
+    df = polizas.groupby(['ANIO', 'EDAD', 'SEXO'], observed=True)[MEDIDAS_POLIZAS].sum().reset_index()
+    df['PRIMA_PROMEDIO'] = df['PRIMA_EMITIDA'] / df['NUM_ASEGURADOS']
+
+    df.columns = ['anio', 'edad', 'sexo', 'num_asegurados', 'prima_emitida',
+                  'suma_asegurada', 'prima_promedio']
+    df['sexo'] = df['sexo'].astype(str)
+    df['prima_emitida'] = df['prima_emitida'].round(2)
+    df['prima_promedio'] = df['prima_promedio'].round(2)
+
+    print(f"   ✓ Agregado a {len(df):,} filas")
+    return df
+
+
+def preparar_polizas_resumen_anual(polizas):
+    """
+    Totales de pólizas por año.
+    Estructura: [{anio, num_asegurados, prima_emitida, suma_asegurada}]
+    """
+    print("\n🔧 Preparando resumen anual de pólizas...")
+
+    df = polizas.groupby('ANIO')[MEDIDAS_POLIZAS].sum().reset_index()
+    df.columns = ['anio', 'num_asegurados', 'prima_emitida', 'suma_asegurada']
+    df['prima_emitida'] = df['prima_emitida'].round(2)
+
+    print(f"   ✓ {len(df):,} años")
+    return df
+
+
+def preparar_polizas_por_banda(polizas):
+    """
+    Asegurados y prima emitida por banda de edad (mismas bandas que price_census).
+    Estructura: [{banda_edad, num_asegurados, prima_emitida, pct_asegurados}]
+    """
+    print("\n🔧 Preparando pólizas por banda de edad...")
+
+    banda = BANDA_POR_EDAD[polizas['EDAD'].to_numpy().astype('int64') - EDAD_MIN]
+    df = polizas.groupby(banda)[['NUM_ASEGURADOS', 'PRIMA_EMITIDA']].sum()
+    df = df.reindex(range(len(ETIQUETAS_BANDA)), fill_value=0).reset_index(drop=True)
+    df.insert(0, 'banda_edad', ETIQUETAS_BANDA)
+
+    df.columns = ['banda_edad', 'num_asegurados', 'prima_emitida']
+    df['prima_emitida'] = df['prima_emitida'].round(2)
+    df['pct_asegurados'] = (df['num_asegurados'] / df['num_asegurados'].sum() * 100).round(1)
+
+    print(f"   ✓ {len(df):,} bandas")
+    return df
+
+
+# =============================================================================
+# AGREGADOR DE UNA PASADA
+# =============================================================================
+
+def preparar_intermedio(siniestros, polizas, clasificacion, primas):
+    """
+    Recorre cada cubo una sola vez y lo reduce al grano más fino que usa el
+    dashboard. Las filas con SEXO nulo se conservan (cuentan en los totales,
+    aunque no en las tablas por sexo). Un cubo en None (no hace falta
+    regenerar nada que dependa de él) se omite.
+
+    Los montos de siniestros pasan a centavos enteros: CENTAVOS_PAGADO y
+    CENTAVOS_AJUSTADO (el pagado de cada celda por el factor de su año), con la
+    misma regla que incremental_repricing.py para que ambas rutas coincidan.
+    """
+    print("\n🔧 Reduciendo cubos al intermedio del dashboard...")
+    intermedio = {'clasificacion': clasificacion, 'primas': primas}
+    if siniestros is not None:
+        reducido = siniestros.groupby(['ANIO', 'EDAD', 'SEXO', 'NIVEL'], observed=True,
+                                      dropna=False)[['NUM_SINIESTROS', 'MONTO_PAGADO']].sum().reset_index()
+        pagado = centavos(reducido.pop('MONTO_PAGADO'))
+        intermedio['siniestros'] = reducido.assign(
+            CENTAVOS_PAGADO=pagado, CENTAVOS_AJUSTADO=ajustar_centavos(pagado, reducido['ANIO']))
+    if polizas is not None:
+        intermedio['polizas'] = polizas.groupby(
+            ['ANIO', 'EDAD', 'SEXO'], observed=True, dropna=False)[MEDIDAS_POLIZAS].sum().reset_index()
+    print(f"   ✓ {len(intermedio.get('siniestros', [])):,} celdas de siniestros, "
+          f"{len(intermedio.get('polizas', [])):,} de pólizas")
+    return intermedio
+
+
+# Salidas del dashboard: (archivo, parte del intermedio que leen, función sobre esa parte)
+SALIDAS = [
+    ('siniestros-agregados.json', 'siniestros', preparar_siniestros_agregados),
+    ('clasificacion.json', 'clasificacion', preparar_clasificacion_dropdown),
+    ('primas-nivel-edad.json', 'primas', preparar_primas_json),
+    ('resumen-general.json', 'siniestros', calcular_resumen_general),
+    ('polizas-agregadas.json', 'polizas', preparar_polizas_agregadas),
+    ('polizas-resumen-anual.json', 'polizas', preparar_polizas_resumen_anual),
+    ('polizas-por-banda.json', 'polizas', preparar_polizas_por_banda),
+]
+
+# Salidas de varios archivos: (nombre, directorio, parte del intermedio, función que escribe)
+DIRECTORIOS = [
+    ('indice-causas', INDICE_DIR, 'clasificacion',
+     lambda c: guardar_indice_causas(*construir_indice_causas(preparar_clasificacion_dropdown(c)))),
+    ('siniestros-por-anio', SINIESTROS_DIR, 'siniestros',
+     lambda s: guardar_siniestros_por_anio(*preparar_siniestros_por_anio(preparar_siniestros_agregados(s)))),
+]
+
+
+def medir(etiqueta, funcion, *args):
+    """
+    Ejecuta funcion(*args) midiendo tiempo y memoria pico (tracemalloc debe
+    estar activo). Returns: (resultado, {etapa, segundos, pico_mb})
+    """
+    inicial, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    return resultado, {'etapa': etiqueta, 'segundos': segundos, 'pico_mb': (pico - inicial) / 1e6}
+
+
+def generar_salidas(intermedio, pendientes, columnar=False):
+    """
+    Calcula y guarda las salidas pendientes desde el intermedio (y su variante
+    compacta si columnar). Returns: lista de mediciones.
+    """
+    def etapa(archivo, preparar, parte):
+        datos = preparar(intermedio[parte])
+        guardar_json(datos, archivo)
+        if columnar:
+            guardar_compacto(datos, archivo)
+
+    mediciones = []
+    for archivo, parte, preparar in SALIDAS:
+        if archivo in pendientes:
+            _, medicion = medir(archivo, etapa, archivo, preparar, parte)
+            mediciones.append(medicion)
+    for nombre, _, parte, escribir in DIRECTORIOS:
+        if nombre in pendientes:
+            _, medicion = medir(nombre, escribir, intermedio[parte])
+            mediciones.append(medicion)
+    return mediciones
+
+
+# =============================================================================
+# MANIFIESTO DE CONTENIDO
+# =============================================================================
+
+# Insumos de cada parte del intermedio (toda salida depende además de este script)
+FUENTES = {
+    'siniestros': [SINIESTROS_FILE, CLASIFICACION_FILE, CATALOGO_FILE, FACTORES_FILE],
+    'polizas': [POLIZAS_FILE],
+    'clasificacion': [CLASIFICACION_FILE],
+    'primas': [PRIMAS_FILE],
+}
+SCRIPT_FILE = Path(__file__).resolve()
+
+
+def _relativa(ruta):
+    return Path(ruta).resolve().relative_to(BASE_DIR).as_posix()
+
+
+def sha256_bytes(contenido):
+    return hashlib.sha256(contenido).hexdigest()
+
+
+def sha256_archivo(ruta):
+    """SHA-256 de un archivo leído por bloques."""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def fecha_insumos(rutas):
+    """Fecha de modificación más reciente de los insumos existentes (ISO 8601)."""
+    fechas = [Path(r).stat().st_mtime for r in rutas if Path(r).exists()]
+    return datetime.fromtimestamp(max(fechas)).isoformat() if fechas else None
+
+
+def huellas_insumos():
+    """
+    {ruta relativa: {sha256}} de todos los insumos (None si no existe). Solo cuenta
+    el contenido: tocar un archivo sin cambiarlo no regenera nada.
+    """
+    huellas = {}
+    for ruta in sorted({Path(r) for rutas in FUENTES.values() for r in rutas} | {SCRIPT_FILE}):
+        huellas[_relativa(ruta)] = {'sha256': sha256_archivo(ruta) if ruta.exists() else None}
+    return huellas
+
+
+def huella_salida(ruta):
+    """SHA-256 de un archivo, o de la lista (nombre, hash) de un directorio; None si no existe."""
+    ruta = Path(ruta)
+    if ruta.is_dir():
+        contenido = ''.join(f"{p.name}:{sha256_archivo(p)}\n" for p in sorted(ruta.iterdir()) if p.is_file())
+        return sha256_bytes(contenido.encode('utf-8'))
+    return sha256_archivo(ruta) if ruta.exists() else None
+
+
+def artefactos():
+    """(nombre, ruta, parte) de cada salida del manifiesto."""
+    return ([(archivo, OUTPUT_DIR / archivo, parte) for archivo, parte, _ in SALIDAS] +
+            [(nombre, directorio, parte) for nombre, directorio, parte, _ in DIRECTORIOS])
+
+
+def insumos_de(parte, huellas):
+    """Hashes de los insumos de los que depende una parte del intermedio."""
+    return {clave: huellas[clave]['sha256'] for clave in
+            sorted({_relativa(r) for r in FUENTES[parte]} | {_relativa(SCRIPT_FILE)})}
+
+
+def salidas_pendientes(manifiesto, huellas, columnar=False):
+    """
+    Nombres de las salidas a regenerar: sin registro, con insumos distintos a los
+    registrados o cuyo contenido ya no coincide con su hash (borradas o editadas
+    por otro proceso). Con columnar también las que no tienen variante compacta.
+    """
+    pendientes = set()
+    registradas = manifiesto.get('salidas', {})
+    for nombre, ruta, parte in artefactos():
+        registro = registradas.get(nombre)
+        if (registro is None or registro.get('insumos') != insumos_de(parte, huellas)
+                or registro.get('sha256') != huella_salida(ruta)):
+            pendientes.add(nombre)
+        elif columnar and ruta.suffix == '.json' and not any(
+                (COMPACTO_DIR / f"{nombre.removesuffix('.json')}{sufijo}").exists()
+                for sufijo in ('.col.json', '.min.json')):
+            pendientes.add(nombre)
+    return pendientes
+
+
+def cargar_manifiesto():
+    if not MANIFIESTO_FILE.exists():
+        return {}
+    with open(MANIFIESTO_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def actualizar_manifiesto(manifiesto, huellas, regeneradas):
+    """Registra insumos y hashes de las salidas regeneradas; escribe solo si cambió."""
+    salidas = dict(manifiesto.get('salidas', {}))
+    for nombre, ruta, parte in artefactos():
+        if nombre in regeneradas:
+            salidas[nombre] = {
+                'ruta': Path(ruta).relative_to(OUTPUT_DIR.parent).as_posix(),
+                'sha256': huella_salida(ruta),
+                'insumos': insumos_de(parte, huellas),
+            }
+    nuevo = {'version': 1, 'insumos': huellas, 'salidas': dict(sorted(salidas.items()))}
+    escribir_si_cambia(MANIFIESTO_FILE, json.dumps(nuevo, ensure_ascii=False, indent=2).encode('utf-8'))
+    return nuevo
+
+
+def escribir_si_cambia(ruta, contenido):
+    """Escribe bytes solo si difieren de los del archivo actual. Returns: True si escribió."""
+    ruta = Path(ruta)
+    if ruta.exists() and ruta.stat().st_size == len(contenido) and ruta.read_bytes() == contenido:
+        return False
+    ruta.write_bytes(contenido)
+    return True
+
+
+# =============================================================================
+# FORMATO COLUMNAR COMPACTO
+# =============================================================================
+
+# Decimales máximos para guardar una columna como enteros escalados (centavos)
+MAX_DECIMALES = 2
+ENTERO_SEGURO = 2 ** 53  # Mayor entero exacto en un number de JavaScript
+
+
+def _columna_decimal(valores):
+    """
+    Columna float como {escala, valores} enteros si todos sus valores tienen a lo
+    sumo MAX_DECIMALES decimales (montos redondeados); si no, la lista tal cual.
+    """
+    if len(valores) and np.isfinite(valores).all():
+        for decimales in range(MAX_DECIMALES + 1):
+            escala = 10 ** decimales
+            enteros = np.round(valores * escala)
+            if np.array_equal(enteros / escala, valores) and np.abs(enteros).max() < ENTERO_SEGURO:
+                return {'escala': escala, 'valores': enteros.astype('int64').tolist()}
+    return valores.tolist()
+
+
+def _columna_texto(serie):
+    """Columna de texto como {diccionario, codigos} si tiene repetidos; si no, la lista."""
+    codigos, diccionario = pd.factorize(serie)
+    if len(diccionario) == len(serie) or (codigos < 0).any():
+        return serie.tolist()
+    return {'diccionario': list(diccionario), 'codigos': codigos.tolist()}
+
+
+def codificar_columnar(df):
+    """
+    Codifica una tabla en columnas:
+
+        {"formato": "columnar", "version": 1, "filas": N, "columnas": {nombre: columna}}
+
+    Cada columna es una lista de valores, o bien {diccionario, codigos} para
+    texto repetido (sexo, descripcion) o {escala, valores} para montos guardados
+    como enteros (valor = entero / escala).
+    """
+    columnas = {}
+    for nombre in df.columns:
+        serie = df[nombre]
+        if serie.dtype.kind in 'iub':
+            columnas[nombre] = serie.tolist()
+        elif serie.dtype.kind == 'f':
+            columnas[nombre] = _columna_decimal(serie.to_numpy())
+        else:
+            columnas[nombre] = _columna_texto(serie)
+    return {'formato': 'columnar', 'version': 1, 'filas': len(df), 'columnas': columnas}
+
+
+def decodificar_columnar(datos):
+    """Inverso de codificar_columnar: lista de registros (igual a web/lib/columnar.ts)."""
+    columnas = []
+    for columna in datos['columnas'].values():
+        if isinstance(columna, list):
+            columnas.append(columna)
+        elif 'diccionario' in columna:
+            diccionario = columna['diccionario']
+            columnas.append([diccionario[c] for c in columna['codigos']])
+        else:
+            escala = columna['escala']
+            columnas.append([v / escala for v in columna['valores']])
+    nombres = list(datos['columnas'])
+    return [dict(zip(nombres, fila)) for fila in zip(*columnas)]
+
+
+def nombre_compacto(filename, data):
+    """Nombre de la variante compacta: .col.json para tablas, .min.json para objetos."""
+    base = filename.removesuffix('.json')
+    return f"{base}.col.json" if isinstance(data, pd.DataFrame) else f"{base}.min.json"
+
+
+def escribir_compacto(filepath, data):
+    """Escribe data como JSON sin sangría (tablas en columnas) junto con sus .gz/.br."""
+    if isinstance(data, pd.DataFrame):
+        data = codificar_columnar(data)
+    contenido = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    if not escribir_si_cambia(filepath, contenido) and filepath.with_name(filepath.name + '.gz').exists():
+        return
+    # mtime=0: el .gz no cambia si no cambia el contenido
+    filepath.with_name(filepath.name + '.gz').write_bytes(gzip.compress(contenido, compresslevel=9, mtime=0))
+    if brotli is not None:
+        filepath.with_name(filepath.name + '.br').write_bytes(brotli.compress(contenido, quality=11))
+
+
+def guardar_compacto(data, filename):
+    """Guarda la variante compacta de una salida y sus versiones .gz/.br."""
+    COMPACTO_DIR.mkdir(parents=True, exist_ok=True)
+    filepath = COMPACTO_DIR / nombre_compacto(filename, data)
+    escribir_compacto(filepath, data)
+    print(f"   📁 Compacto: {filepath}")
+
+
+def _mejor_tiempo(funcion, repeticiones=5):
+    """Menor tiempo (s) de varias ejecuciones."""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def reporte_formatos(salidas=SALIDAS):
+    """
+    Compara, por archivo, el tamaño del JSON por filas contra la variante compacta
+    (y sus versiones comprimidas), y el tiempo de lectura de cada uno (json.loads;
+    en la variante columnar incluye reconstruir los registros).
+    """
+    print("\n" + "=" * 60)
+    print("COMPARACIÓN DE FORMATOS")
+    print("=" * 60)
+    print(f"\n   {'Archivo':<28} {'Filas':>9} {'Filas gz':>9} {'Compacto':>9} "
+          f"{'gz':>8} {'br':>8} {'Lectura':>16}")
+
+    for archivo, *_ in salidas:
+        filas = (OUTPUT_DIR / archivo).read_bytes()
+        base = archivo.removesuffix('.json')
+        compacto = next((p for p in (COMPACTO_DIR / f"{base}.col.json", COMPACTO_DIR / f"{base}.min.json")
+                         if p.exists()), None)
+        if compacto is None:
+            continue
+        contenido = compacto.read_bytes()
+        datos = json.loads(contenido)
+
+        if datos.get('formato') == 'columnar':
+            assert decodificar_columnar(datos) == json.loads(filas), f"{compacto.name} no reproduce {archivo}"
+            leer_compacto = lambda: decodificar_columnar(json.loads(contenido))  # noqa: E731
+        else:
+            leer_compacto = lambda: json.loads(contenido)  # noqa: E731
+        t_filas = _mejor_tiempo(lambda: json.loads(filas))
+        t_compacto = _mejor_tiempo(leer_compacto)
+
+        br = compacto.with_name(compacto.name + '.br')
+        tam_br = f"{br.stat().st_size / 1024:.1f}" if br.exists() else '-'
+        tam_gz = compacto.with_name(compacto.name + '.gz').stat().st_size / 1024
+        print(f"   {archivo:<28} {len(filas) / 1024:>9.1f} {len(gzip.compress(filas, mtime=0)) / 1024:>9.1f} "
+              f"{len(contenido) / 1024:>9.1f} {tam_gz:>8.1f} {tam_br:>8} "
+              f"{t_filas * 1000:>6.1f} → {t_compacto * 1000:>5.1f} ms")
+
+    print("\n   Tamaños en KB.")
+    if brotli is None:
+        print("   (brotli no instalado: no se generaron variantes .br)")
+
+
+# =============================================================================
+# SINIESTROS POR AÑO
+# =============================================================================
+
+def preparar_siniestros_por_anio(agregados):
+    """
+    Parte siniestros-agregados por año y precalcula los totales a lo largo de los
+    filtros del explorador (año, sexo, nivel) acumulados por edad, para que
+    cualquier rango de edad salga de una resta:
+
+        total(edad_min..edad_max) = acumulado[edad_max - EDAD + 1] - acumulado[edad_min - EDAD]
+
+    Returns:
+        (resumen, {anio: DataFrame del año})
+        resumen: anios, sexos, niveles, edad_min/edad_max, archivos y
+        acumulados {filas, num_siniestros, monto_ajustado} de forma
+        (anio, sexo, nivel, edad + 1)
+    """
+    print("\n🔧 Partiendo siniestros agregados por año...")
+
+    anios = sorted(agregados['anio'].unique().tolist())
+    sexos = sorted(agregados['sexo'].unique().tolist())
+    niveles = sorted(agregados['nivel'].unique().tolist())
+    edad_min, edad_max = int(agregados['edad'].min()), int(agregados['edad'].max())
+
+    indices = (
+        np.searchsorted(anios, agregados['anio']),
+        np.searchsorted(sexos, agregados['sexo']),
+        np.searchsorted(niveles, agregados['nivel']),
+        agregados['edad'].to_numpy() - edad_min + 1,
+    )
+    forma = (len(anios), len(sexos), len(niveles), edad_max - edad_min + 2)
+    acumulados = {}
+    for medida, valores in [('filas', np.ones(len(agregados))),
+                            ('num_siniestros', agregados['num_siniestros'].to_numpy()),
+                            ('monto_ajustado', agregados['monto_ajustado'].to_numpy())]:
+        cubo = np.zeros(forma)
+        np.add.at(cubo, indices, valores)
+        # Montos ya redondeados a pesos: las sumas son enteras
+        acumulados[medida] = np.rint(cubo.cumsum(axis=-1)).astype('int64').tolist()
+
+    por_anio = {anio: df.reset_index(drop=True) for anio, df in agregados.groupby('anio')}
+    resumen = {
+        'version': 1,
+        'anios': anios,
+        'sexos': sexos,
+        'niveles': niveles,
+        'edad_min': edad_min,
+        'edad_max': edad_max,
+        'archivos': {str(anio): f"{anio}.col.json" for anio in anios},
+        'acumulados': acumulados,
+    }
+    print(f"   ✓ {len(anios)} años, resumen de {np.prod(forma):,} acumulados")
+    return resumen, por_anio
+
+
+def guardar_siniestros_por_anio(resumen, por_anio):
+    """Escribe resumen.json y un <anio>.col.json por año; borra años obsoletos."""
+    SINIESTROS_DIR.mkdir(parents=True, exist_ok=True)
+    vigentes = set(resumen['archivos'].values()) | {'resumen.json'}
+    for viejo in SINIESTROS_DIR.iterdir():
+        if viejo.name.split('.json')[0] + '.json' not in vigentes:
+            viejo.unlink()
+
+    escribir_compacto(SINIESTROS_DIR / 'resumen.json', resumen)
+    for anio, df in por_anio.items():
+        escribir_compacto(SINIESTROS_DIR / resumen['archivos'][str(anio)], df)
+    print(f"   📁 Guardado: {SINIESTROS_DIR} ({len(por_anio)} años)")
+
+
 def guardar_json(data, filename):
-    """Guarda datos como JSON con formato legible."""
+    """Guarda datos como JSON con formato legible (solo si el contenido cambió)."""
     filepath = OUTPUT_DIR / filename
-    with open(filepath, 'w', encoding='utf-8') as f:
-        if isinstance(data, pd.DataFrame):
-            json.dump(data.to_dict(orient='records'), f, ensure_ascii=False, indent=2)
-        else:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-    print(f"   📁 Guardado: {filepath}")
+    if isinstance(data, pd.DataFrame):
+        data = data.to_dict(orient='records')
+    contenido = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    if escribir_si_cambia(filepath, contenido):
+        print(f"   📁 Guardado: {filepath}")
+    else:
+        print(f"   ✓ Sin cambios: {filepath}")
 
 
 def main():
-    """Ejecuta la preparación completa de datos."""
+    """Ejecuta la preparación de datos (solo de las salidas con insumos nuevos)."""
+    parser = argparse.ArgumentParser(description="Preparación de datos para el frontend")
+    parser.add_argument('--columnar', action='store_true',
+                        help="Escribir además variantes columnares y precomprimidas en web/public/data")
+    parser.add_argument('--forzar', action='store_true',
+                        help="Regenerar todas las salidas aunque sus insumos no hayan cambiado")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("PREPARACIÓN DE DATOS PARA FRONTEND")
     print(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -235,40 +884,61 @@ def main():
     # Crear directorio de salida
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Cargar datos fuente
-    siniestros = cargar_siniestros()
+    # Salidas cuyos insumos cambiaron desde la última corrida
+    manifiesto = cargar_manifiesto()
+    huellas = huellas_insumos()
+    if args.forzar:
+        pendientes = {nombre for nombre, _, _ in artefactos()}
+    else:
+        pendientes = salidas_pendientes(manifiesto, huellas, args.columnar)
+    partes = {parte for nombre, _, parte in artefactos() if nombre in pendientes}
+
+    if not pendientes:
+        print("\n✅ Sin cambios en los insumos: no se regeneró ningún archivo")
+        print(f"   (manifiesto: {MANIFIESTO_FILE})")
+        return
+    print(f"\n🔎 Salidas por regenerar: {len(pendientes)} de {len(artefactos())}")
+    for nombre in sorted(pendientes):
+        print(f"   - {nombre}")
+
+    tracemalloc.start()
+
+    # Cargar solo los datos fuente que hacen falta y reducirlos una sola vez
+    mediciones = []
+    siniestros = polizas = None
+    if partes & {'siniestros', 'polizas'}:
+        (siniestros, polizas), carga = medir('carga de cubos', cargar_cubos)
+        mediciones.append(carga)
     clasificacion = cargar_clasificacion()
-    primas = cargar_primas()
+    primas = cargar_primas() if 'primas' in partes else None
+    intermedio, reduccion = medir('intermedio', preparar_intermedio,
+                                  siniestros, polizas, clasificacion, primas)
+    mediciones.append(reduccion)
+    del siniestros, polizas
 
     # Preparar y guardar cada archivo
     print("\n" + "=" * 60)
     print("GENERANDO ARCHIVOS JSON")
     print("=" * 60)
-
-    # 1. Siniestros agregados (~5K filas)
-    agregados = preparar_siniestros_agregados(siniestros, clasificacion)
-    guardar_json(agregados, 'siniestros-agregados.json')
-
-    # 2. Clasificación para dropdown (9K causas)
-    clasificacion_dropdown = preparar_clasificacion_dropdown(clasificacion)
-    guardar_json(clasificacion_dropdown, 'clasificacion.json')
-
-    # 3. Primas por nivel y edad (138 registros)
-    primas_json = preparar_primas_json(primas)
-    guardar_json(primas_json, 'primas-nivel-edad.json')
-
-    # 4. Resumen general
-    resumen = calcular_resumen_general(siniestros, clasificacion)
-    guardar_json(resumen, 'resumen-general.json')
+    mediciones += generar_salidas(intermedio, pendientes, columnar=args.columnar)
+    tracemalloc.stop()
+    actualizar_manifiesto(manifiesto, huellas, pendientes)
 
     # Resumen final
     print("\n" + "=" * 60)
     print("✅ PREPARACIÓN COMPLETADA")
     print("=" * 60)
-    print("\nArchivos generados:")
-    for f in OUTPUT_DIR.glob('*.json'):
-        size = f.stat().st_size / 1024
-        print(f"   - {f.name}: {size:.1f} KB")
+    print(f"\n   {'Etapa':<28} {'Tiempo':>10} {'Pico':>10} {'Tamaño':>10}")
+    for m in mediciones:
+        archivo = OUTPUT_DIR / m['etapa']
+        size = f"{archivo.stat().st_size / 1024:.1f} KB" if archivo.suffix == '.json' else '-'
+        print(f"   {m['etapa']:<28} {m['segundos'] * 1000:>7.0f} ms {m['pico_mb']:>7.1f} MB {size:>10}")
+    total = sum(m['segundos'] for m in mediciones)
+    print(f"   {'Total':<28} {total * 1000:>7.0f} ms")
+    print(f"   Manifiesto: {MANIFIESTO_FILE}")
+
+    if args.columnar:
+        reporte_formatos()
 
 
 if __name__ == '__main__':